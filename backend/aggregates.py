@@ -0,0 +1,88 @@
+# backend/aggregates.py
+import math
+import bisect
+import threading
+
+
+def row_due(row):
+    try:
+        due = float(row.get('due', 0))
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(due) else due
+
+
+class CustomerSummary:
+    """Dashboard figures for active customers, kept current from store events.
+
+    CustomerStore calls reset() after a full (re)load and change() for every
+    row insert/update/delete, so count, total due, the paid/unpaid split and a
+    due-sorted index are maintained incrementally and snapshot() is O(top).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        self.count = 0
+        self.total_due = 0.0
+        self.paid = 0
+        self.unpaid = 0
+        self._by_due = []    # sorted (-due, id) for active customers with due > 0
+        self._names = {}     # id -> name, for the same customers
+
+    # ---------------- Store events ----------------
+    def reset(self, rows):
+        with self._lock:
+            self._reset_state()
+            for row in rows:
+                self._add(row)
+
+    def change(self, old, new):
+        with self._lock:
+            if old is not None:
+                self._remove(old)
+            if new is not None:
+                self._add(new)
+
+    def _add(self, row):
+        if row.get('status') != 'active':
+            return
+        due = row_due(row)
+        self.count += 1
+        self.total_due += due
+        if due == 0:
+            self.paid += 1
+        elif due > 0:
+            self.unpaid += 1
+            bisect.insort(self._by_due, (-due, row['id']))
+            self._names[row['id']] = row.get('name')
+
+    def _remove(self, row):
+        if row.get('status') != 'active':
+            return
+        due = row_due(row)
+        self.count -= 1
+        self.total_due -= due
+        if due == 0:
+            self.paid -= 1
+        elif due > 0:
+            self.unpaid -= 1
+            entry = (-due, row['id'])
+            i = bisect.bisect_left(self._by_due, entry)
+            if i < len(self._by_due) and self._by_due[i] == entry:
+                del self._by_due[i]
+            self._names.pop(row['id'], None)
+
+    # ---------------- Reads ----------------
+    def snapshot(self, top=5):
+        with self._lock:
+            return {
+                "total_customers": self.count,
+                "total_due": round(self.total_due, 2),
+                "paid": self.paid,
+                "unpaid": self.unpaid,
+                "top_debtors": [{"id": cid, "name": self._names.get(cid), "due": -neg_due}
+                                for neg_due, cid in self._by_due[:top]],
+            }
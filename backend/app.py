@@ -8,16 +8,31 @@ if project_root not in sys.path:
 
 from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Now safe to import
 from backend.razorpay_utils import save_keys, create_upi_order, check_payment_status
 from backend.routes import routes
 from backend.scheduler import start_scheduler
+from backend.services import start_journal_compactor, start_log_rotation
+from backend.metrics import init_request_metrics
+from backend.tracing import init_tracing
+from backend.notifications.email_service import start_outbox
+from backend.sessions import check_session_config
 
-def create_app():
+# Reverse proxies in front of the API that append to X-Forwarded-For (0 = none, trust no header).
+# With one or more, request.remote_addr is the client they saw, e.g. for per-IP login throttling.
+TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", 0))
+
+def create_app(trusted_proxies=None):
     """Application factory pattern"""
     app = Flask(__name__)
     CORS(app)
+    trusted_proxies = TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+    if trusted_proxies > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies)
+    init_request_metrics(app)
+    init_tracing(app)
     
     # Register the blueprint
     app.register_blueprint(routes, url_prefix='/api')
@@ -27,5 +42,9 @@ def create_app():
 app = create_app()
 
 if __name__ == "__main__":
+    check_session_config()
     start_scheduler()
+    start_journal_compactor()
+    start_log_rotation()
+    start_outbox()
     app.run(debug=True, port=5000)
\ No newline at end of file
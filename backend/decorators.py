@@ -1,8 +1,10 @@
-import os, csv
+import os
 from functools import wraps
 from datetime import datetime
+from backend.cache import bump_version
+from backend.logwriter import log_writer
 
-LOG_FILE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'logs.csv')
+LOG_FILE_PATH = os.path.join(os.getenv("DATA_PATH") or os.path.join(os.path.dirname(__file__), 'data'), 'logs.csv')
 
 def log_action(message=None):
     def decorator(func):
@@ -16,11 +18,17 @@ def log_action(message=None):
                 'args': str(args) if args else '',
                 'kwargs': str(kwargs) if kwargs else ''
             }
-            file_exists = os.path.isfile(LOG_FILE_PATH)
-            with open(LOG_FILE_PATH, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=log_entry.keys())
-                if not file_exists: writer.writeheader()
-                writer.writerow(log_entry)
+            log_writer.write(LOG_FILE_PATH, log_entry)  # written in batches off the request thread
             return result
         return wrapper
     return decorator
+
+def bumps_version(func):
+    """Mark a service function as a write: cached read responses and ETags go stale."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            bump_version()
+    return wrapper
@@ -0,0 +1,109 @@
+# backend/export.py
+import io
+import pandas as pd
+from backend.storage.sqlite_engine import COLUMN_TYPES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+# format -> (mimetype, file extension)
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def _aligned(chunks):
+    """Give every chunk the column layout of the first one."""
+    columns = None
+    for chunk in chunks:
+        if columns is None:
+            columns = list(chunk.columns)
+        yield chunk.reindex(columns=columns)
+
+
+def _ndjson(chunks):
+    for chunk in chunks:
+        if not chunk.empty:
+            yield chunk.to_json(orient='records', lines=True, date_format='iso')
+
+
+def _csv(chunks):
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header)
+        header = False
+
+
+class _Sink(io.RawIOBase):
+    """Write target for ParquetWriter that hands back what was written so far."""
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_type(column):
+    # Same affinities as the SQLite schema; rows mix ints and strings in text
+    # columns (e.g. phone), so anything not declared numeric is written as text
+    return {"INTEGER": pa.int64(), "REAL": pa.float64()}.get(COLUMN_TYPES.get(column), pa.string())
+
+
+def _arrow_table(chunk, schema):
+    data = {}
+    for field in schema:
+        col = chunk[field.name]
+        if pa.types.is_string(field.type):
+            data[field.name] = col.where(col.isna(), col.astype(str)).astype(object)
+        else:
+            data[field.name] = pd.to_numeric(col, errors='coerce')
+    return pa.Table.from_pandas(pd.DataFrame(data), schema=schema, preserve_index=False, safe=False)
+
+
+def _parquet(chunks):
+    # One row group per chunk, flushed to the client as soon as it is written
+    sink, writer, schema = _Sink(), None, None
+    for chunk in chunks:
+        if writer is None:
+            schema = pa.schema([(str(c), _arrow_type(c)) for c in chunk.columns])
+            writer = pq.ParquetWriter(sink, schema)
+        writer.write_table(_arrow_table(chunk, schema))
+        yield sink.drain()
+    if writer is None:
+        writer = pq.ParquetWriter(sink, pa.schema([]))
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(chunks, fmt):
+    """Turn an iterator of DataFrames into an iterator of encoded bytes/str.
+
+    Raises ValueError up front (before anything is streamed) for an unknown
+    format or when Parquet is requested without pyarrow installed.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (expected one of {', '.join(FORMATS)})")
+    if fmt == "parquet" and pa is None:
+        raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+    writer = {"ndjson": _ndjson, "csv": _csv, "parquet": _parquet}[fmt]
+    return writer(_aligned(chunks))
@@ -0,0 +1,85 @@
+# backend/journal.py
+import os
+import json
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class Journal:
+    """Append-only JSON-lines file of row mutations.
+
+    Each mutation is one small line, so recording a change costs O(1) I/O no
+    matter how large the snapshot it applies to is. Readers replay the journal
+    over the last snapshot; compaction folds it back and truncates it.
+
+    Appends take locked(), an exclusive lock on a .lock file next to the
+    journal, so a compaction holding it in any process cannot truncate away
+    records written between its read and its truncate.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextmanager
+    def locked(self):
+        """Hold the journal's cross-process lock (not re-entrant)."""
+        with open(self.path + '.lock', 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK gives up after ~10 seconds
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, records):
+        """Append records in a single write; returns the new end offset."""
+        data = ''.join(json.dumps(r, default=str) + '\n' for r in records)
+        with self.locked(), open(self.path, 'a', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            return f.tell()
+
+    def read(self, offset=0):
+        """Return (records, end_offset) for everything after `offset`.
+
+        A trailing line without a newline is a write still in progress and is
+        left for the next read.
+        """
+        if not os.path.exists(self.path):
+            return [], 0
+        records = []
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                records.append(json.loads(line))
+        return records, offset + end
+
+    def truncate(self):
+        with open(self.path, 'w', encoding='utf-8'):
+            pass
@@ -0,0 +1,114 @@
+# backend/logwriter.py
+import os
+import csv
+import time
+import queue
+import atexit
+import threading
+
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_FLUSH_ROWS = int(os.getenv("LOG_FLUSH_ROWS", 500))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 1.0))  # seconds
+LOG_OVERFLOW = os.getenv("LOG_OVERFLOW", "drop")  # drop | block
+LOG_BLOCK_TIMEOUT = float(os.getenv("LOG_BLOCK_TIMEOUT", 5.0))  # seconds, "block" policy only
+
+
+def append_csv_rows(path, rows):
+    """Default sink: append dict rows to a CSV file, writing the header if it is new."""
+    fieldnames = []
+    for row in rows:
+        for key in row:
+            if key not in fieldnames:
+                fieldnames.append(key)
+    file_exists = os.path.isfile(path) and os.path.getsize(path) > 0
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        if not file_exists:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+class LogWriter:
+    """Audit-log rows go through a bounded queue to one background thread.
+
+    The thread writes in batches, grouped per file, whenever `flush_rows`
+    rows are waiting or `flush_interval` seconds have passed, so callers only
+    pay for a queue put. When the queue is full the "drop" policy discards
+    the row (counted in `dropped`) and "block" waits up to `block_timeout`
+    for room first. Pending rows are written at interpreter exit.
+    """
+
+    def __init__(self, max_queue=LOG_QUEUE_SIZE, flush_rows=LOG_FLUSH_ROWS,
+                 flush_interval=LOG_FLUSH_INTERVAL, overflow=LOG_OVERFLOW, block_timeout=LOG_BLOCK_TIMEOUT):
+        if overflow not in ("drop", "block"):
+            raise ValueError(f"Unknown LOG_OVERFLOW policy '{overflow}' (expected drop or block)")
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def write(self, path, row, sink=append_csv_rows):
+        """Queue one row for `path`; `sink(path, rows)` does the actual write."""
+        self._ensure_started()
+        try:
+            if self.overflow == "block":
+                self._queue.put((path, sink, row), timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait((path, sink, row))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                print(f"[WARN] Log queue full, {self.dropped} log rows dropped so far")
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_rows:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:  # close()
+                    self._write(batch)
+                    self._queue.task_done()
+                    return
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch):
+        groups = {}
+        for path, sink, row in batch:
+            groups.setdefault((path, sink), []).append(row)
+        for (path, sink), rows in groups.items():
+            try:
+                sink(path, rows)
+            except Exception as e:
+                print(f"[WARN] Could not write {len(rows)} log rows to {path}: {e}")
+        for _ in batch:
+            self._queue.task_done()
+
+    def flush(self):
+        """Block until every row queued so far has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+log_writer = LogWriter()
@@ -0,0 +1,192 @@
+# backend/metrics.py
+import os
+import time
+import bisect
+import threading
+from functools import wraps
+from flask import g, request
+from backend.tracing import span
+
+# Fixed latency buckets (seconds); observe() is one bisect and two additions
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by endpoint and status"),
+    "http_request_errors_total": ("counter", "HTTP requests answered with a 5xx status"),
+    "http_request_duration_seconds": ("histogram", "Time to build the response, per endpoint"),
+    "service_calls_total": ("counter", "Service function calls"),
+    "service_errors_total": ("counter", "Service function calls that raised"),
+    "service_duration_seconds": ("histogram", "Service function latency"),
+    "storage_duration_seconds": ("histogram", "Storage read/write latency, per table and operation"),
+    "smtp_connections_opened_total": ("counter", "SMTP connections opened (connect, STARTTLS, LOGIN)"),
+    "smtp_connection_reuses_total": ("counter", "Messages sent on an already-open pooled SMTP connection"),
+    "smtp_reconnects_total": ("counter", "Sends retried on a fresh connection after the pooled one dropped"),
+    "smtp_messages_total": ("counter", "Messages handed to the SMTP server, by outcome"),
+    "smtp_pool_connections": ("gauge", "Open pooled SMTP connections, by state"),
+    "email_queue_depth": ("gauge", "Email jobs waiting for a dispatcher worker"),
+    "email_jobs_total": ("counter", "Email jobs by outcome (ok, error, rejected when the queue was full)"),
+    "email_queue_wait_seconds": ("histogram", "Time an email job waited in the queue"),
+    "email_send_duration_seconds": ("histogram", "Time a dispatcher worker spent sending one email job"),
+    "email_outbox_pending": ("gauge", "Messages in the durable outbox not yet sent or given up on"),
+    "email_outbox_total": ("counter", "Outbox events (queued, duplicate, sent, retry, dead)"),
+    "email_send_rate_per_minute": ("gauge", "Current email send rate allowed by the shaper"),
+    "email_day_quota_remaining": ("gauge", "Sends left in the rolling 24-hour quota"),
+    "email_throttled_total": ("counter", "SMTP replies treated as provider throttling"),
+}
+PREFIX = "due_tracker_"
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Counters, gauges and fixed-bucket histograms keyed by (name, labels), rendered
+    in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name, labels, value):
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters.update(self._gauges)  # rendered the same way; names never overlap
+            histograms = {key: (list(h.counts), h.sum, h.count) for key, h in self._histograms.items()}
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            full = PREFIX + name
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            if kind in ("counter", "gauge"):
+                for (n, labels), value in sorted(counters.items()):
+                    if n == name:
+                        lines.append(f"{full}{_labels(labels)} {value}")
+                continue
+            for (n, labels), (counts, total, count) in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, c in zip(BUCKETS + (float("inf"),), counts):
+                    cumulative += c
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{full}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{full}_sum{_labels(labels)} {total}")
+                lines.append(f"{full}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+registry = MetricsRegistry()
+
+
+# ---------------- Instrumentation ----------------
+def init_request_metrics(app):
+    """Time every request and count it per route rule and status."""
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        # the rule, not the path, so ids in URLs don't explode the label set
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        labels = {"method": request.method, "endpoint": endpoint}
+        registry.observe("http_request_duration_seconds", labels, time.perf_counter() - start)
+        registry.inc("http_requests_total", {**labels, "status": str(response.status_code)})
+        if response.status_code >= 500:
+            registry.inc("http_request_errors_total", labels)
+        return response
+
+
+def timed_service(func):
+    """Record call count, errors and latency of a service function."""
+    labels = {"function": func.__name__}
+    span_name = f"service.{func.__name__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with span(span_name):  # also a node in the request's trace
+                return func(*args, **kwargs)
+        except Exception:
+            registry.inc("service_errors_total", labels)
+            raise
+        finally:
+            registry.observe("service_duration_seconds", labels, time.perf_counter() - start)
+            registry.inc("service_calls_total", labels)
+    return wrapper
+
+
+def _table(file):
+    return os.path.splitext(os.path.basename(str(file)))[0]
+
+
+def _timed_storage(engine_name, op, method, table=None):
+    file_arg = 1 if op == "save" else 0  # save(df, file); everything else takes file first
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        name = table or (_table(args[file_arg]) if len(args) > file_arg else "")
+        try:
+            with span(f"storage.{op}", table=name):
+                return method(*args, **kwargs)
+        finally:
+            registry.observe("storage_duration_seconds",
+                             {"engine": engine_name, "op": op, "table": name},
+                             time.perf_counter() - start)
+    return wrapper
+
+
+STORAGE_OPS = ("load", "tail", "save", "append", "update_where", "update_rows", "delete_where")
+
+
+def instrument_storage(engine, store):
+    """Wrap the engine's table operations and the customer store's writes
+    (journal appends / snapshots) with latency histograms."""
+    for op in STORAGE_OPS:
+        setattr(engine, op, _timed_storage(engine.name, op, getattr(engine, op)))
+    table = _table(store.path)
+    store._persist = _timed_storage(engine.name, "persist", store._persist, table)
+    store._write_snapshot = _timed_storage(engine.name, "snapshot", store._write_snapshot, table)
@@ -0,0 +1,239 @@
+# backend/notifications/delivery_log.py
+import io
+import os
+import csv
+import json
+import heapq
+import atexit
+import threading
+from array import array
+import pandas as pd
+from backend.store import _key
+
+FIELDS = ['timestamp', 'customer_id', 'customer_email', 'subject', 'status']
+EMAIL_LOG_INDEX_SAVE_ROWS = int(os.getenv("EMAIL_LOG_INDEX_SAVE_ROWS", 10000))  # newly indexed rows between saves
+
+
+def _day(timestamp):
+    return timestamp[:10]  # "%Y-%m-%d %H:%M:%S" -> "%Y-%m-%d"
+
+
+def _customer(customer_id):
+    """Index key for a customer id, so 5, "5" and "5.0" are the same customer."""
+    key = _key(customer_id)
+    return str(key) if key is not None else str(customer_id).strip()
+
+
+class DeliveryLog:
+    """email_logs.csv with indexes by customer id and by day.
+
+    The live file is indexed by byte offset: each customer and each day map
+    to the offsets of their rows, so a query seeks straight to them instead of
+    reading the file. Rows are indexed as they are appended; rows other
+    processes append are picked up by reading on from the last indexed offset.
+    The index is saved beside the log (email_logs.idx.json), so a restart only
+    reads what was written since. Once the rotator has moved the file into a
+    gzip segment (see backend/rotation.py) the offsets start over; each segment
+    gets a sidecar listing the customers and days it holds, built the first
+    time it is needed, and only segments that can match are decompressed.
+    """
+
+    def __init__(self, path, manifest=None, save_rows=EMAIL_LOG_INDEX_SAVE_ROWS):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + '.idx.json'
+        self.manifest = manifest  # SegmentManifest of the rotated segments, if any
+        self.save_rows = save_rows
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._unsaved = 0
+        self._segments = {}  # segment file -> {"customers": set, "days": set}
+        self._reset()
+        atexit.register(self.save)
+
+    def _reset(self, inode=None):
+        self._inode = inode
+        self._offset = 0
+        self._header = None
+        self._customers = {}
+        self._days = {}
+
+    # ---------------- Indexing ----------------
+    def _load(self):
+        self._loaded = True
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                saved = json.load(f)
+            st = os.stat(self.path)
+        except (OSError, ValueError):
+            return
+        if saved.get('inode') != st.st_ino or saved.get('offset', 0) > st.st_size:
+            return  # rotated or replaced since it was saved
+        self._inode, self._offset, self._header = saved['inode'], saved['offset'], saved['header']
+        self._customers = {k: array('q', v) for k, v in saved['customers'].items()}
+        self._days = {k: array('q', v) for k, v in saved['days'].items()}
+
+    def _refresh(self):
+        if not self._loaded:
+            self._load()
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            if self._offset:
+                self._reset()
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            self._reset(st.st_ino)  # rotated: the old rows are in a segment now
+        if st.st_size == self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read(st.st_size - self._offset)
+        data = data[:data.rfind(b'\n') + 1]  # leave a half-written last line for next time
+        if not data:
+            return
+        offsets, lines, pos = [], [], self._offset
+        for line in data.splitlines(keepends=True):
+            if pos == 0:
+                self._header = next(csv.reader([line.decode('utf-8')]))
+            elif line.strip():
+                offsets.append(pos)
+                lines.append(line.decode('utf-8', errors='replace'))
+            pos += len(line)
+        self._offset = pos
+        header = self._header or FIELDS
+        cid, ts = header.index('customer_id'), header.index('timestamp')
+        for offset, row in zip(offsets, csv.reader(lines)):
+            if len(row) <= max(cid, ts):
+                continue
+            customer = _customer(row[cid])
+            if customer:
+                self._customers.setdefault(customer, array('q')).append(offset)
+            self._days.setdefault(_day(row[ts]), array('q')).append(offset)
+        self._unsaved += len(offsets)
+        if self._unsaved >= self.save_rows:
+            self._save()
+
+    def _save(self):
+        if not self._offset:
+            return
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                'inode': self._inode, 'offset': self._offset, 'header': self._header,
+                'customers': {k: v.tolist() for k, v in self._customers.items()},
+                'days': {k: v.tolist() for k, v in self._days.items()},
+            }, f)
+        os.replace(tmp, self.index_path)
+        self._unsaved = 0
+
+    def save(self):
+        """Write the index out now (also done every `save_rows` rows and at exit)."""
+        with self._lock:
+            if self._unsaved:
+                self._save()
+
+    def refresh(self):
+        """Index rows appended since the last call, by this process or another."""
+        with self._lock:
+            self._refresh()
+
+    def append(self, row):
+        """Append one row (FIELDS) to the log and index it."""
+        if row.get('customer_id') not in (None, ''):
+            row = {**row, 'customer_id': _customer(row['customer_id'])}
+        buf = io.StringIO()
+        csv.DictWriter(buf, fieldnames=FIELDS, extrasaction='ignore').writerow(row)
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                if f.tell() == 0:  # new file, or the old one was just rotated away
+                    f.write((','.join(FIELDS) + '\r\n').encode('utf-8'))
+                f.write(buf.getvalue().encode('utf-8'))
+            self._refresh()
+
+    # ---------------- Queries ----------------
+    def _segment_index(self, segment):
+        index = self._segments.get(segment['file'])
+        if index is not None:
+            return index
+        sidecar = segment['path'] + '.idx.json'
+        try:
+            with open(sidecar, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            df = pd.read_csv(segment['path'], dtype=str, keep_default_na=False, usecols=['customer_id', 'timestamp'])
+            saved = {'customers': sorted(set(df['customer_id']) - {''}),
+                     'days': sorted(set(df['timestamp'].str[:10]))}
+            with open(sidecar, 'w', encoding='utf-8') as f:
+                json.dump(saved, f)
+        index = {'customers': set(map(_customer, saved['customers'])), 'days': set(saved['days'])}
+        self._segments[segment['file']] = index
+        return index
+
+    def _newest_offsets(self, customer_id, start, end):
+        """Offsets of the live rows that can match, newest first, merged lazily."""
+        if customer_id is not None:
+            return reversed(self._customers.get(_customer(customer_id), ()))
+        days = [reversed(offsets) for day, offsets in self._days.items()
+                if (start is None or day >= start) and (end is None or day <= end)]
+        return heapq.merge(*days, reverse=True)
+
+    def _live_rows(self, customer_id, start, end, status, limit):
+        rows = []
+        if not self._offset:
+            return rows
+        offsets = self._newest_offsets(customer_id, start, end)
+        with open(self.path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                values = next(csv.reader([f.readline().decode('utf-8', errors='replace')]))
+                row = dict(zip(self._header or FIELDS, values))
+                if customer_id is not None and (start is not None or end is not None):
+                    day = _day(row.get('timestamp', ''))
+                    if (start is not None and day < start) or (end is not None and day > end):
+                        continue
+                if status is None or row.get('status') == status:
+                    rows.append(row)
+                    if len(rows) >= limit:
+                        break
+        return rows
+
+    def _segment_rows(self, customer_id, start, end, status, limit):
+        if self.manifest is None:
+            return
+        since = pd.Timestamp(start) if start else None
+        until = pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1) if end else None
+        for segment in reversed(self.manifest.segments(self.path, since, until)):
+            if limit <= 0:
+                return
+            index = self._segment_index(segment)
+            if customer_id is not None and _customer(customer_id) not in index['customers']:
+                continue
+            if (start or end) and not any((start is None or d >= start) and (end is None or d <= end)
+                                          for d in index['days']):
+                continue
+            df = pd.read_csv(segment['path'], dtype=str, keep_default_na=False)
+            mask = pd.Series(True, index=df.index)
+            if customer_id is not None:
+                mask &= df['customer_id'].map(_customer) == _customer(customer_id)
+            if start is not None:
+                mask &= df['timestamp'].str[:10] >= start
+            if end is not None:
+                mask &= df['timestamp'].str[:10] <= end
+            if status is not None:
+                mask &= df['status'] == status
+            rows = df[mask].iloc[::-1].head(limit).to_dict(orient='records')
+            limit -= len(rows)
+            yield from rows
+
+    def query(self, customer_id=None, start=None, end=None, status=None, limit=100):
+        """Log rows, newest first, for a customer and/or a day range ("%Y-%m-%d", inclusive).
+
+        With neither, the most recent rows. Only indexed rows of the live file
+        and the segments that can hold matches are read.
+        """
+        with self._lock:
+            self._refresh()
+            rows = self._live_rows(customer_id, start, end, status, limit)
+        if len(rows) < limit:
+            rows.extend(self._segment_rows(customer_id, start, end, status, limit - len(rows)))
+        return rows
@@ -0,0 +1,113 @@
+# backend/notifications/dispatcher.py
+import os
+import time
+import queue
+import atexit
+import threading
+from backend.metrics import registry
+from backend.notifications.smtp_pool import SMTP_POOL_SIZE
+
+# More workers than pooled connections would only wait on the pool
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", SMTP_POOL_SIZE))
+EMAIL_QUEUE_SIZE = int(os.getenv("EMAIL_QUEUE_SIZE", 1000))
+EMAIL_ENQUEUE_TIMEOUT = float(os.getenv("EMAIL_ENQUEUE_TIMEOUT", 1.0))  # seconds to wait for room
+EMAIL_DRAIN_TIMEOUT = float(os.getenv("EMAIL_DRAIN_TIMEOUT", 30.0))  # seconds allowed at shutdown
+
+
+class EmailDispatcher:
+    """Email jobs go through a bounded queue to a pool of worker threads.
+
+    submit() only costs a queue put, so request handlers return without
+    waiting on SMTP. When the queue is full it waits up to `put_timeout`
+    for room, then gives up and returns False (counted in `rejected`).
+    close() lets the workers finish what is queued, up to `drain_timeout`.
+    """
+
+    def __init__(self, workers=EMAIL_WORKERS, max_queue=EMAIL_QUEUE_SIZE,
+                 put_timeout=EMAIL_ENQUEUE_TIMEOUT, drain_timeout=EMAIL_DRAIN_TIMEOUT):
+        self.workers = max(1, workers)
+        self.put_timeout = put_timeout
+        self.drain_timeout = drain_timeout
+        self.rejected = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._closed = False
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if not self._threads:
+            with self._start_lock:
+                if not self._threads:
+                    for i in range(self.workers):
+                        thread = threading.Thread(target=self._run, name=f"email-worker-{i}", daemon=True)
+                        thread.start()
+                        self._threads.append(thread)
+                    atexit.register(self.close)
+
+    def submit(self, func, *args, **kwargs):
+        """Queue `func(*args, **kwargs)`; False if the queue stayed full or the dispatcher is closed."""
+        if self._closed:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put((func, args, kwargs, time.perf_counter()), timeout=self.put_timeout)
+        except queue.Full:
+            self.rejected += 1
+            registry.inc("email_jobs_total", {"status": "rejected"})
+            print(f"[WARN] Email queue full, {self.rejected} emails rejected so far")
+            return False
+        registry.set("email_queue_depth", {}, self._queue.qsize())
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:  # close()
+                self._queue.task_done()
+                return
+            func, args, kwargs, queued_at = item
+            start = time.perf_counter()
+            registry.observe("email_queue_wait_seconds", {}, start - queued_at)
+            status = "ok"
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                status = "error"
+                print(f"[WARN] Email job {getattr(func, '__name__', func)} failed: {e}")
+            finally:
+                registry.observe("email_send_duration_seconds", {}, time.perf_counter() - start)
+                registry.inc("email_jobs_total", {"status": status})
+                registry.set("email_queue_depth", {}, self._queue.qsize())
+                self._queue.task_done()
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """Block until every job queued so far has run."""
+        if self._threads:
+            self._queue.join()
+
+    def close(self):
+        """Stop taking jobs and give the workers up to `drain_timeout` to finish the queue."""
+        if self._closed:
+            return
+        self._closed = True
+        if not self._threads:
+            return
+        deadline = time.monotonic() + self.drain_timeout
+        for _ in self._threads:
+            try:
+                # sentinels go in behind the queued jobs, so those run first
+                self._queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        left = sum(1 for item in list(self._queue.queue) if item is not None)
+        registry.set("email_queue_depth", {}, left)
+        if left:
+            print(f"[WARN] Email dispatcher stopped with {left} emails still queued")
+
+
+email_dispatcher = EmailDispatcher()
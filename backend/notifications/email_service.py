@@ -1,10 +1,16 @@
-import smtplib
 import os
-import csv
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import base64
+from email.header import Header
+from email.utils import formataddr, formatdate, make_msgid
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, date
+from backend.tracing import span
+from backend.notifications.smtp_pool import create_pool
+from backend.notifications.dispatcher import email_dispatcher
+from backend.notifications.outbox import Outbox
+from backend.notifications.shaper import SendShaper
+from backend.notifications.templates import TemplateRegistry
+from backend.notifications.delivery_log import DeliveryLog
 
 # Load environment variables
 load_dotenv()
@@ -15,11 +21,23 @@ FROM_NAME = os.getenv("FROM_NAME", "Billing System")
 shop_name = os.getenv("shop_name", "Your Shop")
 SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").strip().lower() not in ("0", "false", "no")
 
 # Store email_logs.csv in the specified folder
-DATA_FOLDER = r"D:\Projects\Customer_Due_Tracker_System\backend\data"
+DATA_FOLDER = os.getenv("DATA_PATH") or r"D:\Projects\Customer_Due_Tracker_System\backend\data"
 os.makedirs(DATA_FOLDER, exist_ok=True)  # Ensure folder exists
 EMAIL_LOG_FILE = os.path.join(DATA_FOLDER, 'email_logs.csv')
+OUTBOX_FILE = os.path.join(DATA_FOLDER, 'email_outbox.jsonl')
+
+# Indexed by customer and day for /api/admin/email_log (see delivery_log.py)
+delivery_log = DeliveryLog(EMAIL_LOG_FILE)
+
+# Every email body, compiled once with the shop name filled in (see templates.py)
+templates = TemplateRegistry({"shop_name": shop_name})
+render_email = templates.render
+
+# Authenticated connections are kept open and reused across messages
+smtp_pool = create_pool(SMTP_SERVER, SMTP_PORT, EMAIL_ADDRESS, EMAIL_PASSWORD, use_tls=SMTP_USE_TLS)
 
 
 def log_email(customer_id, customer_email, subject, status):
@@ -28,119 +46,133 @@ def log_email(customer_id, customer_email, subject, status):
     # Log to console
     print(f"[{timestamp}] CustomerID: {customer_id}, Email: {customer_email}, Subject: {subject}, Status: {status}")
 
-    # Append to CSV
-    file_exists = os.path.exists(EMAIL_LOG_FILE)
-    with open(EMAIL_LOG_FILE, mode='a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=['timestamp','customer_id','customer_email','subject','status'])
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow({
-            'timestamp': timestamp,
-            'customer_id': customer_id,
-            'customer_email': customer_email,
-            'subject': subject,
-            'status': status
-        })
-
-
-def send_email(to_email, subject, body, customer_id=''):
-    """Send an email and log to console & CSV."""
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = f"{FROM_NAME} <{EMAIL_ADDRESS}>"
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            server.send_message(msg)
-
-        log_email(customer_id, to_email, subject, 'Sent')
-
-    except Exception as e:
-        log_email(customer_id, to_email, subject, f'Failed: {e}')
+    # Append to CSV (and its index)
+    delivery_log.append({
+        'timestamp': timestamp,
+        'customer_id': customer_id,
+        'customer_email': customer_email,
+        'subject': subject,
+        'status': status
+    })
 
 
-def send_daily_due_email(customers):
-    """Send daily due reminder emails to all customers with outstanding dues."""
-    for cust in customers:
-        if cust.get('due', 0) > 0 and cust.get('email'):
-            subject = f"{shop_name} - Daily Due Reminder"
-            body = f"""Hello {cust['name']},
+# Headers shared by every message, encoded once
+_COMMON_HEADERS = (
+    f"From: {formataddr((FROM_NAME, EMAIL_ADDRESS or ''))}\r\n"
+    "MIME-Version: 1.0\r\n"
+    'Content-Type: text/plain; charset="utf-8"\r\n'
+    "Content-Transfer-Encoding: base64\r\n"
+).encode()
 
-We wanted to remind you that your current outstanding due with {shop_name} is ₹{cust['due']:.2f}.
 
-If you have already made the payment, please ignore this message.
-If this reminder was sent in error or you believe your account is up-to-date, please contact us immediately so we can assist you.
+# Message-IDs use the sender's domain; make_msgid() would look up the host name each call
+_MSGID_DOMAIN = (EMAIL_ADDRESS or '').rpartition('@')[2] or None
 
-We appreciate your prompt attention to this matter.
 
-Thank you,  
-— {shop_name} Team
-"""
-            send_email(cust['email'], subject, body, customer_id=cust.get('id', ''))
+def check_headers(to_email, subject):
+    """Raise ValueError if the recipient or subject would break out of its header line."""
+    for name, value in (("recipient", to_email), ("subject", subject)):
+        if '\r' in str(value) or '\n' in str(value):
+            raise ValueError(f"Line break in email {name}: {value!r}")
 
 
-# NEW FUNCTIONS FOR CREDENTIAL MANAGEMENT
-def send_welcome_email(customer_data):
-    """Send welcome email with login credentials to new customers."""
-    if not customer_data.get('email'):
-        return False
+def encode_message(to_email, subject, body):
+    """Wire-format bytes for a plain-text message: the shared headers plus To,
+    Subject, Date, Message-ID and the base64 body, without building a MIME
+    object tree. Raises ValueError on a line break in To or Subject."""
+    check_headers(to_email, subject)
+    if not subject.isascii():
+        subject = Header(subject, 'utf-8').encode()
+    return b''.join((
+        _COMMON_HEADERS,
+        f"To: {to_email}\r\nSubject: {subject}\r\n"
+        f"Date: {formatdate(localtime=True)}\r\nMessage-ID: {make_msgid(domain=_MSGID_DOMAIN)}\r\n\r\n".encode(),
+        base64.encodebytes(body.encode('utf-8')).replace(b'\n', b'\r\n'),
+    ))
 
-    subject = f"Welcome to {shop_name} - Your Account Details"
-    body = f"""Dear {customer_data['name']},
 
-Welcome to {shop_name}! Your account has been successfully created.
+def _deliver(message):
+    """Outbox delivery: one SMTP send over the pool; raises so the outbox can retry."""
+    data = encode_message(message['to'], message['subject'], message['body'])
+    with span("smtp.send", server=SMTP_SERVER):
+        smtp_pool.send(data, EMAIL_ADDRESS, [message['to']])
 
-Here are your login credentials:
-Username: {customer_data['username']}
-Password: {customer_data['password']}
 
-Please log in to our system using these credentials. 
-We recommend changing your password after first login.
+def _log_result(message, status):
+    log_email(message.get('customer_id', ''), message['to'], message['subject'], status)
 
-If you have any questions, please don't hesitate to contact us.
 
-Thank you,
-— {shop_name} Team
-"""
-    send_email(
-        customer_data['email'],
-        subject,
-        body,
-        customer_id=customer_data.get('id', '')
-    )
-    return True
+# Durable queue in front of the dispatcher: failed sends are retried with backoff
+# and pending messages survive a restart (see backend/notifications/outbox.py).
+# The shaper paces hand-offs to the provider's per-minute / per-day limits.
+send_shaper = SendShaper()
+outbox = Outbox(OUTBOX_FILE, deliver=_deliver, submit=email_dispatcher.submit,
+                drain=email_dispatcher.close, on_result=_log_result, shaper=send_shaper)
 
 
-def send_credentials_reset_email(customer_data):
-    """Send email when credentials are reset by admin."""
-    if not customer_data.get('email'):
-        return False
+def send_email(to_email, subject, body, customer_id='', key=None, sensitive=False):
+    """Queue an email in the outbox; the result of each attempt is logged to console & CSV.
+
+    Returns False when `key` was already queued or sent, so batches with stable
+    keys can be re-run without sending anything twice. A `sensitive` body is
+    dropped from the outbox file as soon as it is delivered. Raises ValueError
+    on a line break in the recipient or subject.
+    """
+    check_headers(to_email, subject)
+    return outbox.enqueue(to_email, subject, body, customer_id=customer_id, key=key, sensitive=sensitive)
+
 
-    subject = f"{shop_name} - Your Account Credentials Have Been Updated"
-    body = f"""Dear {customer_data['name']},
+def send_template(template, to_email, fields, customer_id='', key=None):
+    """Render a registered template with the `fields` mapping and queue it."""
+    compiled = templates.get(template)
+    subject, body = compiled.render(fields)
+    return send_email(to_email, subject, body, customer_id=customer_id, key=key, sensitive=compiled.sensitive)
 
-Your account credentials have been updated by our admin team.
 
-Here are your new login details:
-Username: {customer_data['username']}
-Password: {customer_data['password']}
+def start_outbox():
+    """Resume delivery of messages left pending by an earlier run."""
+    return outbox.start()
 
-Please log in using these new credentials. 
-For security reasons, we recommend changing your password after login.
 
-If you didn't request this change, please contact us immediately.
+def send_daily_due_email(customers):
+    """Send daily due reminder emails to all customers with outstanding dues.
+
+    The whole batch is rendered in one pass and queued with one outbox write.
+    Keyed per customer and day, so a run restarted after a crash only queues
+    the reminders the first one did not get to. Returns the ids of the
+    customers whose reminder is in the outbox (skipped ones are left out).
+    """
+    today = date.today().isoformat()
+    due = [cust for cust in customers if cust.get('due', 0) > 0 and cust.get('email')]
+    rendered = templates.render_many("due_reminder", due)
+    messages = []
+    for cust, (subject, body) in zip(due, rendered):
+        try:
+            check_headers(cust['email'], subject)
+        except ValueError as e:
+            print(f"[WARN] Skipping due reminder for customer {cust.get('id', '')}: {e}")
+            continue
+        messages.append({'to': cust['email'], 'subject': subject, 'body': body, 'customer_id': cust.get('id', ''),
+                         'key': f"due-reminder:{today}:{cust.get('id', cust['email'])}"})
+    outbox.enqueue_many(messages)
+    return [m['customer_id'] for m in messages]
+
+
+# NEW FUNCTIONS FOR CREDENTIAL MANAGEMENT
+def send_welcome_email(customer_data):
+    """Send welcome email with login credentials to new customers."""
+    if not customer_data.get('email'):
+        return False
+
+    send_template("welcome", customer_data['email'], customer_data, customer_id=customer_data.get('id', ''))
+    return True
+
+
+def send_credentials_reset_email(customer_data):
+    """Send email when credentials are reset by admin."""
+    if not customer_data.get('email'):
+        return False
 
-Thank you,
-— {shop_name} Team
-"""
-    send_email(
-        customer_data['email'],
-        subject,
-        body,
-        customer_id=customer_data.get('id', '')
-    )
+    send_template("credentials_reset", customer_data['email'], customer_data,
+                  customer_id=customer_data.get('id', ''))
     return True
@@ -0,0 +1,343 @@
+# backend/notifications/outbox.py
+import os
+import json
+import time
+import uuid
+import random
+import atexit
+import smtplib
+import threading
+from backend.journal import Journal
+from backend.metrics import registry
+
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", 30))  # seconds before the first retry, doubled after
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", 3600))
+OUTBOX_POLL = float(os.getenv("OUTBOX_POLL", 1.0))  # seconds between looks for due / newly queued messages
+OUTBOX_LEASE_TTL = float(os.getenv("OUTBOX_LEASE_TTL", 30))  # a deliverer silent this long is taken over
+OUTBOX_COMPACT_BYTES = int(os.getenv("OUTBOX_COMPACT_BYTES", 5 * 1024 * 1024))
+OUTBOX_KEEP_SENT_DAYS = float(os.getenv("OUTBOX_KEEP_SENT_DAYS", 7))  # how long delivered keys still dedupe
+
+
+def permanent_failure(exc):
+    """A 5xx reply about the message itself, or a message that cannot be encoded
+    (ValueError), will not succeed on retry (bad login is fixable config)."""
+    if isinstance(exc, ValueError):
+        return True
+    if isinstance(exc, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code >= 500
+    return False
+
+
+def backoff(attempts, base=OUTBOX_BACKOFF_BASE, cap=OUTBOX_BACKOFF_MAX):
+    """Seconds to wait after the `attempts`-th failure: base * 2^(attempts-1), capped, +-10% jitter."""
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay * random.uniform(0.9, 1.1)
+
+
+class Outbox:
+    """Durable queue of outgoing emails, kept as an append-only journal.
+
+    Every state change (queued, retry scheduled, sent, dead) is one JSON line
+    and replaying the file rebuilds the queue, so a restart resumes with the
+    messages that were still pending, at their scheduled retry times. Each
+    message has a key; queuing a key the journal already holds (pending or
+    delivered within OUTBOX_KEEP_SENT_DAYS) is a no-op, so re-running a batch
+    with stable keys only queues what is missing.
+
+    Any process may queue (the Streamlit app shares the file), but only the
+    one holding the lease file delivers. It hands due messages to `submit`
+    (the email dispatcher) which runs `deliver(message)`; an exception from
+    deliver schedules a retry with exponential backoff until `max_attempts`
+    or a permanent failure, after which the message is marked dead. A crash
+    between the SMTP reply and the "sent" line is the only way a message
+    goes out twice.
+
+    Messages queued as `sensitive` (bodies with login credentials) have to
+    be on disk until delivered, since the deliverer may be another process,
+    but once one is sent or dead the owner compacts straight away so the
+    body does not linger in the journal.
+    """
+
+    def __init__(self, path, deliver, submit, drain=None, on_result=None, shaper=None, max_attempts=OUTBOX_MAX_ATTEMPTS,
+                 poll=OUTBOX_POLL, lease_ttl=OUTBOX_LEASE_TTL, compact_bytes=OUTBOX_COMPACT_BYTES,
+                 keep_sent_days=OUTBOX_KEEP_SENT_DAYS):
+        self.journal = Journal(path)
+        self.lease_path = os.path.splitext(path)[0] + '.lease'
+        self.deliver = deliver
+        self.submit = submit
+        self.drain = drain  # drain() waits for handed-out deliveries, before the lease is released
+        self.on_result = on_result  # on_result(message, status) after every attempt
+        self.shaper = shaper  # try_acquire() / refund() / observe(exc) / seed(times), see shaper.py
+        self.max_attempts = max_attempts
+        self.poll = poll
+        self.lease_ttl = lease_ttl
+        self.compact_bytes = compact_bytes
+        self.keep_sent = keep_sent_days * 86400
+        self._lock = threading.RLock()
+        self._messages = {}   # key -> message dict (state pending | sent | dead)
+        self._inflight = set()
+        self._offset = 0
+        self._inode = None
+        self._compacted_size = 0  # journal size right after the last compaction
+        self._scrub = False  # a sensitive body is done with but still in the journal
+        self._owner_id = uuid.uuid4().hex
+        self._owner = False
+        self._claimed = False
+        self._wait = poll  # until the next look; shorter when the shaper frees a slot sooner
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------------- Journal ----------------
+    def _apply(self, rec):
+        key = rec['id']
+        msg = self._messages.get(key)
+        if rec['op'] == 'enqueue':
+            if msg is None:
+                fields = {k: v for k, v in rec.items() if k not in ('op', 'id')}
+                self._messages[key] = {'id': key, 'state': 'pending', 'attempts': 0, 'next_at': 0, **fields}
+            return
+        if msg is None:  # compacted journal: delivered keys are kept without their body
+            msg = self._messages[key] = {'id': key}
+        if rec['op'] == 'retry':
+            msg.update(attempts=rec['attempts'], next_at=rec['next_at'], error=rec.get('error'))
+        elif rec['op'] in ('sent', 'dead'):
+            msg.update(state=rec['op'], done_at=rec['at'], attempts=rec.get('attempts', msg.get('attempts', 0)))
+            if msg.pop('sensitive', False):
+                self._scrub = True
+            for field in ('to', 'subject', 'body'):
+                msg.pop(field, None)  # nothing left to send; keep the key for dedupe
+
+    def _refresh(self):
+        """Apply records appended since the last look, ours and other processes' alike.
+
+        Records are absolute (attempt counts, states), so re-applying our own is harmless.
+        """
+        try:
+            inode = os.stat(self.journal.path).st_ino
+        except FileNotFoundError:
+            inode = None
+        if inode != self._inode or self.journal.size() < self._offset:
+            self._messages, self._offset, self._inode = {}, 0, inode  # compacted by the owner
+        records, self._offset = self.journal.read(self._offset)
+        for rec in records:
+            self._apply(rec)
+
+    def _record(self, *records):
+        self.journal.append(records)
+        for rec in records:
+            self._apply(rec)
+
+    # ---------------- Queueing ----------------
+    def enqueue(self, to, subject, body, customer_id='', key=None, sensitive=False):
+        """Queue a message; False when `key` is already in the outbox."""
+        return self.enqueue_many([{'to': to, 'subject': subject, 'body': body, 'customer_id': customer_id,
+                                   'key': key, 'sensitive': sensitive}]) == 1
+
+    def enqueue_many(self, messages):
+        """Queue dicts with to/subject/body (customer_id, key, sensitive optional) in one journal write.
+
+        Returns how many were queued; keys already in the outbox are skipped.
+        """
+        now = time.time()
+        with self._lock:
+            self._refresh()
+            records, seen = [], set()
+            for m in messages:
+                key = m.get('key') or uuid.uuid4().hex
+                if key in self._messages or key in seen:
+                    continue
+                seen.add(key)
+                rec = {'op': 'enqueue', 'id': key, 'to': m['to'], 'subject': m['subject'],
+                       'body': m['body'], 'customer_id': m.get('customer_id', ''), 'at': now}
+                if m.get('sensitive'):
+                    rec['sensitive'] = True
+                records.append(rec)
+            if records:
+                self._record(*records)
+        duplicates = len(messages) - len(records)
+        if duplicates:
+            registry.inc("email_outbox_total", {"event": "duplicate"}, duplicates)
+        if records:
+            registry.inc("email_outbox_total", {"event": "queued"}, len(records))
+            self.start()
+            self._wake.set()
+        return len(records)
+
+    def pending(self):
+        with self._lock:
+            self._refresh()
+            return [dict(m) for m in self._messages.values() if m.get('state') == 'pending']
+
+    def get(self, key):
+        with self._lock:
+            self._refresh()
+            msg = self._messages.get(key)
+            return dict(msg) if msg else None
+
+    # ---------------- Delivery ----------------
+    def _hold_lease(self):
+        """True while this process is the deliverer. A free or stale lease is claimed,
+        but delivery only starts once the claim is still ours a poll later."""
+        try:
+            with open(self.lease_path, encoding='utf-8') as f:
+                owner = f.read().strip()
+            age = time.time() - os.path.getmtime(self.lease_path)
+        except FileNotFoundError:
+            owner, age = None, None
+        if owner == self._owner_id:
+            os.utime(self.lease_path)
+            confirmed, self._claimed = self._claimed, True
+            return confirmed
+        self._claimed = False
+        if owner and age is not None and age < self.lease_ttl:
+            return False
+        tmp = f"{self.lease_path}.{self._owner_id}"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self._owner_id)
+        os.replace(tmp, self.lease_path)
+        return False
+
+    def _release_lease(self):
+        try:
+            with open(self.lease_path, encoding='utf-8') as f:
+                if f.read().strip() == self._owner_id:
+                    f.close()
+                    os.remove(self.lease_path)
+        except FileNotFoundError:
+            pass
+
+    def _dispatch_due(self):
+        now = time.time()
+        with self._lock:
+            self._refresh()
+            due = sorted((m for m in self._messages.values()
+                          if m.get('state') == 'pending' and m['next_at'] <= now and m['id'] not in self._inflight),
+                         key=lambda m: (m['next_at'], m.get('at', 0)))
+            pending = sum(1 for m in self._messages.values() if m.get('state') == 'pending')
+        registry.set("email_outbox_pending", {}, pending)
+        for msg in due:
+            if self.shaper is not None:
+                wait = self.shaper.try_acquire()
+                if wait > 0:
+                    self._wait = min(self.poll, wait)
+                    break  # over the send rate; the rest go when slots free up
+            self._inflight.add(msg['id'])
+            if not self.submit(self._attempt, msg['id']):
+                self._inflight.discard(msg['id'])
+                if self.shaper is not None:
+                    self.shaper.refund()
+                break  # dispatcher queue full; the rest wait for the next poll
+
+    def _attempt(self, key):
+        try:
+            with self._lock:
+                msg = self._messages.get(key)
+                if msg is None or msg.get('state') != 'pending':
+                    return
+                msg = dict(msg)
+            attempts = msg['attempts'] + 1
+            try:
+                self.deliver(msg)
+            except Exception as e:
+                if self.shaper is not None:
+                    self.shaper.observe(e)
+                error = f"{type(e).__name__}: {e}"
+                if attempts >= self.max_attempts or permanent_failure(e):
+                    with self._lock:
+                        self._record({'op': 'dead', 'id': key, 'at': time.time(), 'attempts': attempts, 'error': error})
+                    registry.inc("email_outbox_total", {"event": "dead"})
+                    self._report(msg, f"Failed: {e} (gave up after {attempts} attempts)")
+                    return
+                delay = backoff(attempts)
+                with self._lock:
+                    self._record({'op': 'retry', 'id': key, 'attempts': attempts,
+                                  'next_at': time.time() + delay, 'error': error})
+                registry.inc("email_outbox_total", {"event": "retry"})
+                self._report(msg, f"Failed: {e} (attempt {attempts}, retry in {delay:.0f}s)")
+                return
+            if self.shaper is not None:
+                self.shaper.observe()
+            with self._lock:
+                self._record({'op': 'sent', 'id': key, 'at': time.time(), 'attempts': attempts})
+            registry.inc("email_outbox_total", {"event": "sent"})
+            self._report(msg, 'Sent')
+        finally:
+            self._inflight.discard(key)
+
+    def _report(self, msg, status):
+        if self.on_result is not None:
+            try:
+                self.on_result(msg, status)
+            except Exception as e:
+                print(f"[WARN] Could not log email result: {e}")
+
+    # ---------------- Compaction ----------------
+    def compact(self):
+        """Rewrite the journal as one line per pending message plus recent delivered keys."""
+        with self._lock, self.journal.locked():  # other processes' appends wait until the swap
+            self._refresh()
+            cutoff = time.time() - self.keep_sent
+            keep = []
+            for msg in self._messages.values():
+                if msg.get('state') == 'pending':
+                    rec = {'op': 'enqueue', **{k: v for k, v in msg.items() if k not in ('state', 'error')}}
+                    keep.append(rec)
+                elif msg.get('done_at', 0) >= cutoff:
+                    keep.append({'op': msg['state'], 'id': msg['id'], 'at': msg['done_at'],
+                                 'attempts': msg.get('attempts', 0)})
+            tmp = self.journal.path + '.compact'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(rec, default=str) + '\n' for rec in keep))
+            os.replace(tmp, self.journal.path)
+            self._messages, self._offset, self._inode = {}, 0, None
+            self._scrub = False
+            self._refresh()
+            self._compacted_size = self.journal.size()
+
+    # ---------------- Lifecycle ----------------
+    def _run(self):
+        if self.shaper is not None:
+            with self._lock:
+                self._refresh()
+                sent = [m['done_at'] for m in self._messages.values() if m.get('state') == 'sent']
+            self.shaper.seed(sent)  # sends before a restart still count against the daily quota
+        while not self._stop.is_set():
+            self._wait = self.poll
+            try:
+                self._owner = self._hold_lease()
+                if self._owner:
+                    self._dispatch_due()
+                    # a big pending backlog stays big after compacting, so wait for it to double
+                    if self._scrub or self.journal.size() > max(self.compact_bytes, 2 * self._compacted_size):
+                        self.compact()
+            except Exception as e:
+                print(f"[WARN] Email outbox loop error: {e}")
+            self._wake.wait(self._wait)
+            self._wake.clear()
+
+    def start(self):
+        """Start the delivery loop (idempotent); pending messages resume from the journal."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+        return self._thread
+
+    def close(self):
+        """Stop handing out messages and let in-flight deliveries finish before the lease goes."""
+        if self._thread is None or self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        if self.drain is not None:
+            self.drain()
+        self._release_lease()
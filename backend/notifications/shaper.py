@@ -0,0 +1,138 @@
+# backend/notifications/shaper.py
+import os
+import re
+import time
+import smtplib
+import threading
+from collections import deque
+from backend.metrics import registry
+
+EMAIL_RATE_PER_MINUTE = float(os.getenv("EMAIL_RATE_PER_MINUTE", 60))  # 0 = no per-minute limit
+EMAIL_RATE_PER_DAY = int(os.getenv("EMAIL_RATE_PER_DAY", 2000))  # rolling 24 hours; 0 = no daily quota
+EMAIL_RATE_BURST = float(os.getenv("EMAIL_RATE_BURST", 10))  # sends allowed back to back after a quiet spell
+EMAIL_RATE_FLOOR = float(os.getenv("EMAIL_RATE_FLOOR", 1))  # per minute; throttling never backs off below this
+EMAIL_RATE_RECOVERY_SENDS = int(os.getenv("EMAIL_RATE_RECOVERY_SENDS", 50))  # clean sends to climb back to full rate
+
+DAY = 86400
+# 4xx replies providers use for "slow down"; 450/451 also cover plain temporary errors, so those need a hint
+_THROTTLE_HINT = re.compile(r"4\.7\.\d|rate|limit|throttl|too many|try again later", re.IGNORECASE)
+
+
+def is_throttle(exc):
+    """True when an SMTP error is the provider asking us to send more slowly."""
+    replies = []
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        replies = list(exc.recipients.values())
+    elif isinstance(exc, smtplib.SMTPResponseException):
+        replies = [(exc.smtp_code, exc.smtp_error)]
+    for code, text in replies:
+        if isinstance(text, bytes):
+            text = text.decode(errors="replace")
+        if code in (421, 452) or (code in (450, 451) and _THROTTLE_HINT.search(text or "")):
+            return True
+    return False
+
+
+class SendShaper:
+    """Token bucket for outgoing email with a rolling daily quota.
+
+    The bucket refills at the current rate (at most `per_minute`) and holds
+    up to `burst` tokens. A throttling reply halves the rate (not below
+    `floor`) and empties the bucket; every clean send adds back
+    1/`recovery_sends` of the configured rate. Throughput settles just under
+    the provider's limit instead of alternating between full speed and a
+    run of rejections.
+    """
+
+    def __init__(self, per_minute=EMAIL_RATE_PER_MINUTE, per_day=EMAIL_RATE_PER_DAY, burst=EMAIL_RATE_BURST,
+                 floor=EMAIL_RATE_FLOOR, recovery_sends=EMAIL_RATE_RECOVERY_SENDS):
+        self.max_rate = per_minute / 60 if per_minute > 0 else None  # tokens per second
+        self.floor = min(floor / 60, self.max_rate) if self.max_rate else None
+        self.step = self.max_rate / max(1, recovery_sends) if self.max_rate else None
+        self.per_day = per_day
+        self.burst = max(1.0, burst)
+        self.rate = self.max_rate
+        self.tokens = self.burst
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._cut_at = None  # when the rate was last halved
+        self._sent = deque()  # wall-clock time of each send in the last 24 hours
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take one send slot: 0 when granted, otherwise seconds until one frees up."""
+        with self._lock:
+            wall = time.time()
+            while self._sent and self._sent[0] <= wall - DAY:
+                self._sent.popleft()
+            if self.per_day and len(self._sent) >= self.per_day:
+                return self._sent[0] + DAY - wall
+            if self.max_rate:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens < 1:
+                    return (1 - self.tokens) / self.rate
+                self.tokens -= 1
+            self._sent.append(wall)
+            self._gauges()
+            return 0.0
+
+    def refund(self):
+        """Give back a slot that was granted but not used."""
+        with self._lock:
+            if self._sent:
+                self._sent.pop()
+            if self.max_rate:
+                self.tokens = min(self.burst, self.tokens + 1)
+            self._gauges()
+
+    def observe(self, exc=None):
+        """Feed back the outcome of a send: None on success, else the exception."""
+        if not self.max_rate:
+            return
+        with self._lock:
+            if exc is None:
+                self.rate = min(self.max_rate, self.rate + self.step)
+            elif is_throttle(exc):
+                now = time.monotonic()
+                self._refill(now)
+                self.tokens = 0.0
+                self.throttled += 1
+                if self._sent:
+                    self._sent.pop()  # refused messages don't count against the daily quota
+                registry.inc("email_throttled_total", {})
+                # sends already in flight when the rate was cut come back throttled too;
+                # only cut again once a bucket's worth has gone out at the new rate
+                if self._cut_at is None or now - self._cut_at >= self.burst / self.rate:
+                    self.rate = max(self.floor, self.rate / 2)
+                    self._cut_at = now
+                    print(f"[WARN] SMTP provider throttling, sending at {self.rate * 60:.1f}/min")
+            self._gauges()
+
+    def seed(self, timestamps):
+        """Count sends from before a restart (wall-clock times) against the daily quota."""
+        cutoff = time.time() - DAY
+        with self._lock:
+            recent = sorted(t for t in timestamps if t > cutoff)
+            self._sent = deque(sorted(list(self._sent) + recent))
+            self._gauges()
+
+    def _gauges(self):
+        if self.max_rate:
+            registry.set("email_send_rate_per_minute", {}, round(self.rate * 60, 3))
+        if self.per_day:
+            registry.set("email_day_quota_remaining", {}, max(0, self.per_day - len(self._sent)))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rate_per_minute": round(self.rate * 60, 3) if self.max_rate else None,
+                "tokens": round(self.tokens, 3),
+                "sent_24h": len(self._sent),
+                "day_quota": self.per_day or None,
+                "throttled": self.throttled,
+            }
@@ -0,0 +1,173 @@
+# backend/notifications/smtp_pool.py
+import os
+import time
+import atexit
+import smtplib
+import threading
+from collections import deque
+from backend.metrics import registry
+
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 4))  # max open connections
+SMTP_POOL_IDLE = float(os.getenv("SMTP_POOL_IDLE", 60))  # seconds an unused connection is kept
+SMTP_MAX_MESSAGES = int(os.getenv("SMTP_MAX_MESSAGES", 100))  # per connection, then it is recycled
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 30))
+
+
+def _dropped(exc):
+    """True when the connection itself is gone, as opposed to the server refusing one message."""
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code == 421  # service closing transmission channel
+    # SMTPException subclasses OSError; any other OSError is a socket failure
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+class _Connection:
+    __slots__ = ("smtp", "sent", "last_used")
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SmtpPool:
+    """Authenticated SMTP connections kept open and reused across messages.
+
+    send() takes the most recently used idle connection (or opens one, up to
+    `size`), and puts it back afterwards. A reused connection that turns out
+    to have been dropped by the server is replaced and the message resent
+    once on a fresh one.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True,
+                 size=SMTP_POOL_SIZE, idle=SMTP_POOL_IDLE, max_messages=SMTP_MAX_MESSAGES, timeout=SMTP_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.idle = idle
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self._idle = deque()  # LIFO so the warmest connection goes out first
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._open_count = 0
+        self._counts = {"opened": 0, "reused": 0, "reconnects": 0, "sent": 0, "failed": 0}
+
+    def _count(self, name, metric=None, labels=None):
+        with self._lock:
+            self._counts[name] += 1
+        if metric:
+            registry.inc(metric, labels or {})
+
+    def _gauges(self):
+        with self._lock:
+            idle, total = len(self._idle), self._open_count
+        registry.set("smtp_pool_connections", {"state": "idle"}, idle)
+        registry.set("smtp_pool_connections", {"state": "in_use"}, total - idle)
+
+    def _open(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._discard_smtp(smtp)
+            raise
+        with self._lock:
+            self._open_count += 1
+        self._count("opened", "smtp_connections_opened_total")
+        return _Connection(smtp)
+
+    @staticmethod
+    def _discard_smtp(smtp):
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _discard(self, conn):
+        with self._lock:
+            self._open_count -= 1
+        self._discard_smtp(conn.smtp)
+
+    def _checkout(self):
+        cutoff = time.monotonic() - self.idle
+        stale = []
+        with self._lock:
+            # oldest at the left; servers drop connections idle too long
+            while self._idle and self._idle[0].last_used < cutoff:
+                stale.append(self._idle.popleft())
+            conn = self._idle.pop() if self._idle else None
+        for old in stale:
+            self._discard(old)
+        if conn is None:
+            return self._open(), False
+        return conn, True
+
+    def _checkin(self, conn):
+        if conn.sent >= self.max_messages:
+            self._discard(conn)
+            return
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(conn)
+
+    def send(self, msg, from_addr=None, to_addrs=None):
+        """Send an email.message.Message, or an already encoded message (bytes)
+        with its envelope; raises what smtplib raises."""
+        self._slots.acquire()
+        try:
+            for attempt in (1, 2):
+                conn, reused = self._checkout()
+                try:
+                    if isinstance(msg, bytes):
+                        conn.smtp.sendmail(from_addr, to_addrs, msg)
+                    else:
+                        conn.smtp.send_message(msg, from_addr, to_addrs)
+                except Exception as e:
+                    if not _dropped(e):
+                        # smtplib already sent RSET, so the session is clean for the next message
+                        self._checkin(conn)
+                        raise
+                    self._discard(conn)
+                    if attempt == 1 and reused:
+                        self._count("reconnects", "smtp_reconnects_total")
+                        continue
+                    raise
+                if reused:
+                    self._count("reused", "smtp_connection_reuses_total")
+                conn.sent += 1
+                self._checkin(conn)
+                self._count("sent", "smtp_messages_total", {"status": "sent"})
+                return
+        except Exception:
+            self._count("failed", "smtp_messages_total", {"status": "failed"})
+            raise
+        finally:
+            self._slots.release()
+            self._gauges()
+
+    def stats(self):
+        with self._lock:
+            return {"size": self.size, "open": self._open_count, "idle": len(self._idle), **self._counts}
+
+    def close(self):
+        """QUIT every idle connection."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            self._discard(conn)
+        self._gauges()
+
+
+def create_pool(host, port, username=None, password=None, use_tls=True):
+    pool = SmtpPool(host, port, username, password, use_tls=use_tls)
+    atexit.register(pool.close)
+    return pool
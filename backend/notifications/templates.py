@@ -0,0 +1,296 @@
+# backend/notifications/templates.py
+from string import Formatter
+
+_formatter = Formatter()
+
+# Fields holding credentials; messages rendered from them are queued as sensitive
+SECRET_FIELDS = {"password"}
+
+# name -> (subject, body); str.format fields, {shop_name} is filled in once at compile time
+DEFAULT_TEMPLATES = {
+    # ---------------- email_service ----------------
+    "due_reminder": (
+        "{shop_name} - Daily Due Reminder",
+        """Hello {name},
+
+We wanted to remind you that your current outstanding due with {shop_name} is ₹{due:.2f}.
+
+If you have already made the payment, please ignore this message.
+If this reminder was sent in error or you believe your account is up-to-date, please contact us immediately so we can assist you.
+
+We appreciate your prompt attention to this matter.
+
+Thank you,
+— {shop_name} Team
+""",
+    ),
+    "welcome": (
+        "Welcome to {shop_name} - Your Account Details",
+        """Dear {name},
+
+Welcome to {shop_name}! Your account has been successfully created.
+
+Here are your login credentials:
+Username: {username}
+Password: {password}
+
+Please log in to our system using these credentials.
+We recommend changing your password after first login.
+
+If you have any questions, please don't hesitate to contact us.
+
+Thank you,
+— {shop_name} Team
+""",
+    ),
+    "credentials_reset": (
+        "{shop_name} - Your Account Credentials Have Been Updated",
+        """Dear {name},
+
+Your account credentials have been updated by our admin team.
+
+Here are your new login details:
+Username: {username}
+Password: {password}
+
+Please log in using these new credentials.
+For security reasons, we recommend changing your password after login.
+
+If you didn't request this change, please contact us immediately.
+
+Thank you,
+— {shop_name} Team
+""",
+    ),
+    # ---------------- API routes ----------------
+    "api_welcome": (
+        "Welcome to {shop_name}!",
+        """Hello {name},
+Your account has been created.
+
+🔐 Login Credentials:
+Username: {username}
+Password: {password}
+
+💰 Current Due: ₹{due:.2f}
+
+Please change your password after first login.
+""",
+    ),
+    "api_credentials_updated": (
+        "{shop_name} - Account Credentials Updated",
+        """Hello {name},
+Your login credentials have been updated:
+
+Username: {username}
+Password: {password}
+
+Please change your password after logging in.
+""",
+    ),
+    # ---------------- Streamlit admin ----------------
+    "portal_welcome": (
+        "Welcome to {shop_name}!",
+        """
+        Hello {name},
+
+        This is an important notification from {shop_name} regarding your new account:
+
+        Your account has been successfully created with these credentials:
+        📄 Name: {name}
+        📞 Phone: {phone}
+        📍 Address: {address}
+        💰 Current Due: ₹{due:.2f}
+        🔐 Username: {username}
+        🔐 Password: {password}
+
+        💰 Initial Due Amount: ₹{due:.2f}
+
+        Please log in and change your password immediately for security.
+        If you have any questions or concerns, do not hesitate to reach out to us.
+
+        Thank you for choosing {shop_name}.
+
+        Warm regards,
+        {shop_name} Team
+        """,
+    ),
+    "portal_credentials_updated": (
+        "Important Account Update from {shop_name}",
+        """
+        Hello {name},
+
+        This is an important notification from {shop_name} regarding your account credentials:
+
+        Your login information has been updated by the administrator.
+        🔐 New Username: {username}
+        🔐 New Password: {password}
+
+        For security reasons, we recommend:
+        1. Logging in immediately to verify access
+        2. Changing your password after first login
+
+        If you did not request this change or have any questions, please contact us immediately.
+
+        Thank you for being a valued customer.
+
+        Warm regards,
+        {shop_name} Team
+        """,
+    ),
+    "due_updated": (
+        "Important Update on Your Account Due",
+        """Hello {name},
+
+This is an important notification from {shop_name} regarding your account:
+
+Your current outstanding due has been updated by the admin.
+💰 Previous Due: ₹{previous_due:.2f}
+💰 Updated Due: ₹{new_due:.2f}
+
+Please make sure to check your account and plan your payment accordingly.
+
+Thank you for being a valued customer.
+
+Warm regards,
+{shop_name} Team
+""",
+    ),
+    "partial_payment": (
+        "Partial Payment Received",
+        """Hello {name},
+
+Thank you for your recent payment to {shop_name}!
+
+💰 Previous Due: ₹{previous_due:.2f}
+💰 Payment Received: ₹{amount:.2f}
+💰 Remaining Due: ₹{new_due:.2f}
+
+We appreciate your prompt payment. Please continue to monitor your account
+and make timely payments to avoid any inconvenience.
+
+If you have any questions, our support team is here to help.
+
+Warm regards,
+{shop_name} Team
+""",
+    ),
+    "account_deleted": (
+        "Account Deletion Notice - {shop_name}",
+        """
+Hello {name},
+
+This is to notify you that your account with {shop_name} has been permanently deleted from our system.
+
+📄 Customer Details:
+Name: {name}
+Phone: {phone}
+Address: {address}
+Final Due: ₹{due:.2f}
+
+If this action was a mistake or you wish to reinstate your account,
+please contact us immediately.
+
+We value all our customers and are here to support you in case of any issues.
+
+Warm regards,
+{shop_name} Team
+""",
+    ),
+    "account_removed": (
+        "Account Deletion Notice - {shop_name}",
+        """
+Hello {name},
+
+We regret to inform you that your account with {shop_name} has been removed from our system.
+
+📄 Customer Details:
+Name: {name}
+Phone: {phone}
+Address: {address}
+Final Due: ₹{due:.2f}
+
+If you believe this action was taken in error or wish to reinstate your account,
+please contact us as soon as possible.
+
+We sincerely apologize for any inconvenience this may cause.
+
+Kind regards,
+{shop_name} Team
+""",
+    ),
+}
+
+
+def _escape(value):
+    return str(value).replace("{", "{{").replace("}", "}}")
+
+
+def _compile(text, constants):
+    """Substitute `constants` into a format string once; returns (format string, remaining field names)."""
+    parts, fields = [], set()
+    for literal, field, spec, conversion in _formatter.parse(text):
+        parts.append(_escape(literal))
+        if field is None:
+            continue
+        if field in constants and not spec and not conversion:
+            parts.append(_escape(constants[field]))
+            continue
+        fields.add(field.split(".")[0].split("[")[0])
+        parts.append("{" + field + ("!" + conversion if conversion else "") + (":" + spec if spec else "") + "}")
+    return "".join(parts), fields
+
+
+class EmailTemplate:
+    """A subject/body pair compiled once: shared constants are baked in, and a
+    subject with no per-message fields is rendered a single time."""
+
+    __slots__ = ("name", "fields", "sensitive", "_subject", "_subject_text", "_body")
+
+    def __init__(self, name, subject, body, constants=None):
+        constants = constants or {}
+        self.name = name
+        subject, subject_fields = _compile(subject, constants)
+        body, body_fields = _compile(body, constants)
+        self.fields = subject_fields | body_fields
+        self.sensitive = bool(self.fields & SECRET_FIELDS)
+        self._subject_text = None if subject_fields else subject.format()
+        self._subject = subject.format_map
+        self._body = body.format_map
+
+    def render(self, fields):
+        """(subject, body) for one message; `fields` is any mapping."""
+        subject = self._subject_text if self._subject_text is not None else self._subject(fields)
+        return subject, self._body(fields)
+
+    def render_many(self, rows):
+        """(subject, body) for every mapping in `rows`, in one pass."""
+        body = self._body
+        if self._subject_text is not None:
+            subject = self._subject_text
+            return [(subject, body(row)) for row in rows]
+        subject = self._subject
+        return [(subject(row), body(row)) for row in rows]
+
+
+class TemplateRegistry:
+    def __init__(self, constants=None, templates=DEFAULT_TEMPLATES):
+        self.constants = dict(constants or {})
+        self._templates = {}
+        for name, (subject, body) in templates.items():
+            self.register(name, subject, body)
+
+    def register(self, name, subject, body):
+        self._templates[name] = EmailTemplate(name, subject, body, self.constants)
+
+    def get(self, name):
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise KeyError(f"Unknown email template '{name}'") from None
+
+    def render(self, template, /, **fields):
+        return self.get(template).render(fields)
+
+    def render_many(self, template, rows):
+        return self.get(template).render_many(rows)
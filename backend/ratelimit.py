@@ -0,0 +1,85 @@
+# backend/ratelimit.py
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+LOGIN_LIMIT_PER_USER = int(os.getenv("LOGIN_LIMIT_PER_USER", 5))
+LOGIN_LIMIT_PER_IP = int(os.getenv("LOGIN_LIMIT_PER_IP", 20))
+LOGIN_LIMIT_WINDOW = float(os.getenv("LOGIN_LIMIT_WINDOW", 60))  # seconds
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+
+
+class SlidingWindowLimiter:
+    """At most `limit` hits per key in any `window` seconds.
+
+    Each key keeps a ring buffer (deque with maxlen=limit) of its last hit
+    times, so a key costs O(limit) memory and a check is O(1). Keys are kept
+    in last-hit order; idle ones (nothing inside the window) are evicted from
+    the front, and the oldest go first once `max_keys` is reached.
+    """
+
+    def __init__(self, limit, window, max_keys=RATE_LIMIT_MAX_KEYS):
+        self.limit = max(1, limit)
+        self.window = window
+        self.max_keys = max_keys
+        self._hits = OrderedDict()  # key -> deque of timestamps
+        self._lock = threading.Lock()
+
+    def _retry_after(self, key, now):
+        hits = self._hits.get(key)
+        if hits is None or len(hits) < self.limit:
+            return 0.0
+        return max(0.0, hits[0] + self.window - now)
+
+    def _record(self, key, now):
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque(maxlen=self.limit)
+        hits.append(now)
+        self._hits.move_to_end(key)
+        self._evict(now)
+
+    def _evict(self, now):
+        while self._hits:
+            key, hits = next(iter(self._hits.items()))
+            if hits[-1] > now - self.window and len(self._hits) <= self.max_keys:
+                break
+            del self._hits[key]
+
+    def hit(self, key):
+        """Record a hit; returns 0 if allowed, else seconds until one is."""
+        return check_all([(self, key)])
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+
+
+def check_all(checks):
+    """Check (limiter, key) pairs together: record a hit on all of them only if
+    none is over its limit. Returns 0 if allowed, else the longest wait."""
+    now = time.monotonic()
+    limiters = {id(limiter): limiter for limiter, _ in checks}
+    locks = [limiters[k]._lock for k in sorted(limiters)]
+    for lock in locks:
+        lock.acquire()
+    try:
+        wait = max((limiter._retry_after(key, now) for limiter, key in checks), default=0.0)
+        if wait > 0:
+            return wait
+        for limiter, key in checks:
+            limiter._record(key, now)
+        return 0.0
+    finally:
+        for lock in reversed(locks):
+            lock.release()
+
+
+login_by_user = SlidingWindowLimiter(LOGIN_LIMIT_PER_USER, LOGIN_LIMIT_WINDOW)
+login_by_ip = SlidingWindowLimiter(LOGIN_LIMIT_PER_IP, LOGIN_LIMIT_WINDOW)
+
+
+def check_login(username, ip):
+    """0 if this login attempt may proceed (and counts it), else seconds to wait."""
+    return check_all([(login_by_user, (username or "").strip()), (login_by_ip, ip or "")])
@@ -1,9 +1,11 @@
 import os
 import json
 import razorpay
+from backend.tracing import traced
 
 # Path to Razorpay keys JSON file
-KEYS_FILE = os.path.join(os.path.dirname(__file__), "data", "razorpay_keys.json")
+KEYS_FILE = os.path.join(os.getenv("DATA_PATH") or os.path.join(os.path.dirname(__file__), "data"),
+                         "razorpay_keys.json")
 
 
 def save_keys(key_id, key_secret, mode="test"):
@@ -39,12 +41,16 @@ def get_client():
     key_id, key_secret, mode = read_keys()
     if not key_id or not key_secret:
         raise Exception("Razorpay keys not set. Please save them in the admin panel.")
-    client = razorpay.Client(auth=(key_id, key_secret))
+    # RAZORPAY_BASE_URL points the client away from https://api.razorpay.com (e.g. at a fake for load tests)
+    base_url = os.getenv("RAZORPAY_BASE_URL")
+    options = {"base_url": base_url} if base_url else {}
+    client = razorpay.Client(auth=(key_id, key_secret), **options)
     if mode == "test":
         client.set_app_details({"title": "CustomerDueTracker", "version": "1.0"})
     return client
 
 
+@traced("razorpay.create_upi_order")
 def create_upi_order(amount, upi_id, currency="INR"):
     """
     Create a UPI collect order.
@@ -69,6 +75,7 @@ def create_upi_order(amount, upi_id, currency="INR"):
         return {"error": str(e)}
 
 
+@traced("razorpay.check_payment_status")
 def check_payment_status(payment_id):
     """Check payment status by ID."""
     client = get_client()
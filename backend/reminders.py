@@ -0,0 +1,68 @@
+# backend/reminders.py
+import os
+import pandas as pd
+
+# Reminder cadence by overdue tier: "days overdue:days between reminders", comma separated.
+# The default keeps the daily reminder for everyone; e.g. "0:7,30:3,60:1" eases off early dues.
+REMINDER_TIERS = os.getenv("REMINDER_TIERS", "0:1")
+# Customers who made a payment this recently are left alone
+REMINDER_ACTIVITY_GRACE_DAYS = int(os.getenv("REMINDER_ACTIVITY_GRACE_DAYS", 3))
+
+
+def parse_tiers(spec):
+    """Parse a REMINDER_TIERS string into (tier starts, intervals), sorted by days overdue."""
+    tiers = []
+    for part in spec.split(","):
+        if part.strip():
+            overdue, every = part.split(":")
+            tiers.append((int(overdue), max(1, int(every))))
+    if not tiers:
+        raise ValueError("REMINDER_TIERS needs at least one 'days overdue:interval' pair")
+    tiers.sort()
+    return [t[0] for t in tiers], [t[1] for t in tiers]
+
+
+def _days_since(now, column):
+    """Whole calendar days from each timestamp in `column` to `now` (NaN where unparseable)."""
+    stamps = pd.to_datetime(column, errors='coerce').dt.normalize()
+    return (now.normalize() - stamps).dt.days
+
+
+def plan_reminders(dues, lookup, now=None, tiers=REMINDER_TIERS, grace_days=REMINDER_ACTIVITY_GRACE_DAYS,
+                   payments=None):
+    """Customers that should get a due reminder at `now`.
+
+    `dues` is the dues.csv frame and `lookup` maps an id to its customer row;
+    `payments` has an (id, paid_at) row per recent payment. The frame is
+    filtered in one vectorised pass: outstanding amount, days since
+    last_message_date against the interval for the customer's overdue tier
+    (age of due_date), and no payment within `grace_days`. Days are counted by
+    calendar date so a run at the same time each day is not thrown off by a
+    few seconds. Only the survivors are looked up, and dropped if they have no
+    email or nothing left to pay. Returns customer rows with `due` as float.
+    """
+    now = pd.Timestamp(now or pd.Timestamp.now())
+    if dues.empty:
+        return []
+    dues = dues.drop_duplicates('id', keep='last')
+    amount = pd.to_numeric(dues['due_amount'], errors='coerce').fillna(0)
+    overdue = _days_since(now, dues['due_date']).fillna(0).clip(lower=0)
+    quiet = _days_since(now, dues['last_message_date'])
+
+    starts, intervals = parse_tiers(tiers) if isinstance(tiers, str) else tiers
+    every = pd.Series(float('nan'), index=dues.index)  # below the first tier: never
+    for start, interval in zip(starts, intervals):
+        every = every.mask(overdue >= start, interval)
+    wanted = (amount > 0) & every.notna() & (quiet.isna() | (quiet >= every))
+    if grace_days and payments is not None and not payments.empty:
+        paid = _days_since(now, payments['paid_at'])
+        paid_ids = pd.to_numeric(payments['id'], errors='coerce')[paid < grace_days]
+        wanted &= ~pd.to_numeric(dues['id'], errors='coerce').isin(paid_ids)
+
+    ids = pd.to_numeric(dues.loc[wanted, 'id'], errors='coerce').dropna().astype(int)
+    planned = [cust for cust in map(lookup, ids)
+               if cust is not None and cust.get('email') and cust.get('status') != 'deleted']
+    if not planned:
+        return []
+    due = pd.to_numeric(pd.Series([cust.get('due', 0) for cust in planned]), errors='coerce')
+    return [{**cust, 'due': float(d)} for cust, d in zip(planned, due) if d > 0]
@@ -0,0 +1,199 @@
+# backend/rotation.py
+import io
+import os
+import glob
+import gzip
+import json
+import time
+import threading
+import pandas as pd
+
+LOG_ROTATE_BYTES = int(os.getenv("LOG_ROTATE_BYTES", 5 * 1024 * 1024))
+LOG_ROTATE_DAYS = float(os.getenv("LOG_ROTATE_DAYS", 0))  # 0 = size only; opt in to age-based rotation
+LOG_ROTATE_INTERVAL = int(os.getenv("LOG_ROTATE_INTERVAL", 3600))  # seconds between checks
+
+_STAMP = "%Y%m%d%H%M%S"
+
+
+class SegmentManifest:
+    """archive/manifest.json: the gzip segments rotated out of each log file.
+
+    Entries are keyed by the live file's name and record the segment file,
+    the first/last timestamp it holds and its row count, so readers can skip
+    segments outside the time range they need without opening them.
+    """
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        self.path = os.path.join(archive_dir, "manifest.json")
+        self._lock = threading.Lock()
+        self._cache = None
+        self._stamp = None
+
+    def _load(self):
+        try:
+            stamp = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if stamp != self._stamp:
+            with open(self.path, encoding='utf-8') as f:
+                self._cache = json.load(f)
+            self._stamp = stamp
+        return self._cache
+
+    def segments(self, file, since=None, until=None):
+        """Segments of `file`, oldest first, that may hold rows in [since, until]."""
+        with self._lock:
+            entries = list(self._load().get(os.path.basename(file), []))
+        result = []
+        for entry in entries:
+            start = pd.Timestamp(entry['start']) if entry.get('start') else None
+            end = pd.Timestamp(entry['end']) if entry.get('end') else None
+            if since is not None and end is not None and end < since:
+                continue
+            if until is not None and start is not None and start > until:
+                continue
+            result.append({**entry, 'path': os.path.join(self.archive_dir, entry['file'])})
+        return result
+
+    def add(self, file, entry):
+        with self._lock:
+            manifest = dict(self._load())
+            manifest.setdefault(os.path.basename(file), []).append(entry)
+            os.makedirs(self.archive_dir, exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=1)
+            os.replace(tmp, self.path)
+
+
+def _first_timestamp(path, time_col):
+    # Only the header and the first data row are read
+    head = pd.read_csv(path, nrows=1)
+    if time_col not in head.columns or head.empty:
+        return None
+    return pd.to_datetime(head[time_col].iloc[0], errors='coerce')
+
+
+def _carry_over(path, lock):
+    """Move rows that reached an already-archived file back into the live one.
+
+    Writers don't share `lock` (other threads' own locks, the Streamlit
+    process), so one that opened the file just before the rename still
+    appends to the renamed copy. That copy is kept as `<path>.rotated-<bytes
+    archived>` until the next check, when anything past the archived bytes is
+    appended to the live file and the copy is removed.
+    """
+    for leftover in glob.glob(glob.escape(path) + ".rotated-*"):
+        archived = int(leftover.rsplit("-", 1)[1])
+        with open(leftover, 'rb') as f:
+            header = f.readline()
+            f.seek(archived)
+            tail = f.read()
+        tail = tail[:tail.rfind(b'\n') + 1]
+        rows = tail.count(b'\n')
+        if tail.strip():
+            with lock:
+                with open(path, 'ab') as f:
+                    if f.tell() == 0:
+                        f.write(header)
+                    f.write(tail)
+            print(f"[INFO] Carried {rows} late rows of {os.path.basename(path)} past rotation")
+        os.remove(leftover)
+
+
+def rotate_file(path, time_col, manifest, lock, max_bytes=LOG_ROTATE_BYTES, max_days=LOG_ROTATE_DAYS):
+    """Move `path` into a gzip segment once it is too big or (with max_days) its first row too old.
+
+    The live file is renamed away under `lock`, so the next append starts a
+    fresh file (writers add the header when the file is missing); rows that
+    still land in the old file are carried over by the next check (see
+    _carry_over). Returns the manifest entry, or None when the file did not
+    need rotating. If archiving fails, the rows are handed back to the live
+    file the same way instead of being left in `<path>.rotating`.
+    """
+    _carry_over(path, lock)
+    pending = path + ".rotating"
+    if not os.path.exists(pending):  # otherwise finish a rotation cut short by a crash
+        with lock:
+            if not os.path.exists(path):
+                return None
+            with open(path, 'rb') as f:
+                f.readline()
+                if not f.readline().strip():
+                    return None  # header only
+            first = _first_timestamp(path, time_col)
+            too_old = max_days > 0 and first is not None and not pd.isna(first) and \
+                pd.Timestamp.now() - first > pd.Timedelta(days=max_days)
+            if os.path.getsize(path) < max_bytes and not too_old:
+                return None
+            os.replace(path, pending)
+
+    with open(pending, 'rb') as f:
+        data = f.read()
+    data = data[:data.rfind(b'\n') + 1]  # a half-written last row is carried over later
+    try:
+        entry = _archive(path, data, time_col, manifest)
+    except Exception:
+        # merged back into the live file by the next check, after the header line
+        header_len = data.find(b'\n') + 1
+        os.replace(pending, f"{path}.rotated-{header_len}")
+        raise
+    os.replace(pending, f"{path}.rotated-{len(data)}")
+    print(f"[INFO] Rotated {os.path.basename(path)} ({entry['rows']} rows) into {entry['file']}")
+    return entry
+
+
+def _archive(path, data, time_col, manifest):
+    """Write `data` (the rotated rows of `path`) as a gzip segment and add it to the manifest."""
+    try:
+        df = pd.read_csv(io.BytesIO(data))
+    except pd.errors.ParserError:
+        # Older rows in some history files carry extra columns (as in migrate.py);
+        # the segment keeps every line, only the manifest's counts skip them
+        df = pd.read_csv(io.BytesIO(data), engine="python", on_bad_lines="skip")
+    stamps = pd.to_datetime(df[time_col], errors='coerce') if time_col in df.columns else pd.Series(dtype='datetime64[ns]')
+    start, end = stamps.min(), stamps.max()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if pd.isna(start):
+        name = f"{stem}.{pd.Timestamp.now().strftime(_STAMP)}"
+    else:
+        name = f"{stem}.{start.strftime(_STAMP)}-{end.strftime(_STAMP)}"
+    os.makedirs(manifest.archive_dir, exist_ok=True)
+    file, n = f"{name}.csv.gz", 1
+    while os.path.exists(os.path.join(manifest.archive_dir, file)):
+        n += 1
+        file = f"{name}.{n}.csv.gz"
+    segment = os.path.join(manifest.archive_dir, file)
+    entry = {
+        "file": file,
+        "start": None if pd.isna(start) else str(start),
+        "end": None if pd.isna(end) else str(end),
+        "rows": len(df),
+    }
+    try:
+        with gzip.open(segment, 'wb') as dst:
+            dst.write(data)
+        manifest.add(path, entry)
+    except Exception:
+        if os.path.exists(segment):
+            os.remove(segment)  # not in the manifest; the rows go back to the live file
+        raise
+    return entry
+
+
+def start_rotator(files, manifest, lock, interval=LOG_ROTATE_INTERVAL):
+    """Check `files` ({path: timestamp column}) for rotation in a daemon thread."""
+
+    def run():
+        while True:
+            for path, time_col in files.items():
+                try:
+                    rotate_file(path, time_col, manifest, lock)
+                except Exception as e:
+                    print(f"[WARN] Log rotation failed for {path}: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="log-rotator", daemon=True)
+    thread.start()
+    return thread
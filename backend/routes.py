@@ -1,4 +1,10 @@
-from flask import Blueprint, jsonify, request
+import io
+import json
+import math
+import base64
+import binascii
+import pandas as pd
+from flask import Blueprint, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
 
@@ -12,91 +18,191 @@ from backend.services import (
     record_partial_payment, delete_customer, delete_all_customers,
     login_user, get_recent_activity, user_pay_due,
     user_delete_account, get_user_transactions,
-    reset_credentials  # All required imports
+    reset_credentials, bulk_add_customers, batch_update_dues,
+    get_dashboard_summary, query_customers, customer_store,
+    export_chunks, EXPORT_DATASETS, query_email_log,
+    logs_stamp, ACTIVITY_LOGS, TRANSACTION_LOGS  # All required imports
 )
-from backend.notifications.email_service import send_email, shop_name
+from backend.cache import conditional_get
+from backend.sessions import issue_token, revoke_token, request_token, session_required
+from backend.ratelimit import check_login, login_by_user
+from backend.metrics import registry as metrics_registry
+from backend.export import stream_export, FORMATS as EXPORT_FORMATS
+from backend.notifications.email_service import send_template, send_welcome_email
 from backend.razorpay_utils import save_keys, create_upi_order, check_payment_status
 # ============== AUTHENTICATION ROUTES ==============
 @routes.route("/user/login", methods=["POST"])
 def api_login_user():
-    """Unified login endpoint for both customers and legacy users"""
-    data = request.json
-    success = login_user(data.get("username"), data.get("password"))
+    """Customer login; returns a session token for the /user/* routes"""
+    data = request.json or {}
+    # Throttle per username and per client before paying for a password hash
+    wait = check_login(data.get("username"), request.remote_addr)
+    if wait:
+        response = jsonify({"success": False, "message": "Too many login attempts, try again later"})
+        response.headers["Retry-After"] = str(math.ceil(wait))
+        return response, 429
+    result = login_user(data.get("username") or "", data.get("password") or "")
+    if not result.get("success"):
+        return jsonify({"success": False, "message": result.get("message", "Invalid credentials")}), 401
+    login_by_user.reset((data.get("username") or "").strip())  # typos before a good login don't count
+    token, expires_in = issue_token(result["customer_id"], data.get("username"))
     return jsonify({
-        "success": success,
-        "message": "Login successful" if success else "Invalid credentials"
+        **result,
+        "message": "Login successful",
+        "token": token,
+        "expires_in": expires_in
     })
 
+@routes.route("/user/logout", methods=["POST"])
+def api_logout_user():
+    token = request_token()
+    if token:
+        revoke_token(token)
+    return jsonify({"status": "logged_out"})
+
 # ============== ADMIN ROUTES ==============
+@routes.route("/metrics", methods=["GET"])
+def api_metrics():
+    """Request, service and storage timings in Prometheus text format"""
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
+def _encode_cursor(entry):
+    return base64.urlsafe_b64encode(json.dumps(list(entry)).encode()).decode()
+
+def _decode_cursor(value, sort):
+    """[sort key, id] from an X-Next-Cursor value; ValueError unless it fits `sort`."""
+    try:
+        entry = json.loads(base64.urlsafe_b64decode(value.encode()))
+    except (binascii.Error, json.JSONDecodeError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor") from None
+    if not isinstance(entry, list) or len(entry) != 2:
+        raise ValueError("Invalid cursor")
+    key, customer_id = entry
+    # the index compares entries with bisect, so the types must match its keys
+    key_types = (int,) if sort.lstrip("-") == "id" else (int, float)
+    if isinstance(key, bool) or not isinstance(key, key_types) or \
+            isinstance(customer_id, bool) or not isinstance(customer_id, int):
+        raise ValueError(f"Cursor does not match sort '{sort}'")
+    return entry
+
 @routes.route("/admin/customers", methods=["GET"])
+@conditional_get(refresh=customer_store.refresh)
 def api_get_customers():
-    active_only = request.args.get("active_only", "false").lower() == "true"
-    return jsonify(get_all_customers(active_only=active_only))
+    """Customers with optional filters, projection and offset/cursor paging.
+
+    Query args: status, active_only, category, min_due, max_due, overdue_days,
+    fields=a,b,c, sort=id|-id|due|-due, limit, offset, cursor. When more rows
+    remain, the X-Next-Cursor header holds the cursor for the next page.
+    """
+    args = request.args
+    status = "active" if args.get("active_only", "false").lower() == "true" else args.get("status")
+    fields = [f.strip() for f in args["fields"].split(",") if f.strip()] if args.get("fields") else None
+    try:
+        rows, next_entry = query_customers(
+            status=status,
+            category=args.get("category"),
+            min_due=args.get("min_due", type=float),
+            max_due=args.get("max_due", type=float),
+            overdue_days=args.get("overdue_days", type=int),
+            fields=fields,
+            sort=args.get("sort", "id"),
+            limit=args.get("limit", type=int),
+            offset=args.get("offset", 0, type=int),
+            after=_decode_cursor(args["cursor"], args.get("sort", "id")) if args.get("cursor") else None
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response = jsonify(rows)
+    if next_entry is not None:
+        response.headers["X-Next-Cursor"] = _encode_cursor(next_entry)
+    return response
+
+@routes.route("/admin/summary", methods=["GET"])
+@conditional_get(refresh=customer_store.refresh)
+def api_summary():
+    top = request.args.get("top", 5, type=int)
+    return jsonify(get_dashboard_summary(top=top))
+
+@routes.route("/admin/export/<dataset>", methods=["GET"])
+def api_export(dataset):
+    """Stream a whole table in chunks. Query args: format (ndjson|csv|parquet),
+    start, end (dates, filter on the dataset's timestamp column)."""
+    if dataset not in EXPORT_DATASETS:
+        return jsonify({"error": f"Unknown dataset '{dataset}'", "datasets": list(EXPORT_DATASETS)}), 404
+    fmt = request.args.get("format", "ndjson")
+    try:
+        chunks = export_chunks(dataset, start=request.args.get("start"), end=request.args.get("end"))
+        body = stream_export(chunks, fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    mimetype, ext = EXPORT_FORMATS[fmt]
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={dataset}.{ext}"})
 
 @routes.route("/admin/customer/add", methods=["POST"])
 def api_add_customer():
     data = request.json
-    cust = add_customer(
-        name=data.get("name"),
-        phone=data.get("phone"),
-        address=data.get("address"),
-        due=data.get("due"),
-        email=data.get("email", "")
-    )
+    try:
+        cust = add_customer(
+            name=data.get("name"),
+            phone=data.get("phone"),
+            address=data.get("address"),
+            due=data.get("due"),
+            email=data.get("email", "")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    # Send welcome email with credentials
+    # Welcome email with credentials goes into the outbox; dispatcher workers send it
     if cust.get('email'):
-        try:
-            send_email(
-                cust['email'],
-                f"Welcome to {shop_name}!",
-                f"""Hello {cust['name']},
-Your account has been created.
-
-🔐 Login Credentials:
-Username: {cust['username']}
-Password: {cust['password']}
+        send_template("api_welcome", cust['email'], cust, customer_id=cust['id'])
 
-💰 Current Due: ₹{cust['due']:.2f}
+    return jsonify(cust)
 
-Please change your password after first login.
-"""
-            )
+@routes.route("/admin/customer/bulk_add", methods=["POST"])
+def api_bulk_add_customers():
+    """Add customers from a CSV upload/body or a JSON list in one pass"""
+    upload = request.files.get("file")
+    if upload is not None or (request.mimetype or "").endswith("csv"):
+        raw = upload.read() if upload is not None else request.get_data()
+        try:
+            rows = pd.read_csv(io.BytesIO(raw), dtype=str, keep_default_na=False).to_dict(orient="records")
         except Exception as e:
-            print(f"Failed to send welcome email: {e}")
+            return jsonify({"error": f"Invalid CSV: {e}"}), 400
+    else:
+        data = request.get_json(silent=True)
+        rows = data.get("customers") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            return jsonify({"error": "Expected a JSON list of customers or a CSV file"}), 400
 
-    return jsonify(cust)
+    result = bulk_add_customers(rows)
+
+    # Welcome emails are only queued in the outbox here; dispatcher workers send them
+    for cust in result["added"]:
+        if cust.get("email"):
+            send_welcome_email(cust)
+
+    return jsonify(result)
 
 @routes.route("/admin/credentials/reset", methods=["POST"])
 def api_reset_credentials():
     """Endpoint for admin to reset customer credentials"""
     data = request.json
-    result = reset_credentials(
-        customer_id=data.get("customer_id"),
-        new_username=data.get("new_username"),
-        new_password=data.get("new_password")
-    )
+    try:
+        result = reset_credentials(
+            customer_id=data.get("customer_id"),
+            new_username=data.get("new_username"),
+            new_password=data.get("new_password")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     if not result:
         return jsonify({"error": "Customer not found"}), 404
     
-    # Notify customer of credential change
+    # Notify customer of credential change (queued in the outbox)
     if result.get('email'):
-        try:
-            send_email(
-                result['email'],
-                f"{shop_name} - Account Credentials Updated",
-                f"""Hello {result['name']},
-Your login credentials have been updated:
-
-Username: {result['username']}
-Password: {result['password']}
-
-Please change your password after logging in.
-"""
-            )
-        except Exception as e:
-            print(f"Failed to send credentials email: {e}")
+        send_template("api_credentials_updated", result['email'], result, customer_id=result['id'])
 
     return jsonify(result)
 
@@ -146,6 +252,15 @@ def api_update_due():
         return jsonify({"error": "Customer not found"}), 404
     return jsonify(cust)
 
+@routes.route("/admin/customer/batch_update_due", methods=["POST"])
+def api_batch_update_due():
+    """Apply a list of {id, new_due} / {id, amount} changes in one pass"""
+    data = request.get_json(silent=True)
+    changes = data.get("changes") if isinstance(data, dict) else data
+    if not isinstance(changes, list):
+        return jsonify({"error": "Expected a JSON list of changes"}), 400
+    return jsonify(batch_update_dues(changes))
+
 @routes.route("/admin/customer/delete", methods=["POST"])
 def api_delete_customer():
     data = request.json
@@ -160,20 +275,41 @@ def api_delete_all():
     return jsonify({"status": "all_deleted"})
 
 @routes.route("/admin/recent_activity", methods=["GET"])
+@conditional_get(refresh=customer_store.refresh, stamp=lambda: logs_stamp(ACTIVITY_LOGS))
 def api_recent_activity():
     return jsonify(get_recent_activity(limit=10))
 
+@routes.route("/admin/email_log", methods=["GET"])
+def api_email_log():
+    """Email delivery log, newest first. Query args: customer_id, date (one day)
+    or start/end, status (e.g. Sent), limit (default 100)."""
+    args = request.args
+    try:
+        rows = query_email_log(
+            customer_id=args.get("customer_id"),
+            day=args.get("date"),
+            start=args.get("start"),
+            end=args.get("end"),
+            status=args.get("status"),
+            limit=max(1, min(args.get("limit", 100, type=int), 1000))
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(rows)
+
 @routes.route("/admin/user_transactions", methods=["GET"])
+@conditional_get(refresh=customer_store.refresh, stamp=lambda: logs_stamp(TRANSACTION_LOGS))
 def api_user_transactions():
     return jsonify(get_user_transactions(limit=10))
 
 # ============== CUSTOMER USER ROUTES ==============
 @routes.route("/user/due/pay", methods=["POST"])
+@session_required
 def api_user_pay_due():
-    data = request.json
+    data = request.json or {}
     cust = user_pay_due(
-        username=data.get("username"),
-        customer_id=data.get("customer_id"),
+        username=g.session["username"],
+        customer_id=g.session["customer_id"],
         amount=data.get("amount")
     )
     if not cust:
@@ -181,11 +317,11 @@ def api_user_pay_due():
     return jsonify(cust)
 
 @routes.route("/user/account/delete", methods=["POST"])
+@session_required
 def api_user_delete_account():
-    data = request.json
     cust = user_delete_account(
-        username=data.get("username"),
-        customer_id=data.get("customer_id")
+        username=g.session["username"],
+        customer_id=g.session["customer_id"]
     )
     if not cust:
         return jsonify({"error": "Cannot delete account"}), 400
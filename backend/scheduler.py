@@ -1,10 +1,10 @@
 import threading
 import time
-import pandas as pd
 import os
 from datetime import datetime
 from dotenv import load_dotenv
 from .notifications.email_service import send_daily_due_email
+from .services import plan_due_reminders, mark_reminders_sent
 
 # Load env variables
 load_dotenv()
@@ -14,12 +14,20 @@ DAILY_HOUR = int(os.getenv("DAILY_EMAIL_HOUR", 9))
 DAILY_MINUTE = int(os.getenv("DAILY_EMAIL_MINUTE", 0))
 
 
-def load_customers():
-    if os.path.exists(CUSTOMERS_CSV):
-        df = pd.read_csv(CUSTOMERS_CSV)
-        df['due'] = pd.to_numeric(df.get('due', 0), errors='coerce')
-        return df.to_dict(orient='records')
-    return []
+def send_due_reminders(now=None):
+    """Queue reminders for the customers that are due one, then record them in dues.csv.
+
+    Only customers picked by the planner are touched, so a run costs in
+    proportion to the reminders actually sent. last_message_date is written
+    once queued, and only for customers whose reminder was queued: the outbox
+    keeps the message until it is delivered.
+    """
+    now = now or datetime.now()
+    customers = plan_due_reminders(now)
+    queued = send_daily_due_email(customers)
+    mark_reminders_sent(queued, now.strftime("%Y-%m-%d %H:%M:%S"))
+    print(f"[INFO] {len(customers)} customers due a reminder, {len(queued)} emails queued")
+    return customers
 
 
 def daily_email_scheduler():
@@ -30,8 +38,7 @@ def daily_email_scheduler():
         now = datetime.now()
         if now.hour == DAILY_HOUR and now.minute == DAILY_MINUTE:
             print("[INFO] Sending daily due emails...")
-            customers = load_customers()
-            send_daily_due_email(customers)
+            send_due_reminders()
             # Sleep 61 seconds to prevent sending multiple times within the same minute
             time.sleep(61)
         else:
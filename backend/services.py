@@ -1,12 +1,31 @@
 # backend/services.py
 import os
+import re
+import heapq
 import pandas as pd
+import atexit
 import secrets
 import string
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from datetime import datetime
+from itertools import islice
 from werkzeug.security import generate_password_hash, check_password_hash
+from backend.storage import create_engine
+from backend.aggregates import CustomerSummary, row_due
+from backend.store import SortedIndex
+from backend.cache import StoreVersionListener
+from backend.decorators import bumps_version, LOG_FILE_PATH
+from backend.sessions import revoke_customer
+from backend.logwriter import log_writer
+from backend.metrics import timed_service, instrument_storage
+from backend.tracing import traced
+from backend.rotation import SegmentManifest, start_rotator
+from backend.reminders import plan_reminders, REMINDER_ACTIVITY_GRACE_DAYS
+from backend.notifications.email_service import EMAIL_LOG_FILE, delivery_log, check_headers
 
-DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
+DATA_PATH = os.getenv("DATA_PATH") or os.path.join(os.path.dirname(__file__), "data")  # override for benchmarks
 CUSTOMERS_CSV = os.path.join(DATA_PATH, "customers.csv")
 ADDED_CSV = os.path.join(DATA_PATH, "added_customers.csv")
 UPDATED_CSV = os.path.join(DATA_PATH, "updated_customers.csv")
@@ -19,18 +38,84 @@ SIGNIN_CSV = os.path.join(DATA_PATH, "signin.csv")  # User login
 USER_PAYMENT_CSV = os.path.join(DATA_PATH, "user_payment_updated.csv")
 USER_DELETED_CSV = os.path.join(DATA_PATH, "user_account_deleted.csv")
 SIGNIN_LOGS_CSV = os.path.join(DATA_PATH, "signin_logs.csv")  # NEW for login tracking
+ARCHIVE_PATH = os.path.join(DATA_PATH, "archive")  # rotated log segments
 
 os.makedirs(DATA_PATH, exist_ok=True)
 
+BULK_HASH_POOL_MIN = int(os.getenv("BULK_HASH_POOL_MIN", 50))  # smaller batches hash inline
+JOURNAL_COMPACT_RECORDS = int(os.getenv("JOURNAL_COMPACT_RECORDS", 1000))
+JOURNAL_COMPACT_INTERVAL = int(os.getenv("JOURNAL_COMPACT_INTERVAL", 30))  # seconds
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 5000))
+
+# CSV files (default) or SQLite, chosen by STORAGE_ENGINE (see backend/storage)
+storage = create_engine(DATA_PATH)
+
+# Resident copy of the customers table with id/username indexes (see backend/store.py)
+customer_store = storage.customer_store(CUSTOMERS_CSV)
+instrument_storage(storage, customer_store)  # per-table latency histograms at /api/metrics
+
+# Dashboard aggregates and sort indexes maintained from the store's change events
+customer_summary = CustomerSummary()
+customer_store.add_listener(customer_summary)
+SORT_INDEXES = {"id": SortedIndex(lambda row: int(row['id'])), "due": SortedIndex(row_due)}
+for _index in SORT_INDEXES.values():
+    customer_store.add_listener(_index)
+# Changes picked up from other processes invalidate cached responses as well
+customer_store.add_listener(StoreVersionListener())
+
+HIDDEN_FIELDS = {"password", "plain_password"}  # never leave the backend
+
+# Exportable tables: name -> (file, column the start/end date filter applies to)
+EXPORT_DATASETS = {
+    "customers": (CUSTOMERS_CSV, "added_at"),
+    "added": (ADDED_CSV, "added_at"),
+    "updated": (UPDATED_CSV, "updated_at"),
+    "partial_payments": (PARTIAL_CSV, "partial_at"),
+    "deleted": (DELETED_CSV, "deleted_at"),
+    "user_payments": (USER_PAYMENT_CSV, "payment_date"),
+    "user_deleted": (USER_DELETED_CSV, "deleted_at"),
+}
+
+# Append-only logs rotated into gzip segments: path -> timestamp column
+ROTATED_LOGS = {LOG_FILE_PATH: "timestamp", EMAIL_LOG_FILE: "timestamp"}
+if storage.name == "csv":  # under SQLite the history tables live in the database
+    ROTATED_LOGS.update({
+        SIGNIN_LOGS_CSV: "timestamp",
+        ADDED_CSV: "added_at",
+        UPDATED_CSV: "updated_at",
+        PARTIAL_CSV: "partial_at",
+        DELETED_CSV: "deleted_at",
+        USER_PAYMENT_CSV: "payment_date",
+        USER_DELETED_CSV: "deleted_at",
+    })
+
+LOG_SEGMENTS = getattr(storage, "segments", None) or SegmentManifest(ARCHIVE_PATH)
+delivery_log.manifest = LOG_SEGMENTS  # email log queries reach into rotated segments too
+
+def start_log_rotation():
+    """Rotate ROTATED_LOGS by size/age in the background (see backend/rotation.py)"""
+    return start_rotator(ROTATED_LOGS, LOG_SEGMENTS, storage.lock)
+
+def start_journal_compactor():
+    """Fold customers.journal back into customers.csv in the background (CSV engine)"""
+    return customer_store.start_compactor(JOURNAL_COMPACT_INTERVAL, JOURNAL_COMPACT_RECORDS)
+
 # ---------------- CSV Helpers ----------------
+@traced()
 def _load_csv(file, cols=None):
-    return pd.read_csv(file) if os.path.exists(file) else pd.DataFrame(columns=cols or [])
+    if file == CUSTOMERS_CSV:
+        return customer_store.frame()
+    return storage.load(file, cols)
 
 def _append_csv(file, row):
-    pd.DataFrame([row]).to_csv(file, mode='a', header=not os.path.exists(file), index=False)
+    storage.append(file, [row])
 
+@traced()
 def _save_csv(df, file):
-    df.to_csv(file, index=False)
+    if file == CUSTOMERS_CSV:
+        customer_store.replace(df)
+        return
+    storage.save(df, file)
 
 def _generate_credentials():
     """Generate random username and password"""
@@ -39,17 +124,125 @@ def _generate_credentials():
     return username, password
 
 # ---------------- Customer CRUD (Updated with correct recent CSV columns) ----------------
+@timed_service
 def get_all_customers(active_only=False):
-    df = _load_csv(CUSTOMERS_CSV)
-    if df.empty:
-        return []
-    if active_only:
-        df = df[df['status'] == 'active']
-    return df.to_dict(orient='records')
+    return customer_store.records(active_only=active_only)
+
+@timed_service
+def query_customers(status=None, category=None, min_due=None, max_due=None, overdue_days=None,
+                    fields=None, sort="id", limit=None, offset=0, after=None):
+    """One page of customers, filtered server-side and walked in index order.
 
+    sort is "id"/"due", prefixed with "-" for descending. `after` is the
+    (key, id) entry returned as `next` by the previous page (cursor paging);
+    otherwise `offset` rows are skipped. Returns (rows, next) where next is None
+    on the last page. Password columns are always dropped.
+    """
+    reverse = sort.startswith("-")
+    index = SORT_INDEXES.get(sort.lstrip("-"))
+    if index is None:
+        raise ValueError(f"Unknown sort key '{sort}' (expected one of {', '.join(SORT_INDEXES)})")
+
+    overdue_ids = None
+    if overdue_days is not None:
+        dues = _load_csv(DUES_CSV)
+        if dues.empty:
+            overdue_ids = set()
+        else:
+            age = (pd.Timestamp.now() - pd.to_datetime(dues['due_date'], errors='coerce')).dt.days
+            overdue_ids = set(dues.loc[age >= overdue_days, 'id'].dropna().astype(int))
+
+    def matches(row):
+        if status is not None and row.get('status') != status:
+            return False
+        if category is not None and row.get('category') != category:
+            return False
+        due = row_due(row)
+        if min_due is not None and due < min_due:
+            return False
+        if max_due is not None and due > max_due:
+            return False
+        if overdue_ids is not None and (due <= 0 or int(row['id']) not in overdue_ids):
+            return False
+        return True
+
+    filtered = any(v is not None for v in (status, category, min_due, max_due, overdue_ids))
+    rows, last, has_more = customer_store.page(index, matches if filtered else None,
+                                               offset=offset, limit=limit, after=after, reverse=reverse)
+    wanted = [f for f in fields if f not in HIDDEN_FIELDS] if fields else None
+    rows = [{f: row.get(f) for f in wanted} if wanted else
+            {k: v for k, v in row.items() if k not in HIDDEN_FIELDS} for row in rows]
+    return rows, (last if has_more else None)
+
+# ---------------- Export ----------------
+def _date_bound(value, name):
+    """Parse a start/end filter; a bare date as `end` covers that whole day."""
+    if value in (None, ""):
+        return None, False
+    try:
+        ts = pd.Timestamp(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name} date '{value}'")
+    return ts, len(str(value).strip()) <= 10
+
+def _customer_chunks(chunksize):
+    # Walk the resident store by id rather than copying it in one go
+    after = None
+    while True:
+        rows, last, has_more = customer_store.page(SORT_INDEXES["id"], limit=chunksize, after=after)
+        if rows:
+            yield pd.DataFrame(rows)
+        if not has_more:
+            return
+        after = last
+
+@timed_service
+def export_chunks(dataset, start=None, end=None, chunksize=EXPORT_CHUNK_ROWS):
+    """Iterator of DataFrames (at most `chunksize` rows each) for an export.
+
+    start/end filter on the dataset's date column (see EXPORT_DATASETS), both
+    inclusive. Arguments are validated here, before the first chunk is read,
+    so bad input raises ValueError instead of breaking a response mid-stream.
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise ValueError(f"Unknown dataset '{dataset}'")
+    file, date_col = EXPORT_DATASETS[dataset]
+    lo, _ = _date_bound(start, "start")
+    hi, whole_day = _date_bound(end, "end")
+
+    def chunks():
+        if file == CUSTOMERS_CSV:
+            source = _customer_chunks(chunksize)
+        else:
+            until = hi + pd.Timedelta(days=1) if hi is not None and whole_day else hi
+            source = storage.iter_chunks(file, chunksize, since=lo, until=until)
+        for chunk in source:
+            chunk = chunk.drop(columns=[c for c in HIDDEN_FIELDS if c in chunk.columns])
+            if lo is not None or hi is not None:
+                if date_col not in chunk.columns:
+                    continue
+                stamps = pd.to_datetime(chunk[date_col], errors='coerce')
+                mask = stamps.notna()
+                if lo is not None:
+                    mask &= stamps >= lo
+                if hi is not None:
+                    mask &= stamps < hi + pd.Timedelta(days=1) if whole_day else stamps <= hi
+                chunk = chunk[mask]
+            if not chunk.empty:
+                yield chunk
+    return chunks()
+
+@timed_service
+def get_dashboard_summary(top=5):
+    """Count, total due, paid/unpaid split and top debtors of active customers"""
+    customer_store.refresh()
+    return customer_summary.snapshot(top)
+
+@timed_service
+@bumps_version
 def add_customer(name, phone, address, due, category="Regular", email=""):
-    df = _load_csv(CUSTOMERS_CSV)
-    new_id = (df['id'].max() or 0) + 1 if not df.empty else 1
+    check_headers(email or "", "")  # the welcome email goes to it; refuse before anything is written
+    new_id = customer_store.next_id()
     now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     # Generate credentials
@@ -62,33 +255,146 @@ def add_customer(name, phone, address, due, category="Regular", email=""):
         "username": username, "password": generate_password_hash(password)
     }
     
-    # Save to main CSV
-    df = pd.concat([df, pd.DataFrame([cust])], ignore_index=True)
-    _save_csv(df, CUSTOMERS_CSV)
-    
-    # Append to added_customers.csv with only intended columns
-    _append_csv(ADDED_CSV, {
-        "id": new_id, "name": name, "phone": phone, "email": email,
-        "address": address, "due": float(due), "last_update": now_str,
-        "status": "active", "added_at": now_str
-    })
-    
-    # Append to dues.csv
-    _append_csv(DUES_CSV, {
-        "id": new_id, "name": name, "phone": phone,
-        "address": address, "due_amount": float(due),
-        "due_date": datetime.now().date(), "last_message_date": ""
-    })
+    with storage.transaction():
+        # Save to main CSV
+        customer_store.insert(cust)
+
+        # Append to added_customers.csv with only intended columns
+        _append_csv(ADDED_CSV, {
+            "id": new_id, "name": name, "phone": phone, "email": email,
+            "address": address, "due": float(due), "last_update": now_str,
+            "status": "active", "added_at": now_str
+        })
+
+        # Append to dues.csv
+        _append_csv(DUES_CSV, {
+            "id": new_id, "name": name, "phone": phone,
+            "address": address, "due_amount": float(due),
+            "due_date": datetime.now().date(), "last_message_date": ""
+        })
     
     return {**cust, "password": password}  # Return plain password for email
 
+def _valid_email(email):
+    return bool(re.match(r'^[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}$', email))
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+def _get_hash_pool():
+    """One pool for the life of the process. Workers are spawned, not forked:
+    forking this process would copy locks held by its background threads."""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=get_context("spawn"))
+            atexit.register(_hash_pool.shutdown)
+        return _hash_pool
+
+def _hash_passwords(passwords):
+    """Hash many passwords, spreading the (deliberately slow) KDF over CPU cores"""
+    workers = os.cpu_count() or 1
+    if workers == 1 or len(passwords) < BULK_HASH_POOL_MIN:
+        return [generate_password_hash(p) for p in passwords]
+    return list(_get_hash_pool().map(generate_password_hash, passwords,
+                                     chunksize=max(1, len(passwords) // (workers * 4))))
+
+@timed_service
+@bumps_version
+def bulk_add_customers(rows):
+    """Add many customers at once.
+
+    Rows are validated against existing customers and each other in one pass
+    (name, phone and email must be unique, as in the dashboard's form), then
+    customers, added_customers and dues are each written once. Returns
+    {"added": [...], "rejected": [{"row": index, "error": ...}]}; added
+    customers carry their plain password for the welcome email.
+    """
+    existing = customer_store.records()
+    seen = {
+        "name": {str(c.get("name", "")).strip().lower() for c in existing},
+        "phone": {str(c.get("phone", "")).strip() for c in existing},
+        "email": {str(c.get("email", "")).strip().lower() for c in existing if isinstance(c.get("email"), str)},
+    }
+    accepted, rejected = [], []
+    for i, row in enumerate(rows):
+        name = str(row.get("name") or "").strip()
+        phone = str(row.get("phone") or "").strip()
+        email = str(row.get("email") or "").strip()
+        try:
+            due = float(row.get("due") or 0)
+        except (TypeError, ValueError):
+            rejected.append({"row": i, "error": "Invalid due amount"})
+            continue
+        error = None
+        if not name or not phone:
+            error = "Name and phone are required"
+        elif not (phone.isdigit() and len(phone) == 10):
+            error = "Phone must be exactly 10 digits"
+        elif email and not _valid_email(email):
+            error = "Invalid email format"
+        elif name.lower() in seen["name"]:
+            error = "Name already exists"
+        elif phone in seen["phone"]:
+            error = "Phone already exists"
+        elif email and email.lower() in seen["email"]:
+            error = "Email already exists"
+        if error:
+            rejected.append({"row": i, "error": error})
+            continue
+        seen["name"].add(name.lower())
+        seen["phone"].add(phone)
+        if email:
+            seen["email"].add(email.lower())
+        accepted.append({"name": name, "phone": phone, "email": email,
+                         "address": str(row.get("address") or "").strip(), "due": due,
+                         "category": str(row.get("category") or "Regular").strip()})
+    if not accepted:
+        return {"added": [], "rejected": rejected}
+
+    credentials = [_generate_credentials() for _ in accepted]
+    hashes = _hash_passwords([password for _, password in credentials])
+    now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    today = datetime.now().date()
+
+    with storage.transaction():
+        next_id = customer_store.next_id()
+        customers, added_rows, due_rows = [], [], []
+        for offset, (row, (username, _), hashed) in enumerate(zip(accepted, credentials, hashes)):
+            new_id = next_id + offset
+            customers.append({
+                "id": new_id, "name": row["name"], "phone": row["phone"], "email": row["email"],
+                "address": row["address"], "due": row["due"], "category": row["category"],
+                "status": "active", "last_update": now_str, "added_at": now_str,
+                "username": username, "password": hashed
+            })
+            added_rows.append({
+                "id": new_id, "name": row["name"], "phone": row["phone"], "email": row["email"],
+                "address": row["address"], "due": row["due"], "last_update": now_str,
+                "status": "active", "added_at": now_str
+            })
+            due_rows.append({
+                "id": new_id, "name": row["name"], "phone": row["phone"],
+                "address": row["address"], "due_amount": row["due"],
+                "due_date": today, "last_message_date": ""
+            })
+        customer_store.insert_many(customers)
+        storage.append(ADDED_CSV, added_rows)
+        storage.append(DUES_CSV, due_rows)
+
+    added = [{**cust, "password": password} for cust, (_, password) in zip(customers, credentials)]
+    return {"added": added, "rejected": rejected}
+
+@timed_service
+@bumps_version
 def reset_credentials(customer_id, new_username=None, new_password=None):
     """NEW: Allow admin to reset customer credentials"""
-    df = _load_csv(CUSTOMERS_CSV)
-    if customer_id not in df['id'].values:
+    cust = customer_store.get(customer_id)
+    if cust is None:
         return None
-        
-    cust = df[df['id'] == customer_id].iloc[0].to_dict()
+    if isinstance(cust.get('email'), str):
+        check_headers(cust['email'], "")  # the new credentials are emailed there
+
     updates = {}
     
     if new_username:
@@ -98,8 +404,8 @@ def reset_credentials(customer_id, new_username=None, new_password=None):
     
     if updates:
         updates['last_update'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        df.loc[df['id'] == customer_id, list(updates.keys())] = list(updates.values())
-        _save_csv(df, CUSTOMERS_CSV)
+        customer_store.update(customer_id, updates)
+        revoke_customer(cust['id'])  # old sessions must log in again
     
     return {
         **cust,
@@ -107,81 +413,167 @@ def reset_credentials(customer_id, new_username=None, new_password=None):
         "password": new_password if new_password else "[unchanged]"
     }
 
+@timed_service
+@bumps_version
 def update_due(customer_id, new_due):
-    df = _load_csv(CUSTOMERS_CSV)
-    if customer_id not in df['id'].values:
-        return None
     now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    df.loc[df["id"] == customer_id, ["due", "last_update"]] = [float(new_due), now_str]
-    _save_csv(df, CUSTOMERS_CSV)
-    cust = df[df['id'] == customer_id].iloc[0].to_dict()
-    
-    # Append to updated_customers.csv with only intended columns
-    _append_csv(UPDATED_CSV, {
-        "id": cust["id"], "name": cust["name"], "phone": cust["phone"],
-        "email": cust["email"], "address": cust["address"], "due": cust["due"],
-        "last_update": cust["last_update"], "status": cust["status"],
-        "updated_due": float(new_due), "updated_at": now_str
-    })
-    
-    # Sync with dues
-    update_due_record(customer_id, new_due)
+    with storage.transaction():
+        cust = customer_store.update(customer_id, {"due": float(new_due), "last_update": now_str})
+        if cust is None:
+            return None
+
+        # Append to updated_customers.csv with only intended columns
+        _append_csv(UPDATED_CSV, {
+            "id": cust["id"], "name": cust["name"], "phone": cust["phone"],
+            "email": cust["email"], "address": cust["address"], "due": cust["due"],
+            "last_update": cust["last_update"], "status": cust["status"],
+            "updated_due": float(new_due), "updated_at": now_str
+        })
+
+        # Sync with dues
+        update_due_record(cust["id"], new_due)
     return cust
 
 
+@timed_service
+@bumps_version
 def record_partial_payment(customer_id, amount):
-    df = _load_csv(CUSTOMERS_CSV)
-    if customer_id not in df['id'].values:
-        return None
-    cust = df[df['id'] == customer_id].iloc[0].to_dict()
-    new_due = float(cust['due']) - float(amount)
     now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    df.loc[df['id'] == customer_id, ["due", "last_update"]] = [new_due, now_str]
-    _save_csv(df, CUSTOMERS_CSV)
-    
-    # Append to partial_customers.csv with only intended columns
-    _append_csv(PARTIAL_CSV, {
-        "id": cust["id"], "name": cust["name"], "phone": cust["phone"],
-        "email": cust["email"], "address": cust["address"], "due": cust["due"],
-        "last_update": cust["last_update"], "status": cust["status"],
-        "partial_due": new_due, "partial_at": now_str
-    })
-    
-    # Sync with dues
-    update_due_record(customer_id, new_due, last_message_date=now_str)
+    with storage.transaction():
+        # Read the due under the lock, so a concurrent payment cannot be based on the same value
+        cust = customer_store.get(customer_id)
+        if cust is None:
+            return None
+        new_due = float(cust['due']) - float(amount)
+        customer_store.update(customer_id, {"due": new_due, "last_update": now_str})
+
+        # Append to partial_customers.csv with only intended columns
+        _append_csv(PARTIAL_CSV, {
+            "id": cust["id"], "name": cust["name"], "phone": cust["phone"],
+            "email": cust["email"], "address": cust["address"], "due": cust["due"],
+            "last_update": cust["last_update"], "status": cust["status"],
+            "partial_due": new_due, "partial_at": now_str
+        })
+
+        # Sync with dues
+        update_due_record(cust["id"], new_due)
     cust.update({"due": new_due, "partial_due": new_due, "partial_at": now_str})
     return cust
 
 
+@timed_service
+@bumps_version
+def batch_update_dues(changes):
+    """Apply many due changes (end-of-day ledger posting) in one pass.
+
+    Each change is {"id", "new_due"} (like update_due) or {"id", "amount"}
+    (like record_partial_payment); changes to the same customer apply in order.
+    The resulting dues are computed as one vectorised DataFrame update, then
+    customers and dues.csv are written once and updated/partial history rows are
+    appended in one batch each. Returns one result per change, in input order.
+    """
+    # Reads, arithmetic and writes share one transaction, so concurrent payments stack
+    with storage.transaction():
+        results = [None] * len(changes)
+        parsed = []
+        for i, change in enumerate(changes):
+            cust = customer_store.get(change.get("id")) if isinstance(change, dict) else None
+            if cust is None:
+                results[i] = {"index": i, "id": change.get("id") if isinstance(change, dict) else None,
+                              "status": "error", "error": "Customer not found"}
+                continue
+            try:
+                if change.get("new_due") is not None:
+                    parsed.append((i, cust["id"], "update", float(change["new_due"]), float("nan")))
+                elif change.get("amount") is not None:
+                    parsed.append((i, cust["id"], "partial", float("nan"), float(change["amount"])))
+                else:
+                    raise ValueError
+            except (TypeError, ValueError):
+                results[i] = {"index": i, "id": cust["id"], "status": "error",
+                              "error": "Expected a numeric new_due or amount"}
+        if not parsed:
+            return results
+
+        ch = pd.DataFrame(parsed, columns=["index", "id", "type", "new_due", "amount"])
+        current = {cid: customer_store.get(cid) for cid in ch["id"].unique()}
+        base = ch["id"].map({cid: float(c["due"]) for cid, c in current.items()})
+
+        # Within a customer, each "update" starts a new segment anchored at its
+        # new_due; payments subtract cumulatively from the segment's anchor.
+        is_update = ch["type"] == "update"
+        segment = is_update.astype(int).groupby(ch["id"]).cumsum()
+        anchor = ch["new_due"].groupby([ch["id"], segment]).transform("first").fillna(base)
+        paid = ch["amount"].fillna(0).groupby([ch["id"], segment]).cumsum()
+        ch["due"] = anchor - paid
+        ch["previous_due"] = ch["due"] + ch["amount"].fillna(0)
+
+        now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        final = ch.drop_duplicates("id", keep="last")
+
+        customer_store.update_many({
+            cid: {"due": due, "last_update": now_str} for cid, due in zip(final["id"], final["due"])
+        })
+
+        updated_rows, partial_rows = [], []
+        for row in ch.itertuples(index=False):
+            cust = current[row.id]
+            history = {
+                "id": cust["id"], "name": cust["name"], "phone": cust["phone"],
+                "email": cust["email"], "address": cust["address"],
+            }
+            if row.type == "update":
+                updated_rows.append({**history, "due": row.due, "last_update": now_str,
+                                     "status": cust["status"], "updated_due": row.due,
+                                     "updated_at": now_str})
+            else:
+                partial_rows.append({**history, "due": row.previous_due, "last_update": cust["last_update"],
+                                     "status": cust["status"], "partial_due": row.due,
+                                     "partial_at": now_str})
+        storage.append(UPDATED_CSV, updated_rows)
+        storage.append(PARTIAL_CSV, partial_rows)
+
+        # Sync with dues in one rewrite
+        storage.update_rows(DUES_CSV, "id", pd.DataFrame({
+            "id": final["id"].values, "due_amount": final["due"].values
+        }))
+
+        for row in ch.itertuples(index=False):
+            results[row.index] = {"index": int(row.index), "id": int(row.id), "status": "ok",
+                                  "type": row.type, "due": float(row.due)}
+        return results
+
+
+@timed_service
+@bumps_version
 def delete_customer(customer_id):
-    df = _load_csv(CUSTOMERS_CSV)
-    if customer_id not in df['id'].values:
-        return None
-    cust = df[df['id'] == customer_id].iloc[0].to_dict()
-    df = df[df['id'] != customer_id]
-    _save_csv(df, CUSTOMERS_CSV)
-    
-    # Append to deleted_customers.csv with only intended columns
-    _append_csv(DELETED_CSV, {
-        "id": cust["id"], "name": cust["name"], "phone": cust["phone"],
-        "email": cust["email"], "address": cust["address"], "due": cust["due"],
-        "last_update": cust["last_update"], "status": "deleted",
-        "deleted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    })
-    
-    # Remove from dues
-    df_dues = _load_csv(DUES_CSV)
-    df_dues = df_dues[df_dues['id'] != customer_id]
-    _save_csv(df_dues, DUES_CSV)
+    with storage.transaction():
+        cust = customer_store.delete(customer_id)
+        if cust is None:
+            return None
+
+        # Append to deleted_customers.csv with only intended columns
+        _append_csv(DELETED_CSV, {
+            "id": cust["id"], "name": cust["name"], "phone": cust["phone"],
+            "email": cust["email"], "address": cust["address"], "due": cust["due"],
+            "last_update": cust["last_update"], "status": "deleted",
+            "deleted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+        # Remove from dues
+        storage.delete_where(DUES_CSV, {"id": cust["id"]})
+    revoke_customer(cust["id"])
     return cust
 
+@timed_service
+@bumps_version
 def delete_all_customers():
-    df = _load_csv(CUSTOMERS_CSV)
-    if df.empty:
+    customers = customer_store.records()
+    if not customers:
         return
     now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    for _, row in df.iterrows():
-        _append_csv(DELETED_CSV, {
+    with storage.transaction():
+        storage.append(DELETED_CSV, [{
             "id": row["id"],
             "name": row["name"],
             "phone": row["phone"],
@@ -191,69 +583,119 @@ def delete_all_customers():
             "last_update": row["last_update"],
             "status": "deleted",
             "deleted_at": now_str
-        })
-    _save_csv(pd.DataFrame(columns=df.columns), CUSTOMERS_CSV)
-    _save_csv(pd.DataFrame(columns=_load_csv(DUES_CSV).columns), DUES_CSV)
+        } for row in customers])
+        customer_store.clear()
+        _save_csv(pd.DataFrame(columns=_load_csv(DUES_CSV).columns), DUES_CSV)
+    revoke_customer()
 
-def update_due_record(customer_id, new_due, last_message_date=None):
-    df = _load_csv(DUES_CSV)
-    if customer_id not in df['id'].values:
-        return
-    df.loc[df['id'] == customer_id, 'due_amount'] = new_due
-    if last_message_date:
-        df.loc[df['id'] == customer_id, 'last_message_date'] = last_message_date
-    else:
-        df.loc[df['id'] == customer_id, 'last_message_date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    _save_csv(df, DUES_CSV)
+@timed_service
+@bumps_version
+def update_due_record(customer_id, new_due):
+    # last_message_date is left alone: it is when the last reminder went out
+    storage.update_where(DUES_CSV, {"id": customer_id}, {"due_amount": new_due})
 
 
+# ---------------- Due Reminders ----------------
+@timed_service
+def plan_due_reminders(now=None):
+    """Customers the daily run should remind (cadence rules in backend/reminders.py)."""
+    now = pd.Timestamp(now or datetime.now())
+    dues = _load_csv(DUES_CSV, ["id", "due_amount", "due_date", "last_message_date"])
+    payments = None
+    if REMINDER_ACTIVITY_GRACE_DAYS:
+        payments = _recent_payments(now.normalize() - pd.Timedelta(days=REMINDER_ACTIVITY_GRACE_DAYS))
+    return plan_reminders(dues, customer_store.get, now=now, payments=payments)
 
-def get_recent_activity(limit=5):
-    logs = [
-        (ADDED_CSV, "added_at"),
-        (UPDATED_CSV, "updated_at"),
-        (PARTIAL_CSV, "partial_at"),
-        (DELETED_CSV, "deleted_at")
-    ]
-    recent_records = []
+def _recent_payments(since):
+    """(id, paid_at) of partial and user payments made since `since`, from the payment logs."""
+    frames = []
+    for file, column in ((PARTIAL_CSV, "partial_at"), (USER_PAYMENT_CSV, "payment_date")):
+        for chunk in storage.iter_chunks(file, EXPORT_CHUNK_ROWS, since=since):
+            if "id" not in chunk.columns or column not in chunk.columns:
+                continue
+            paid_at = pd.to_datetime(chunk[column], errors="coerce")
+            recent = paid_at >= since
+            frames.append(pd.DataFrame({"id": chunk.loc[recent, "id"], "paid_at": paid_at[recent]}))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["id", "paid_at"])
+
+@timed_service
+def mark_reminders_sent(customer_ids, sent_at=None):
+    """Stamp last_message_date for every reminded customer with one dues write."""
+    if not customer_ids:
+        return 0
+    sent_at = sent_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return storage.update_rows(DUES_CSV, "id", pd.DataFrame({"id": list(customer_ids), "last_message_date": sent_at}))
+
+
+
+def _latest_records(logs, limit):
+    """Newest `limit` rows across several append-only logs.
+
+    Only the last `limit` rows of each log are read (storage.tail seeks from the
+    end of the file), then a k-way merge on timestamp picks the overall top-N,
+    so the cost stays flat however long the logs grow.
+    """
+    streams = []
     for path, ts_col in logs:
-        df = _load_csv(path)
-        if not df.empty and ts_col in df.columns:
-            df[ts_col] = pd.to_datetime(df[ts_col], errors='coerce')
-            recent_records.append(df)
-    if not recent_records:
-        return []
-    combined = pd.concat(recent_records, ignore_index=True)
-    
-    # Determine a single timestamp column to sort
-    for col in ['added_at', 'updated_at', 'partial_at', 'deleted_at']:
-        if col in combined.columns:
-            combined['timestamp'] = pd.to_datetime(combined[col], errors='coerce')
-            break
-    combined = combined.sort_values(by='timestamp', ascending=False)
-    return combined.head(limit).to_dict(orient='records')
+        df = storage.tail(path, limit)
+        if df.empty or ts_col not in df.columns:
+            continue
+        df[ts_col] = pd.to_datetime(df[ts_col], errors='coerce')
+        df['timestamp'] = df[ts_col]
+        records = df.to_dict(orient='records')
+        records.sort(key=_timestamp_key, reverse=True)
+        streams.append(records)
+    return list(islice(heapq.merge(*streams, key=_timestamp_key, reverse=True), limit))
+
+def _timestamp_key(record):
+    ts = record['timestamp']
+    return pd.Timestamp.min if pd.isna(ts) else ts
+
+ACTIVITY_LOGS = [
+    (ADDED_CSV, "added_at"),
+    (UPDATED_CSV, "updated_at"),
+    (PARTIAL_CSV, "partial_at"),
+    (DELETED_CSV, "deleted_at")
+]
+TRANSACTION_LOGS = [
+    (USER_PAYMENT_CSV, "payment_date"),
+    (USER_DELETED_CSV, "deleted_at")
+]
+
+def logs_stamp(logs):
+    """Changes whenever any of `logs` does, in any process (validator for cached responses)."""
+    return tuple(storage.stamp(file) for file, _ in logs)
+
+@timed_service
+def get_recent_activity(limit=5):
+    return _latest_records(ACTIVITY_LOGS, limit)
+
+@timed_service
+def query_email_log(customer_id=None, day=None, start=None, end=None, status=None, limit=100):
+    """Email delivery log rows, newest first, by customer and/or day (see delivery_log.py)."""
+    if day is not None:
+        start = end = day
+    (start, _), (end, _) = _date_bound(start, "start"), _date_bound(end, "end")
+    return delivery_log.query(customer_id=customer_id, status=status, limit=limit,
+                              start=start.strftime("%Y-%m-%d") if start is not None else None,
+                              end=end.strftime("%Y-%m-%d") if end is not None else None)
 
 # ---------------- Enhanced Authentication (Updated) ----------------
 
+@timed_service
 def login_user(username, password):
     """Customer-only login (no legacy user fallback)"""
-    customers_df = _load_csv(CUSTOMERS_CSV)
-    
-    if not customers_df.empty:
-        user = customers_df[
-            (customers_df['username'].str.strip() == username.strip()) &  # Changed
-            (customers_df['status'] == 'active')
-        ]
-        
-        if not user.empty and check_password_hash(user.iloc[0]['password'].strip(), password.strip()):  # Changed
-            customer_data = user.iloc[0]
-            _append_csv(SIGNIN_LOGS_CSV, {
+    customer_data = customer_store.get_by_username(username)
+
+    if customer_data is not None and customer_data.get('status') == 'active':
+        if check_password_hash(str(customer_data['password']).strip(), password.strip()):  # Changed
+            log_writer.write(SIGNIN_LOGS_CSV, {
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "customer_id": customer_data['id'],
                 "username": username,
                 "name": customer_data['name'],
                 "login_type": "customer"
-            })
+            }, sink=storage.append)
             return {
                 "success": True,
                 "customer_id": customer_data['id'],
@@ -266,48 +708,40 @@ def login_user(username, password):
     return {"success": False, "message": "Invalid credentials"}
     
 # ---------------- User Payments / Delete (Unchanged) ----------------
+@timed_service
+@bumps_version
 def user_pay_due(username, customer_id, amount):
-    df_cust = _load_csv(CUSTOMERS_CSV)
-    if customer_id not in df_cust['id'].values:
-        return None
-    cust = df_cust[df_cust['id']==customer_id].iloc[0].to_dict()
-    new_due = float(cust['due']) - float(amount)
-    df_cust.loc[df_cust['id']==customer_id, ['due', 'last_update']] = [new_due, datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
-    _save_csv(df_cust, CUSTOMERS_CSV)
-    update_due_record(customer_id, new_due)
-    # Log user payment
-    _append_csv(USER_PAYMENT_CSV, {"id": customer_id, "username": username, "name": cust['name'],
-                                   "amount_paid": amount, "new_due": new_due, "payment_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+    with storage.transaction():
+        cust = customer_store.get(customer_id)  # under the lock, as in record_partial_payment
+        if cust is None:
+            return None
+        new_due = float(cust['due']) - float(amount)
+        customer_store.update(customer_id, {'due': new_due, 'last_update': datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+        update_due_record(cust["id"], new_due)
+        # Log user payment
+        _append_csv(USER_PAYMENT_CSV, {"id": customer_id, "username": username, "name": cust['name'],
+                                       "amount_paid": amount, "new_due": new_due, "payment_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
     return {**cust, "due": new_due}
 
+@timed_service
+@bumps_version
 def user_delete_account(username, customer_id):
-    df_cust = _load_csv(CUSTOMERS_CSV)
-    if customer_id not in df_cust['id'].values:
+    cust = customer_store.get(customer_id)
+    if cust is None:
         return None
-    cust = df_cust[df_cust['id']==customer_id].iloc[0].to_dict()
     if float(cust['due']) > 0:
         return None  # Cannot delete if due remains
-    # Delete customer
-    df_cust = df_cust[df_cust['id'] != customer_id]
-    _save_csv(df_cust, CUSTOMERS_CSV)
-    # Remove from dues
-    df_dues = _load_csv(DUES_CSV)
-    df_dues = df_dues[df_dues['id'] != customer_id]
-    _save_csv(df_dues, DUES_CSV)
-    # Log user deletion
-    _append_csv(USER_DELETED_CSV, {"id": customer_id, "username": username, "name": cust['name'], "deleted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+    with storage.transaction():
+        # Delete customer
+        customer_store.delete(customer_id)
+        # Remove from dues
+        storage.delete_where(DUES_CSV, {"id": cust['id']})
+        # Log user deletion
+        _append_csv(USER_DELETED_CSV, {"id": customer_id, "username": username, "name": cust['name'], "deleted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+    revoke_customer(cust['id'])
     return cust
 
 # ---------------- Admin: View User Transactions (Unchanged) ----------------
+@timed_service
 def get_user_transactions(limit=10):
-    payments = _load_csv(USER_PAYMENT_CSV)
-    deletions = _load_csv(USER_DELETED_CSV)
-    combined = pd.concat([payments, deletions], ignore_index=True) if not payments.empty or not deletions.empty else pd.DataFrame()
-    if combined.empty:
-        return []
-    combined['timestamp'] = pd.to_datetime(
-        combined.get('payment_date').where(combined.get('payment_date').notna(), combined.get('deleted_at')),
-        errors='coerce'
-    )
-    combined = combined.sort_values(by='timestamp', ascending=False)
-    return combined.head(limit).to_dict(orient='records')
\ No newline at end of file
+    return _latest_records(TRANSACTION_LOGS, limit)
\ No newline at end of file
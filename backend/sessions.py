@@ -0,0 +1,133 @@
+# backend/sessions.py
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import g, jsonify, request
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+SESSION_TTL = int(os.getenv("SESSION_TTL", 3600))  # seconds
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", 10000))
+
+# Only signs the tokens: the sessions themselves live in this process's memory
+# (SessionCache), so they end on restart and are not shared between workers either way
+_secret = os.getenv("SESSION_SECRET") or secrets.token_hex(32)
+_serializer = URLSafeTimedSerializer(_secret, salt="customer-session")
+
+
+def check_session_config():
+    """Startup note for the API process about how customer sessions are kept."""
+    if not os.getenv("SESSION_SECRET"):
+        print("[INFO] SESSION_SECRET not set; signing session tokens with a random key")
+    print("[INFO] Customer sessions are held in memory: they end on restart and are not "
+          "shared between workers, so run the API as a single process")
+
+
+class SessionCache:
+    """Server-side sessions with TTL eviction and a size bound.
+
+    The signed token only carries a random session id; the session itself
+    lives here, so it can be revoked (logout, password reset, account delete)
+    before the signature expires.
+    """
+
+    def __init__(self, ttl=SESSION_TTL, max_entries=SESSION_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._sessions = OrderedDict()  # sid -> session, oldest expiry first
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._sessions:
+            sid, session = next(iter(self._sessions.items()))
+            if session['expires'] > now and len(self._sessions) <= self.max_entries:
+                break
+            del self._sessions[sid]
+
+    def put(self, session):
+        sid = secrets.token_urlsafe(16)
+        with self._lock:
+            now = time.time()
+            self._sessions[sid] = {**session, 'expires': now + self.ttl}
+            self._evict(now)
+        return sid
+
+    def get(self, sid):
+        with self._lock:
+            session = self._sessions.get(sid)
+            if session is None:
+                return None
+            if session['expires'] <= time.time():
+                del self._sessions[sid]
+                return None
+            return dict(session)
+
+    def drop(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def drop_customer(self, customer_id=None):
+        """Drop every session of one customer, or all sessions when customer_id is None."""
+        with self._lock:
+            if customer_id is None:
+                self._sessions.clear()
+                return
+            for sid in [s for s, v in self._sessions.items() if v['customer_id'] == customer_id]:
+                del self._sessions[sid]
+
+
+session_cache = SessionCache()
+
+
+# ---------------- Tokens ----------------
+def issue_token(customer_id, username):
+    """Create a session and return (token, expires_in seconds)."""
+    customer_id = int(customer_id)
+    sid = session_cache.put({'customer_id': customer_id, 'username': username})
+    return _serializer.dumps({'sid': sid, 'cid': customer_id}), session_cache.ttl
+
+
+def verify_token(token):
+    """Return the session for a valid, unexpired, unrevoked token, else None."""
+    try:
+        data = _serializer.loads(token, max_age=session_cache.ttl)
+    except (BadSignature, SignatureExpired):
+        return None
+    session = session_cache.get(data.get('sid'))
+    if session is None or session['customer_id'] != data.get('cid'):
+        return None
+    return {**session, 'sid': data['sid']}
+
+
+def revoke_token(token):
+    session = verify_token(token)
+    if session is not None:
+        session_cache.drop(session['sid'])
+
+
+def revoke_customer(customer_id=None):
+    session_cache.drop_customer(None if customer_id is None else int(customer_id))
+
+
+def request_token():
+    """Token from `Authorization: Bearer ...`, falling back to a JSON `token` field."""
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        return header[len("Bearer "):].strip()
+    data = request.get_json(silent=True) or {}
+    return data.get("token")
+
+
+def session_required(view):
+    """Route decorator: 401 without a valid session; the session is put in g.session."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request_token()
+        session = verify_token(token) if token else None
+        if session is None:
+            return jsonify({"error": "Invalid or expired session"}), 401
+        g.session = session
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,21 @@
+# backend/storage/__init__.py
+import os
+from dotenv import load_dotenv
+from backend.storage.base import StorageEngine
+from backend.storage.csv_engine import CsvEngine
+from backend.storage.sqlite_engine import SqliteEngine
+
+load_dotenv()
+
+
+def create_engine(data_path):
+    """Build the engine selected by STORAGE_ENGINE ('csv' by default, or 'sqlite')."""
+    name = os.getenv("STORAGE_ENGINE", "csv").strip().lower()
+    if name == "csv":
+        return CsvEngine(archive_dir=os.path.join(data_path, "archive"))
+    if name == "sqlite":
+        return SqliteEngine(os.getenv("SQLITE_PATH") or os.path.join(data_path, "due_tracker.db"))
+    raise ValueError(f"Unknown STORAGE_ENGINE '{name}' (expected 'csv' or 'sqlite')")
+
+
+__all__ = ["StorageEngine", "CsvEngine", "SqliteEngine", "create_engine"]
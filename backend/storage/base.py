@@ -0,0 +1,71 @@
+# backend/storage/base.py
+import os
+from contextlib import contextmanager
+
+
+class StorageEngine:
+    """Persistence interface used by backend/services.py.
+
+    Tables are identified by the CSV path constants the services layer already
+    uses (CUSTOMERS_CSV, DUES_CSV, ...), so switching engines does not change
+    any call site. Rows are plain dicts; whole tables are pandas DataFrames.
+    """
+
+    name = None
+
+    def load(self, file, cols=None):
+        """Return the whole table as a DataFrame (empty with `cols` if missing)."""
+        raise NotImplementedError
+
+    def stamp(self, file):
+        """A value that changes whenever the table changes, from any process (for cache validators)."""
+        try:
+            st = os.stat(file)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def tail(self, file, count, cols=None):
+        """Return the last `count` rows of an append-only table, oldest first."""
+        return self.load(file, cols).tail(count)
+
+    def iter_chunks(self, file, chunksize, cols=None, since=None, until=None):
+        """Yield the table as DataFrames of at most `chunksize` rows, in table order.
+
+        since/until are a hint that only rows in that time range are wanted;
+        engines may skip data outside it, callers still filter the rows."""
+        df = self.load(file, cols)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    def save(self, df, file):
+        """Replace the whole table with `df`."""
+        raise NotImplementedError
+
+    def append(self, file, rows):
+        """Append a list of row dicts."""
+        raise NotImplementedError
+
+    def update_where(self, file, match, fields):
+        """Set `fields` on rows whose columns equal `match`; returns the row count."""
+        raise NotImplementedError
+
+    def update_rows(self, file, key, changes):
+        """Vectorised update: `changes` is a DataFrame with a `key` column plus
+        the columns to set. Keys missing from the table are ignored; when a key
+        repeats, the last row wins. Returns the number of table rows updated."""
+        raise NotImplementedError
+
+    def delete_where(self, file, match):
+        """Delete rows whose columns equal `match`; returns the row count."""
+        raise NotImplementedError
+
+    def customer_store(self, file):
+        """Return the resident, indexed customer store backed by this engine."""
+        raise NotImplementedError
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes; engines without transactions just serialise them."""
+        with self.lock:
+            yield
@@ -0,0 +1,66 @@
+# backend/storage/migrate.py
+"""One-shot import of the CSV data files into the SQLite engine.
+
+    python -m backend.storage.migrate [--db PATH] [--force]
+"""
+import os
+import sys
+import argparse
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from backend.storage.csv_engine import CsvEngine
+from backend.storage.sqlite_engine import SqliteEngine, table_name
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+# Files owned by backend/services.py; logs.csv / email_logs.csv stay as CSV
+TABLE_FILES = [
+    "customers.csv", "added_customers.csv", "updated_customers.csv",
+    "partial_customers.csv", "deleted_customers.csv", "dues.csv",
+    "user_payment_updated.csv", "user_account_deleted.csv", "signin_logs.csv",
+]
+
+
+def _read_csv(path):
+    try:
+        return pd.read_csv(path)
+    except pd.errors.ParserError:
+        # Older rows in some history files carry extra columns; keep what parses
+        return pd.read_csv(path, engine="python", on_bad_lines="skip")
+
+
+def migrate_csv_to_sqlite(data_path=DATA_PATH, db_path=None, force=False):
+    """Copy every services table from CSV into SQLite; returns {table: rows}."""
+    db_path = db_path or os.path.join(data_path, "due_tracker.db")
+    target = SqliteEngine(db_path)
+    source = CsvEngine()
+    counts = {}
+    with target.transaction():
+        for name in TABLE_FILES:
+            path = os.path.join(data_path, name)
+            if not os.path.exists(path):
+                continue
+            if target.load(path).shape[0] and not force:
+                raise RuntimeError(f"Table '{table_name(path)}' already has rows in {db_path}; use --force to overwrite")
+            if name == "customers.csv":
+                # includes any mutations still sitting in customers.journal
+                df = source.customer_store(path).frame()
+            else:
+                df = _read_csv(path)
+            target.save(df, path)
+            counts[table_name(path)] = len(df)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import backend/data CSV files into SQLite")
+    parser.add_argument("--data", default=DATA_PATH, help="folder holding the CSV files")
+    parser.add_argument("--db", default=None, help="SQLite file (default: <data>/due_tracker.db)")
+    parser.add_argument("--force", action="store_true", help="overwrite tables that already have rows")
+    args = parser.parse_args()
+    for table, rows in migrate_csv_to_sqlite(args.data, args.db, args.force).items():
+        print(f"[INFO] {table}: {rows} rows")
@@ -0,0 +1,321 @@
+# backend/storage/sqlite_engine.py
+import os
+import math
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from backend.storage.base import StorageEngine
+from backend.store import CustomerStore
+
+# Column affinities; anything not listed is stored as TEXT
+COLUMN_TYPES = {
+    "id": "INTEGER", "customer_id": "INTEGER",
+    "due": "REAL", "due_amount": "REAL", "updated_due": "REAL",
+    "partial_due": "REAL", "amount_paid": "REAL", "new_due": "REAL",
+}
+
+# Secondary indexes per table: lookups by id/username/status and the timestamp
+# columns the activity and transaction views sort on
+INDEXES = {
+    "customers": ["username", "status"],
+    "dues": ["id", "last_message_date"],
+    "added_customers": ["id", "added_at"],
+    "updated_customers": ["id", "updated_at"],
+    "partial_customers": ["id", "partial_at"],
+    "deleted_customers": ["id", "deleted_at"],
+    "user_payment_updated": ["id", "payment_date"],
+    "user_account_deleted": ["id", "deleted_at"],
+    "signin_logs": ["customer_id", "timestamp"],
+}
+
+KEYED_TABLES = {"customers"}  # tables whose `id` is the primary key
+
+
+def table_name(file):
+    """customers.csv -> customers"""
+    return os.path.splitext(os.path.basename(file))[0]
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_value(value):
+    if value is None or isinstance(value, (int, str)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if hasattr(value, 'item'):  # numpy scalars
+        return _sql_value(value.item())
+    if pd.isna(value):
+        return None
+    return str(value)
+
+
+class SqliteEngine(StorageEngine):
+    """One SQLite database (WAL mode) holding every table.
+
+    Each thread gets its own connection so readers run concurrently with a
+    writer; transaction() wraps several writes in BEGIN IMMEDIATE ... COMMIT.
+    A `_versions` row per table is bumped on every write so resident caches can
+    tell when another process changed the data.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self._local = threading.local()
+        self._columns = {}   # table -> list of columns known to exist
+        self._stores = []
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS _versions (tbl TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    # ---------------- Transactions ----------------
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            conn = self._conn()
+            outermost = self._local.depth == 0
+            if outermost:
+                conn.execute("BEGIN IMMEDIATE")
+            self._local.depth += 1
+            try:
+                yield conn
+            except BaseException:
+                self._local.depth -= 1
+                if outermost:
+                    conn.execute("ROLLBACK")
+                    for store in self._stores:
+                        store.invalidate()
+                raise
+            else:
+                self._local.depth -= 1
+                if outermost:
+                    conn.execute("COMMIT")
+
+    # ---------------- Schema ----------------
+    def _table_columns(self, table):
+        if table not in self._columns:
+            rows = self._conn().execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+            if not rows:
+                return None
+            self._columns[table] = [r[1] for r in rows]
+        return self._columns[table]
+
+    def _ensure_table(self, table, columns):
+        """Create the table / add missing columns so `columns` can be written."""
+        conn = self._conn()
+        if self._table_columns(table) is None:
+            if not columns:
+                return  # SQLite has no zero-column tables; created on the first real write
+            defs = []
+            for col in columns:
+                col_type = COLUMN_TYPES.get(col, "TEXT")
+                if col == "id" and table in KEYED_TABLES:
+                    col_type = "INTEGER PRIMARY KEY"
+                defs.append(f"{_quote(col)} {col_type}")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({', '.join(defs)})")
+            for col in INDEXES.get(table, []):
+                if col in columns:
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(f'idx_{table}_{col}')} "
+                                 f"ON {_quote(table)} ({_quote(col)})")
+            self._columns.pop(table, None)
+        existing = self._table_columns(table)
+        if any(col not in existing for col in columns):
+            # another process may have added it since we cached the schema
+            self._columns.pop(table, None)
+            existing = self._table_columns(table)
+        for col in columns:
+            if col not in existing:
+                conn.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(col)} "
+                             f"{COLUMN_TYPES.get(col, 'TEXT')}")
+                existing.append(col)
+                if col in INDEXES.get(table, []):
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(f'idx_{table}_{col}')} "
+                                 f"ON {_quote(table)} ({_quote(col)})")
+
+    def _bump(self, table):
+        conn = self._conn()
+        conn.execute("INSERT INTO _versions (tbl, version) VALUES (?, 1) "
+                     "ON CONFLICT(tbl) DO UPDATE SET version = version + 1", (table,))
+        return self.version(table)
+
+    def version(self, table):
+        row = self._conn().execute("SELECT version FROM _versions WHERE tbl = ?", (table,)).fetchone()
+        return row[0] if row else 0
+
+    def stamp(self, file):
+        return self.version(table_name(file))
+
+    def _insert(self, table, rows):
+        columns = []
+        for row in rows:
+            for col in row:
+                if col not in columns:
+                    columns.append(col)
+        self._ensure_table(table, columns)
+        sql = (f"INSERT INTO {_quote(table)} ({', '.join(_quote(c) for c in columns)}) "
+               f"VALUES ({', '.join('?' for _ in columns)})")
+        self._conn().executemany(sql, [[_sql_value(row.get(c)) for c in columns] for row in rows])
+
+    # ---------------- StorageEngine ----------------
+    def load(self, file, cols=None):
+        table = table_name(file)
+        if self._table_columns(table) is None:
+            return pd.DataFrame(columns=cols or [])
+        return pd.read_sql_query(f"SELECT * FROM {_quote(table)} ORDER BY rowid", self._conn())
+
+    def tail(self, file, count, cols=None):
+        table = table_name(file)
+        if self._table_columns(table) is None:
+            return pd.DataFrame(columns=cols or [])
+        df = pd.read_sql_query(
+            f"SELECT * FROM (SELECT rowid AS _rowid, * FROM {_quote(table)} ORDER BY rowid DESC LIMIT ?) "
+            f"ORDER BY _rowid", self._conn(), params=(int(count),))
+        return df.drop(columns=['_rowid'])
+
+    def iter_chunks(self, file, chunksize, cols=None, since=None, until=None):
+        table = table_name(file)
+        if self._table_columns(table) is None:
+            return
+        yield from pd.read_sql_query(f"SELECT * FROM {_quote(table)} ORDER BY rowid",
+                                     self._conn(), chunksize=chunksize)
+
+    def save(self, df, file):
+        table = table_name(file)
+        with self.transaction():
+            if self._table_columns(table) is not None:
+                self._conn().execute(f"DELETE FROM {_quote(table)}")
+            self._ensure_table(table, list(df.columns))
+            rows = df.to_dict(orient='records')
+            if rows:
+                self._insert(table, rows)
+            self._bump(table)
+
+    def append(self, file, rows):
+        if not rows:
+            return
+        table = table_name(file)
+        with self.transaction():
+            self._insert(table, rows)
+            self._bump(table)
+
+    def _where(self, match):
+        clause = ' AND '.join(f"{_quote(col)} = ?" for col in match)
+        return clause, [_sql_value(v) for v in match.values()]
+
+    def update_where(self, file, match, fields):
+        table = table_name(file)
+        existing = self._table_columns(table)
+        if existing is None or any(col not in existing for col in match):
+            return 0
+        with self.transaction():
+            self._ensure_table(table, list(fields))
+            clause, params = self._where(match)
+            assignments = ', '.join(f"{_quote(col)} = ?" for col in fields)
+            cur = self._conn().execute(
+                f"UPDATE {_quote(table)} SET {assignments} WHERE {clause}",
+                [_sql_value(v) for v in fields.values()] + params)
+            if cur.rowcount:
+                self._bump(table)
+            return cur.rowcount
+
+    def update_rows(self, file, key, changes):
+        table = table_name(file)
+        existing = self._table_columns(table)
+        if existing is None or key not in existing or changes.empty:
+            return 0
+        changes = changes.drop_duplicates(key, keep='last')
+        columns = [c for c in changes.columns if c != key]
+        with self.transaction():
+            self._ensure_table(table, columns)
+            assignments = ', '.join(f"{_quote(col)} = ?" for col in columns)
+            params = [[_sql_value(row[c]) for c in columns] + [_sql_value(row[key])]
+                      for row in changes.to_dict(orient='records')]
+            cur = self._conn().executemany(
+                f"UPDATE {_quote(table)} SET {assignments} WHERE {_quote(key)} = ?", params)
+            if cur.rowcount:
+                self._bump(table)
+            return cur.rowcount
+
+    def delete_where(self, file, match):
+        table = table_name(file)
+        existing = self._table_columns(table)
+        if existing is None or any(col not in existing for col in match):
+            return 0
+        with self.transaction():
+            clause, params = self._where(match)
+            cur = self._conn().execute(f"DELETE FROM {_quote(table)} WHERE {clause}", params)
+            if cur.rowcount:
+                self._bump(table)
+            return cur.rowcount
+
+    def customer_store(self, file):
+        store = SqliteCustomerStore(self, file)
+        self._stores.append(store)
+        return store
+
+
+class SqliteCustomerStore(CustomerStore):
+    """CustomerStore whose rows live in a SQLite table instead of CSV + journal.
+
+    Mutations become single-row INSERT/UPDATE/DELETE statements, and the
+    table's version counter replaces the file mtime check.
+    """
+
+    def __init__(self, engine, file):
+        super().__init__(file, lock=engine.lock)
+        self.engine = engine
+        self.table = table_name(file)
+        self._version = None
+
+    def _ensure_fresh(self):
+        version = self.engine.version(self.table)
+        if self._loaded and version == self._version:
+            return
+        self._reset(self.engine.load(self.path))
+        self._version = version
+        self._loaded = True
+
+    def _persist(self, records):
+        table = self.table
+        with self.engine.transaction() as conn:
+            inserts = [rec['row'] for rec in records if rec['op'] == 'insert']
+            if len(inserts) == len(records):
+                self.engine.append(self.path, inserts)  # one executemany for a batch
+                records = []
+            for rec in records:
+                op = rec['op']
+                if op == 'insert':
+                    self.engine.append(self.path, [rec['row']])
+                elif op == 'update':
+                    self.engine.update_where(self.path, {'id': rec['id']}, rec['set'])
+                elif op == 'delete':
+                    self.engine.delete_where(self.path, {'id': rec['id']})
+                elif op == 'clear' and self.engine._table_columns(table) is not None:
+                    conn.execute(f"DELETE FROM {_quote(table)}")
+                    self.engine._bump(table)
+            self._version = self.engine.version(table)
+
+    def _write_snapshot(self):
+        self._frame = pd.DataFrame(list(self._rows.values()), columns=self._columns)
+        with self.engine.transaction():
+            self.engine.save(self._frame, self.path)
+            self._version = self.engine.version(self.table)
+        self._loaded = True
+
+    def compact(self):
+        return False  # nothing to fold: every mutation already landed in the table
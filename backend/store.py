@@ -0,0 +1,432 @@
+# backend/store.py
+import os
+import bisect
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+from backend.journal import Journal
+
+FRAME_BASES = 4  # recent frame() copies that replace() can still work out edits against
+
+
+def _key(customer_id):
+    """Normalise an id coming from JSON/forms/pandas to the int used as index key."""
+    try:
+        return int(customer_id)
+    except (TypeError, ValueError):
+        pass
+    try:
+        value = float(customer_id)  # "5.0", as a float column is written to CSV
+    except (TypeError, ValueError):
+        return None
+    return int(value) if value.is_integer() else None
+
+
+def _same(a, b):
+    if a is None or a == '' or (isinstance(a, float) and a != a):
+        return b is None or b == '' or (isinstance(b, float) and b != b)
+    return a == b or str(a) == str(b)
+
+
+def _diff(old_df, new_df):
+    """Journal records turning the rows of `old_df` into those of `new_df`."""
+    old = {_key(row.get('id')): row for row in old_df.to_dict(orient='records')}
+    new = {_key(row.get('id')): row for row in new_df.to_dict(orient='records')}
+    for key, row in new.items():
+        if key is None:
+            continue
+        prev = old.get(key)
+        if prev is None:
+            yield {'op': 'insert', 'row': row}
+            continue
+        changed = {col: value for col, value in row.items() if not _same(prev.get(col), value)}
+        if changed:
+            yield {'op': 'update', 'id': key, 'set': changed}
+    for key in old.keys() - new.keys():
+        if key is not None:
+            yield {'op': 'delete', 'id': key}
+
+
+def _username_key(username):
+    return str(username).strip() if isinstance(username, str) else None
+
+
+class SortedIndex:
+    """Store listener keeping (key(row), id) entries sorted for ordered scans."""
+
+    def __init__(self, key):
+        self.key = key
+        self.entries = []
+
+    def reset(self, rows):
+        self.entries = sorted((self.key(row), _key(row['id'])) for row in rows)
+
+    def change(self, old, new):
+        if old is not None:
+            entry = (self.key(old), _key(old['id']))
+            i = bisect.bisect_left(self.entries, entry)
+            if i < len(self.entries) and self.entries[i] == entry:
+                del self.entries[i]
+        if new is not None:
+            bisect.insort(self.entries, (self.key(new), _key(new['id'])))
+
+
+class CustomerStore:
+    """Process-resident copy of customers.csv.
+
+    Rows are kept as dicts keyed by customer id, with a second hash index on
+    the (stripped) username, so lookups are O(1) instead of a boolean-mask scan
+    over a freshly parsed DataFrame.
+
+    customers.csv is treated as a snapshot: single-row mutations are appended
+    to a journal next to it (customers.journal) instead of rewriting the file,
+    and compact() folds the journal back into a fresh snapshot. The snapshot is
+    only re-read when its mtime or size changes (e.g. the Streamlit app rewrote
+    it); journal records appended by another process are replayed incrementally.
+    Snapshot writes (compact/replace) hold the journal's cross-process lock
+    from the final replay to the truncate, so no process's records are dropped,
+    and replace() only applies what the caller changed in its frame() copy:
+    each copy carries a token for the rows it was taken from (df.attrs).
+    """
+
+    def __init__(self, path, journal_path=None, lock=None):
+        self.path = path
+        self.journal = Journal(journal_path or os.path.splitext(path)[0] + '.journal')
+        self._lock = lock or threading.RLock()
+        self._columns = []
+        self._rows = {}          # id -> row dict, in file order
+        self._by_username = {}   # stripped username -> id
+        self._frame = None       # cached DataFrame, rebuilt lazily after writes
+        self._stamp = None       # (mtime_ns, size) of the snapshot as we last saw it
+        self._offset = 0         # journal bytes already applied
+        self._pending = 0        # journal records not yet compacted
+        self._loaded = False
+        self._compactor = None
+        self._listeners = []     # objects with reset(rows) / change(old, new) [/ replayed()]
+        self._generation = 0     # bumped on every change to the rows
+        self._bases = OrderedDict()  # (store, generation) token -> frame handed out then
+
+    # ---------------- Loading ----------------
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _ensure_fresh(self):
+        stamp = self._file_stamp()
+        journal_size = self.journal.size()
+        if self._loaded and stamp == self._stamp and journal_size >= self._offset:
+            if journal_size > self._offset:
+                self._replay(self._offset)
+            return
+        df = pd.read_csv(self.path) if stamp is not None else pd.DataFrame()
+        self._reset(df)
+        self._stamp = stamp
+        self._pending = 0
+        self._replay(0)
+        self._loaded = True
+
+    def _replay(self, offset):
+        records, self._offset = self.journal.read(offset)
+        for rec in records:
+            self._apply(rec)
+        self._pending += len(records)
+        if records:
+            self._frame = None
+            for listener in self._listeners:
+                replayed = getattr(listener, 'replayed', None)  # optional: once per replayed batch
+                if replayed is not None:
+                    replayed()
+
+    def _reset(self, df):
+        self._generation += 1
+        self._columns = list(df.columns)
+        self._rows = {}
+        self._by_username = {}
+        self._frame = None
+        if df.empty or 'id' not in df.columns:
+            self._notify_reset()
+            return
+        for row in df.to_dict(orient='records'):
+            key = _key(row.get('id'))
+            if key is None:
+                continue
+            self._rows[key] = row
+            self._index_username(key, row)
+        self._notify_reset()
+
+    def _notify_reset(self):
+        for listener in self._listeners:
+            listener.reset(self._rows.values())
+
+    def _index_username(self, key, row):
+        name = _username_key(row.get('username'))
+        if name:
+            self._by_username[name] = key
+
+    def _unindex_username(self, key, row):
+        name = _username_key(row.get('username'))
+        if name and self._by_username.get(name) == key:
+            del self._by_username[name]
+
+    # ---------------- Journal records ----------------
+    def _apply(self, rec):
+        """Apply one journal record to the in-memory rows; returns the touched row."""
+        self._generation += 1
+        op = rec['op']
+        if op == 'insert':
+            row = dict(rec['row'])
+            key = _key(row['id'])
+            for col in row:
+                if col not in self._columns:
+                    self._columns.append(col)
+            old = self._rows.get(key)
+            self._rows[key] = row
+            self._index_username(key, row)
+            for listener in self._listeners:
+                listener.change(old, row)
+            return row
+        if op == 'update':
+            key = _key(rec['id'])
+            row = self._rows.get(key)
+            if row is None:
+                return None
+            old = dict(row) if self._listeners else None
+            self._unindex_username(key, row)
+            row.update(rec['set'])
+            self._index_username(key, row)
+            for listener in self._listeners:
+                listener.change(old, row)
+            return row
+        if op == 'delete':
+            key = _key(rec['id'])
+            row = self._rows.pop(key, None)
+            if row is not None:
+                self._unindex_username(key, row)
+                for listener in self._listeners:
+                    listener.change(row, None)
+            return row
+        if op == 'clear':
+            self._rows = {}
+            self._by_username = {}
+            self._notify_reset()
+        return None
+
+    def _log(self, rec):
+        """Apply a mutation in memory and persist it."""
+        row = self._apply(rec)
+        if row is None and rec['op'] in ('update', 'delete'):
+            return None  # unknown id: nothing to record
+        self._persist([rec])
+        self._frame = None
+        return row
+
+    def _persist(self, records):
+        self._offset = self.journal.append(records)
+        self._pending += len(records)
+
+    def invalidate(self):
+        """Drop the in-memory copy; the next access reloads from storage."""
+        with self._lock:
+            self._loaded = False
+
+    def add_listener(self, listener):
+        """Keep `listener` (reset(rows) / change(old, new)) in step with the rows."""
+        with self._lock:
+            self._listeners.append(listener)
+            if self._loaded:
+                listener.reset(self._rows.values())
+
+    # ---------------- Reads ----------------
+    def refresh(self):
+        """Pick up changes made by other processes (cheap when nothing changed)."""
+        with self._lock:
+            self._ensure_fresh()
+
+    def frame(self):
+        """Return the customers as a DataFrame (a copy, safe to mutate, and to pass to replace())."""
+        with self._lock:
+            self._ensure_fresh()
+            if self._frame is None:
+                self._frame = pd.DataFrame(list(self._rows.values()), columns=self._columns)
+            token = (id(self), self._generation)
+            self._bases[token] = self._frame  # rebuilt, not mutated, on change
+            self._bases.move_to_end(token)
+            while len(self._bases) > FRAME_BASES:
+                self._bases.popitem(last=False)
+            copy = self._frame.copy()
+            copy.attrs['customer_store'] = token
+            return copy
+
+    def records(self, active_only=False):
+        with self._lock:
+            self._ensure_fresh()
+            return [dict(row) for row in self._rows.values()
+                    if not active_only or row.get('status') == 'active']
+
+    def page(self, index, predicate=None, offset=0, limit=None, after=None, reverse=False):
+        """Walk `index` (a SortedIndex listener) and return one page of rows.
+
+        Starts after the `after` entry (cursor) or skips `offset` matches, and
+        stops as soon as `limit` rows matched, so only the rows actually
+        visited are touched. Returns (rows, last_entry, has_more).
+        """
+        with self._lock:
+            self._ensure_fresh()
+            entries = index.entries
+            if reverse:
+                start = bisect.bisect_left(entries, tuple(after)) - 1 if after else len(entries) - 1
+                positions = range(start, -1, -1)
+            else:
+                start = bisect.bisect_right(entries, tuple(after)) if after else 0
+                positions = range(start, len(entries))
+            rows, last, skipped = [], None, 0
+            for pos in positions:
+                row = self._rows.get(entries[pos][1])
+                if row is None or (predicate is not None and not predicate(row)):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if limit is not None and len(rows) >= limit:
+                    return rows, last, True
+                rows.append(dict(row))
+                last = entries[pos]
+            return rows, last, False
+
+    def get(self, customer_id):
+        with self._lock:
+            self._ensure_fresh()
+            row = self._rows.get(_key(customer_id))
+            return dict(row) if row is not None else None
+
+    def get_by_username(self, username):
+        with self._lock:
+            self._ensure_fresh()
+            key = self._by_username.get(_username_key(username))
+            return dict(self._rows[key]) if key is not None else None
+
+    def next_id(self):
+        with self._lock:
+            self._ensure_fresh()
+            return max(self._rows) + 1 if self._rows else 1
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_fresh()
+            return len(self._rows)
+
+    # ---------------- Writes ----------------
+    def insert(self, row):
+        with self._lock:
+            self._ensure_fresh()
+            self._log({'op': 'insert', 'row': dict(row)})
+
+    def insert_many(self, rows):
+        """Insert a batch of rows with a single journal write."""
+        if not rows:
+            return
+        with self._lock:
+            self._ensure_fresh()
+            records = [{'op': 'insert', 'row': dict(row)} for row in rows]
+            for rec in records:
+                self._apply(rec)
+            self._persist(records)
+            self._frame = None
+
+    def update(self, customer_id, fields):
+        """Apply `fields` to one customer; returns the updated row or None."""
+        with self._lock:
+            self._ensure_fresh()
+            row = self._log({'op': 'update', 'id': _key(customer_id), 'set': dict(fields)})
+            return dict(row) if row is not None else None
+
+    def update_many(self, updates):
+        """Apply {customer_id: fields} with a single journal write; returns the updated rows."""
+        with self._lock:
+            self._ensure_fresh()
+            records, rows = [], []
+            for customer_id, fields in updates.items():
+                rec = {'op': 'update', 'id': _key(customer_id), 'set': dict(fields)}
+                row = self._apply(rec)
+                if row is not None:
+                    records.append(rec)
+                    rows.append(dict(row))
+            if records:
+                self._persist(records)
+                self._frame = None
+            return rows
+
+    def delete(self, customer_id):
+        """Remove one customer; returns the removed row or None."""
+        with self._lock:
+            self._ensure_fresh()
+            return self._log({'op': 'delete', 'id': _key(customer_id)})
+
+    def clear(self):
+        with self._lock:
+            self._ensure_fresh()
+            self._log({'op': 'clear'})
+
+    def replace(self, df):
+        """Write back a frame() copy the caller edited.
+
+        The edits are worked out against the frame that copy was taken from
+        and applied to the current rows, so changes made in the meantime (by
+        other callers or processes) survive unless the caller changed the same
+        fields. Raises ValueError for a frame that did not come from frame()
+        or is older than the last FRAME_BASES copies handed out.
+        """
+        with self._lock, self.journal.locked():
+            base = self._bases.get(df.attrs.get('customer_store'))
+            if base is None:
+                raise ValueError("replace() needs a recent frame() copy of this store; re-read it and retry")
+            self._ensure_fresh()
+            for col in df.columns:
+                if col not in self._columns:
+                    self._columns.append(col)
+            for rec in _diff(base, df):
+                self._apply(rec)
+            self._write_snapshot()
+
+    # ---------------- Compaction ----------------
+    def compact(self):
+        """Fold the journal into a fresh customers.csv snapshot and truncate it."""
+        with self._lock, self.journal.locked():
+            self._ensure_fresh()  # appends wait on the lock, so this is everything
+            if self._pending == 0:
+                return False
+            self._write_snapshot()
+            return True
+
+    def _write_snapshot(self):
+        self._frame = pd.DataFrame(list(self._rows.values()), columns=self._columns)
+        tmp_path = self.path + '.tmp'
+        self._frame.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        self.journal.truncate()
+        self._stamp = self._file_stamp()
+        self._offset = 0
+        self._pending = 0
+        self._loaded = True
+
+    def start_compactor(self, interval=30, min_records=1000):
+        """Compact in a daemon thread once `min_records` journal entries pile up."""
+        if self._compactor is not None:
+            return self._compactor
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    if self._pending >= min_records:
+                        self.compact()
+                except Exception as e:
+                    print(f"[WARN] Customer journal compaction failed: {e}")
+
+        self._compactor = threading.Thread(target=run, daemon=True)
+        self._compactor.start()
+        return self._compactor
@@ -0,0 +1,47 @@
+# backend/tail.py
+import io
+import os
+import pandas as pd
+
+BLOCK_SIZE = 64 * 1024
+
+
+def tail_lines(path, count, block_size=BLOCK_SIZE):
+    """Return (header, last `count` data lines) of a CSV file without reading all of it.
+
+    Blocks are read backwards from the end of the file until enough newlines
+    have been seen, so the cost depends on `count`, not on the file size. The
+    history CSVs are written one record per line, which this relies on.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        pos, chunks, newlines = end, [], 0
+        while pos > data_start and newlines <= count:
+            step = min(block_size, pos - data_start)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b'\n')
+    data = b''.join(reversed(chunks))
+    if pos > data_start:
+        data = data[data.find(b'\n') + 1:]  # first line may be cut in half
+    lines = [line for line in data.splitlines(keepends=True) if line.strip()]
+    if not header.endswith(b'\n'):
+        header += b'\n'
+    return header, lines[-count:] if count > 0 else []
+
+
+def tail_csv(path, count, cols=None):
+    """Parse only the last `count` rows of a CSV file (in file order)."""
+    if not os.path.exists(path) or count <= 0:
+        return pd.DataFrame(columns=cols or [])
+    header, lines = tail_lines(path, count)
+    if not header.strip():
+        return pd.DataFrame(columns=cols or [])
+    if lines and not lines[-1].endswith(b'\n'):
+        lines[-1] += b'\n'
+    return pd.read_csv(io.BytesIO(header + b''.join(lines)))
@@ -0,0 +1,117 @@
+# backend/tracing.py
+import os
+import json
+import time
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from flask import g, request
+from backend.logwriter import log_writer
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 1000))
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.01))  # share of other requests logged
+SLOW_LOG_PATH = os.path.join(os.getenv("DATA_PATH") or os.path.join(os.path.dirname(__file__), "data"),
+                             "slow_requests.jsonl")
+
+_current = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "end", "children")
+
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+
+    @property
+    def duration_ms(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def to_dict(self, origin=None):
+        origin = self.start if origin is None else origin
+        node = {"name": self.name, "start_ms": round((self.start - origin) * 1000, 3),
+                "ms": round(self.duration_ms, 3)}
+        if self.attrs:
+            node["attrs"] = self.attrs
+        if self.children:
+            node["children"] = [child.to_dict(origin) for child in self.children]
+        return node
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a block as a child of the current span. Outside a traced request
+    this is a no-op costing one ContextVar lookup."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attrs)
+    parent.children.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current.reset(token)
+
+
+def traced(name=None):
+    """Decorator form of span(); defaults to module.function as the name."""
+    def decorator(func):
+        label = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _append_jsonl(path, rows):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(''.join(json.dumps(row, default=str) + '\n' for row in rows))
+
+
+def init_tracing(app):
+    """Open a root span per request; slow (or sampled) span trees go to SLOW_LOG_PATH."""
+
+    @app.before_request
+    def _start_trace():
+        root = Span(f"{request.method} {request.path}")
+        g.trace_root, g.trace_token = root, _current.set(root)
+
+    @app.after_request
+    def _tag_status(response):
+        root = g.get("trace_root")
+        if root is not None:
+            root.attrs["status"] = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_trace(exc):
+        root, token = g.pop("trace_root", None), g.pop("trace_token", None)
+        if root is None:
+            return
+        _current.reset(token)
+        root.end = time.perf_counter()
+        if exc is not None:
+            root.attrs["error"] = type(exc).__name__
+        slow = root.duration_ms >= SLOW_REQUEST_MS
+        if slow or random.random() < TRACE_SAMPLE_RATE:
+            log_writer.write(SLOW_LOG_PATH, {
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "reason": "slow" if slow else "sampled",
+                "trace": root.to_dict(),
+            }, sink=_append_jsonl)
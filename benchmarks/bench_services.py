@@ -0,0 +1,197 @@
+# benchmarks/bench_services.py
+"""Time every public function of backend/services.py against a generated data tree.
+
+    python -m benchmarks.generate_data --size 10k --out bench_data/10k
+    python -m benchmarks.bench_services --data bench_data/10k --out bench_results/10k.json
+    python -m benchmarks.bench_services --data bench_data/10k --baseline bench_results/10k.json
+
+The tree is copied to a scratch directory first (the write benchmarks append
+to it) and DATA_PATH points the backend there, so backend.services is only
+imported once the environment is set. Each case reports the first (cold)
+call, p50/p95/max of the warm calls and the tracemalloc peak of one extra
+call; --baseline prints the p50 change against an earlier results file.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import itertools
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.generate_data import BENCH_PASSWORD
+
+REGRESSION_PCT = 20  # --baseline flags p50 slowdowns above this
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def build_cases(services, customers, seed=42):
+    """(name, callable, repeat override) for every public service function.
+
+    Calls that delete or need a fresh row each time draw distinct ids, so no
+    run measures a no-op.
+    """
+    rng = random.Random(seed)
+    ids = [row['id'] for row in services.get_all_customers()]
+    rng.shuffle(ids)
+    pool = iter(ids)  # ids handed out once (deletes)
+    counter = itertools.count(1)
+
+    def some_id():
+        return ids[rng.randrange(len(ids))]
+
+    def new_rows(count):
+        rows = []
+        for _ in range(count):
+            n = next(counter)
+            rows.append({"name": f"Bench Bulk {n}", "phone": f"{8000000000 + n}", "email": f"bulk{n}@example.com",
+                         "address": "Bench Road", "due": 150.0})
+        return rows
+
+    def user_delete_account():
+        cid = next(pool)
+        services.customer_store.update(cid, {"due": 0.0})  # only paid-up accounts can be deleted
+        return services.user_delete_account(f"bench_{cid}", cid)
+
+    month_start = datetime.now().replace(day=1).strftime("%Y-%m-%d")
+    cases = [
+        ("get_all_customers", lambda: services.get_all_customers(), None),
+        ("get_all_customers(active_only)", lambda: services.get_all_customers(active_only=True), None),
+        ("query_customers(status, offset)", lambda: services.query_customers(status="active", limit=50, offset=customers // 2), None),
+        ("query_customers(-due)", lambda: services.query_customers(sort="-due", limit=50), None),
+        ("query_customers(overdue_days)", lambda: services.query_customers(overdue_days=30, limit=50), None),
+        ("export_chunks(partial_payments, month)",
+         lambda: sum(len(c) for c in services.export_chunks("partial_payments", start=month_start)), None),
+        ("get_dashboard_summary", lambda: services.get_dashboard_summary(), None),
+        ("get_recent_activity", lambda: services.get_recent_activity(limit=10), None),
+        ("get_user_transactions", lambda: services.get_user_transactions(limit=10), None),
+        ("login_user", lambda: services.login_user(f"bench_{some_id()}", BENCH_PASSWORD), None),
+        ("add_customer", lambda: services.add_customer(f"Bench New {next(counter)}", "9000000000", "Bench Road", 100.0,
+                                                       email="new@example.com"), None),
+        ("bulk_add_customers(100)", lambda: services.bulk_add_customers(new_rows(100)), None),
+        ("reset_credentials", lambda: services.reset_credentials(some_id(), new_password="bench5678"), None),
+        ("update_due", lambda: services.update_due(some_id(), 500.0), None),
+        ("record_partial_payment", lambda: services.record_partial_payment(some_id(), 10.0), None),
+        ("batch_update_dues(100)", lambda: services.batch_update_dues(
+            [{"id": some_id(), "amount": 5.0} for _ in range(100)]), None),
+        ("update_due_record", lambda: services.update_due_record(some_id(), 250.0), None),
+        ("user_pay_due", lambda: (lambda cid: services.user_pay_due(f"bench_{cid}", cid, 1.0))(some_id()), None),
+        ("delete_customer", lambda: services.delete_customer(next(pool)), None),
+        ("user_delete_account", user_delete_account, None),
+        ("delete_all_customers", lambda: services.delete_all_customers(), 1),  # destructive: runs last, once
+    ]
+    return cases
+
+
+def run_case(func, repeat):
+    start = time.perf_counter()
+    func()
+    first_ms = (time.perf_counter() - start) * 1000
+    timings = []
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    peak_kib = None
+    if repeat > 1:  # the one-shot case has nothing left to measure memory on
+        tracemalloc.start()
+        func()
+        peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return {
+        "runs": repeat,
+        "first_ms": round(first_ms, 3),
+        "p50_ms": round(_percentile(timings, 50), 3) if timings else round(first_ms, 3),
+        "p95_ms": round(_percentile(timings, 95), 3) if timings else round(first_ms, 3),
+        "max_ms": round(timings[-1], 3) if timings else round(first_ms, 3),
+        "peak_kib": round(peak_kib, 1) if peak_kib is not None else None,
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print(f"\n{'case':42} {'base p50':>10} {'p50':>10} {'change':>8}")
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("p50_ms"):
+            continue
+        change = (res["p50_ms"] - base["p50_ms"]) / base["p50_ms"] * 100
+        flag = " !" if change > REGRESSION_PCT else ""
+        print(f"{name:42} {base['p50_ms']:>10.3f} {res['p50_ms']:>10.3f} {change:>+7.1f}%{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend/services.py")
+    parser.add_argument("--data", required=True, help="data tree from benchmarks.generate_data")
+    parser.add_argument("--repeat", type=int, default=20, help="calls per case (first one is the cold call)")
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare p50s against")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="due_bench_")
+    data_path = os.path.join(scratch, "data")
+    shutil.copytree(args.data, data_path)
+    os.environ["DATA_PATH"] = data_path
+    os.environ.setdefault("SESSION_SECRET", "benchmark")
+    os.environ.setdefault("TRACE_SAMPLE_RATE", "0")
+    try:
+        from backend import services
+        from backend.logwriter import log_writer
+
+        start = time.perf_counter()
+        customers = len(services.customer_store)
+        load_ms = (time.perf_counter() - start) * 1000
+        results = {}
+        for name, func, repeat in build_cases(services, customers):
+            if args.only and args.only not in name:
+                continue
+            results[name] = run_case(func, repeat or args.repeat)
+            r = results[name]
+            print(f"{name:42} p50 {r['p50_ms']:>10.3f} ms  p95 {r['p95_ms']:>10.3f} ms  "
+                  f"first {r['first_ms']:>10.3f} ms  peak {r['peak_kib'] or 0:>10.1f} KiB")
+        log_writer.flush()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "data": os.path.abspath(args.data),
+            "customers": customers,
+            "store_load_ms": round(load_ms, 3),
+            "storage_engine": services.storage.name,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Results written to {args.out}")
+    if args.baseline and compare(results, args.baseline):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# benchmarks/fakes.py
+"""Local stand-ins for the SMTP server and the Razorpay API, for load tests.
+
+Both run in daemon threads on 127.0.0.1, add a fixed latency per message /
+call and fail a configurable share of them, and count what they handled.
+Point the app at them with SMTP_SERVER/SMTP_PORT/SMTP_USE_TLS=false and
+RAZORPAY_BASE_URL.
+"""
+import json
+import time
+import random
+import threading
+import socketserver
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Stats:
+    def __init__(self, *names):
+        self._lock = threading.Lock()
+        self.counts = {name: 0 for name in names}
+
+    def inc(self, name):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+# ---------------- SMTP ----------------
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough of RFC 5321 for smtplib: EHLO, AUTH PLAIN, MAIL, RCPT, DATA, QUIT."""
+
+    def _reply(self, text):
+        self.wfile.write(text.encode() + b"\r\n")
+
+    def handle(self):
+        fake = self.server.fake
+        fake.stats.inc("connections")
+        self._reply("220 fake-smtp ready")
+        in_data = False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if in_data:
+                if line.rstrip(b"\r\n") == b".":
+                    in_data = False
+                    time.sleep(fake.latency)
+                    if fake.over_rate():
+                        fake.stats.inc("throttled")
+                        self._reply("451 4.7.1 Rate limit exceeded, try again later")
+                    elif random.random() < fake.fail_rate:
+                        fake.stats.inc("failed")
+                        self._reply("451 4.3.0 Fake temporary failure")
+                    else:
+                        fake.stats.inc("delivered")
+                        self._reply("250 2.0.0 Queued")
+                continue
+            verb = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self._reply("250-fake-smtp\r\n250-AUTH PLAIN\r\n250 8BITMIME")
+            elif verb == "AUTH":
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "DATA":
+                in_data = True
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeSmtpServer:
+    def __init__(self, latency_ms=0, fail_rate=0.0, port=0, rate_per_minute=None):
+        self.latency = latency_ms / 1000
+        self.fail_rate = fail_rate
+        self.rate_per_minute = rate_per_minute  # accepted messages per rolling minute, like a provider limit
+        self._accepted = deque()
+        self._rate_lock = threading.Lock()
+        self.stats = _Stats("connections", "delivered", "failed", "throttled")
+        self._server = _ThreadingTCPServer(("127.0.0.1", port), _SmtpHandler)
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+
+    def over_rate(self):
+        """Count one message against the rate limit; True if it has to be refused."""
+        if not self.rate_per_minute:
+            return False
+        now = time.monotonic()
+        with self._rate_lock:
+            while self._accepted and self._accepted[0] <= now - 60:
+                self._accepted.popleft()
+            if len(self._accepted) >= self.rate_per_minute:
+                return True
+            self._accepted.append(now)
+            return False
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fake-smtp", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ---------------- Razorpay ----------------
+class _RazorpayHandler(BaseHTTPRequestHandler):
+    """POST /v1/orders and GET /v1/payments/<id>, shaped like the real API."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # keep the load test output readable
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _fail(self):
+        fake = self.server.fake
+        time.sleep(fake.latency)
+        if random.random() < fake.fail_rate:
+            fake.stats.inc("failed")
+            self._send(500, {"error": {"code": "SERVER_ERROR", "description": "Fake failure"}})
+            return True
+        return False
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.rstrip("/") != "/v1/orders":
+            self._send(404, {"error": {"code": "NOT_FOUND", "description": self.path}})
+            return
+        if self._fail():
+            return
+        fake = self.server.fake
+        fake.stats.inc("orders")
+        self._send(200, {
+            "id": f"order_fake{random.getrandbits(48):012x}", "entity": "order",
+            "amount": payload.get("amount"), "currency": payload.get("currency", "INR"),
+            "status": "created", "notes": payload.get("notes", {}), "created_at": int(time.time()),
+        })
+
+    def do_GET(self):
+        prefix = "/v1/payments/"
+        if not self.path.startswith(prefix):
+            self._send(404, {"error": {"code": "NOT_FOUND", "description": self.path}})
+            return
+        if self._fail():
+            return
+        self.server.fake.stats.inc("payment_checks")
+        self._send(200, {"id": self.path[len(prefix):], "entity": "payment", "status": "captured"})
+
+
+class FakeRazorpayServer:
+    def __init__(self, latency_ms=0, fail_rate=0.0, port=0):
+        self.latency = latency_ms / 1000
+        self.fail_rate = fail_rate
+        self.stats = _Stats("orders", "payment_checks", "failed")
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _RazorpayHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"  # the client adds /v1 itself
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fake-razorpay", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
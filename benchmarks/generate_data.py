@@ -0,0 +1,136 @@
+# benchmarks/generate_data.py
+"""Build a synthetic backend/data tree to benchmark against.
+
+    python -m benchmarks.generate_data --size 100k --out bench_data/100k
+
+Writes customers.csv, dues.csv and every history log services.py reads,
+with row counts scaled from the customer count. All customers share the
+password BENCH_PASSWORD (one PBKDF2 hash, so generating 1M rows is quick).
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from werkzeug.security import generate_password_hash
+
+BENCH_PASSWORD = "bench1234"
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+CATEGORIES = np.array(["Regular", "Wholesale", "VIP"])
+STAMP = "%Y-%m-%d %H:%M:%S"
+
+
+def _stamps(rng, count, start, end, ordered=True):
+    """`count` random timestamps in [start, end) as strings; sorted for append-only logs."""
+    lo, hi = pd.Timestamp(start).value // 10**9, pd.Timestamp(end).value // 10**9
+    seconds = rng.integers(lo, hi, count)
+    if ordered:
+        seconds.sort()
+    return pd.to_datetime(seconds, unit="s").strftime(STAMP)
+
+
+def _pick(rng, frame, count):
+    return frame.iloc[rng.integers(0, len(frame), count)].reset_index(drop=True)
+
+
+def generate(out, customers, seed=42, history=1.0):
+    """Write a data tree with `customers` rows; `history` scales the log sizes."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(out, exist_ok=True)
+    now = pd.Timestamp.now().floor("s")
+    start = now - pd.Timedelta(days=730)
+
+    ids = np.arange(1, customers + 1)
+    added_at = _stamps(rng, customers, start, now - pd.Timedelta(days=1))
+    due = np.round(rng.lognormal(7, 1.2, customers), 2)
+    due[rng.random(customers) < 0.3] = 0.0  # about a third paid up
+    base = pd.DataFrame({
+        "id": ids,
+        "name": [f"Customer {i}" for i in ids],
+        "phone": rng.integers(6_000_000_000, 9_999_999_999, customers),
+        "email": [f"customer{i}@example.com" for i in ids],
+        "address": [f"{i % 500} Market Road" for i in ids],
+        "due": due,
+        "last_update": added_at,
+        "status": "active",
+    })
+
+    customers_df = base.assign(
+        added_at=added_at,
+        username=[f"bench_{i}" for i in ids],
+        password=generate_password_hash(BENCH_PASSWORD),
+        category=CATEGORIES[rng.integers(0, len(CATEGORIES), customers)],
+    )
+    customers_df.to_csv(os.path.join(out, "customers.csv"), index=False)
+
+    reminded = rng.random(customers) < 0.6
+    last_message = np.where(reminded, _stamps(rng, customers, now - pd.Timedelta(days=14), now, ordered=False), "")
+    pd.DataFrame({
+        "id": ids, "name": base["name"], "phone": base["phone"], "address": base["address"],
+        "due_amount": due, "due_date": pd.to_datetime(added_at).strftime("%Y-%m-%d"),
+        "last_message_date": last_message,
+    }).to_csv(os.path.join(out, "dues.csv"), index=False)
+
+    def scaled(factor):
+        return max(1, int(customers * factor * history))
+
+    base.assign(added_at=added_at).to_csv(os.path.join(out, "added_customers.csv"), index=False)
+
+    n = scaled(2)
+    rows = _pick(rng, base, n)
+    rows["updated_due"] = np.round(rng.lognormal(7, 1.2, n), 2)
+    rows["updated_at"] = _stamps(rng, n, start, now)
+    rows.to_csv(os.path.join(out, "updated_customers.csv"), index=False)
+
+    n = scaled(1)
+    rows = _pick(rng, base, n)
+    rows["partial_due"] = np.round(rows["due"] * rng.random(n), 2)
+    rows["partial_at"] = _stamps(rng, n, start, now)
+    rows.to_csv(os.path.join(out, "partial_customers.csv"), index=False)
+
+    # deleted customers had ids past the live range
+    n = scaled(0.05)
+    rows = _pick(rng, base, n).assign(id=np.arange(customers + 1, customers + n + 1), status="deleted")
+    rows["deleted_at"] = _stamps(rng, n, start, now)
+    rows.to_csv(os.path.join(out, "deleted_customers.csv"), index=False)
+
+    n = scaled(0.5)
+    rows = _pick(rng, customers_df, n)
+    pd.DataFrame({
+        "id": rows["id"], "username": rows["username"], "name": rows["name"],
+        "amount_paid": np.round(rng.lognormal(5, 1, n), 2), "new_due": rows["due"],
+        "payment_date": _stamps(rng, n, start, now),
+    }).to_csv(os.path.join(out, "user_payment_updated.csv"), index=False)
+
+    n = scaled(0.02)
+    rows = _pick(rng, customers_df, n)
+    pd.DataFrame({
+        "id": rows["id"], "username": rows["username"], "name": rows["name"],
+        "deleted_at": _stamps(rng, n, start, now),
+    }).to_csv(os.path.join(out, "user_account_deleted.csv"), index=False)
+
+    n = scaled(1)
+    rows = _pick(rng, customers_df, n)
+    pd.DataFrame({
+        "timestamp": _stamps(rng, n, start, now), "customer_id": rows["id"],
+        "username": rows["username"], "name": rows["name"], "login_type": "customer",
+    }).to_csv(os.path.join(out, "signin_logs.csv"), index=False)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic backend/data tree")
+    parser.add_argument("--size", choices=sorted(SIZES), help="preset customer count")
+    parser.add_argument("--customers", type=int, help="explicit customer count (overrides --size)")
+    parser.add_argument("--out", required=True, help="directory to write the CSV files into")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--history", type=float, default=1.0, help="scale factor for history log sizes")
+    args = parser.parse_args()
+    customers = args.customers or SIZES.get(args.size)
+    if not customers:
+        parser.error("give --size or --customers")
+    generate(args.out, customers, seed=args.seed, history=args.history)
+    print(f"[INFO] Wrote {customers} customers to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# benchmarks/load_test.py
+"""Load-test the Flask app against fake SMTP and Razorpay servers.
+
+    python -m benchmarks.load_test --customers 10000 --rps 50 --duration 60 \\
+        --mix read=60,write=20,login=10,payment=10 --smtp-latency-ms 200 --out bench_results/load.json
+
+Starts the fakes (benchmarks/fakes.py), generates (or copies --data) a data
+tree into a scratch directory, runs the app in a subprocess pointed at both,
+then sends requests open-loop at --rps for --duration seconds and reports
+throughput, latency percentiles and error rates per workload kind.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+from benchmarks.fakes import FakeSmtpServer, FakeRazorpayServer
+from benchmarks.generate_data import BENCH_PASSWORD, generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVE = ("import sys; from backend.app import app; "
+         "app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True, debug=False, use_reloader=False)")
+_local = threading.local()
+
+
+def _session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+# ---------------- Workload ----------------
+def workload(base, customers):
+    """kind -> list of (weight, request factory); a factory returns (method, url, json)."""
+
+    def cid():
+        return random.randint(1, customers)
+
+    return {
+        "read": [
+            (4, lambda: ("GET", f"{base}/admin/customers?limit=50&offset={random.randint(0, max(0, customers - 50))}", None)),
+            (2, lambda: ("GET", f"{base}/admin/summary", None)),
+            (2, lambda: ("GET", f"{base}/admin/recent_activity", None)),
+            (1, lambda: ("GET", f"{base}/admin/user_transactions", None)),
+        ],
+        "write": [
+            (7, lambda: ("POST", f"{base}/admin/customer/update_due",
+                         {"id": cid(), "new_due": round(random.uniform(0, 5000), 2)})),
+            # queues a welcome email in the outbox; it reaches the fake SMTP server in the
+            # background, so SMTP latency shows up in the drain rate, not in this request
+            (3, lambda: ("POST", f"{base}/admin/customer/add",
+                         {"name": f"Load {random.getrandbits(40):x}", "phone": "9000000000",
+                          "address": "Load Road", "due": 100, "email": "load@example.com"})),
+        ],
+        "login": [
+            (1, lambda: ("POST", f"{base}/user/login", {"username": f"bench_{cid()}", "password": BENCH_PASSWORD})),
+        ],
+        "payment": [
+            (2, lambda: ("POST", f"{base}/customer/pay", {"upi_id": "load@upi", "amount": 10})),
+            (1, lambda: ("GET", f"{base}/payment/status/pay_fake{random.getrandbits(32):08x}", None)),
+        ],
+    }
+
+
+def drain_emails(smtp, elapsed, timeout, settle=3.0):
+    """Wait for the outbox to stop delivering (no new message for `settle` seconds).
+
+    Emails are queued by the requests and delivered in the background, so the
+    rate they reach the fake SMTP server is measured here, not per request.
+    """
+    during = smtp.stats.snapshot()["delivered"]
+    start = last_change = time.monotonic()
+    delivered = during
+    while time.monotonic() - start < timeout and time.monotonic() - last_change < settle:
+        time.sleep(0.5)
+        now = smtp.stats.snapshot()["delivered"]
+        if now != delivered:
+            delivered, last_change = now, time.monotonic()
+    busy = elapsed + max(0.0, last_change - start)
+    return {"delivered_during_run": during, "delivered": delivered, "drain_seconds": round(last_change - start, 2),
+            "drain_rate_per_s": round(delivered / busy, 3) if busy > 0 else 0.0}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def _ok(response):
+    if response.status_code >= 400:
+        return False
+    # payment routes report upstream failures in the body with a 200:
+    # {"error": ...} from /customer/pay, {"status": "Server error: ..."} from /payment/status
+    if response.headers.get("Content-Type", "").startswith("application/json"):
+        body = response.json()
+        if isinstance(body, dict):
+            if "error" in body:
+                return False
+            status = body.get("status")
+            if isinstance(status, str) and ("error" in status.lower() or status.startswith("Bad request")):
+                return False
+    return True
+
+
+def send(kind, factory, results, lock):
+    method, url, payload = factory()
+    start = time.perf_counter()
+    try:
+        response = _session().request(method, url, json=payload, timeout=30)
+        ok = _ok(response)
+        status = response.status_code
+    except requests.RequestException as e:
+        ok, status = False, type(e).__name__
+    elapsed = (time.perf_counter() - start) * 1000
+    with lock:
+        results.append((kind, elapsed, ok, status))
+
+
+def drive(base, customers, mix, rps, duration, concurrency):
+    """Open-loop: requests are started on schedule whether or not earlier ones finished."""
+    kinds = workload(base, customers)
+    names = [k for k in mix if mix[k] > 0]
+    weights = [mix[k] for k in names]
+    for name in names:
+        if name not in kinds:
+            raise SystemExit(f"Unknown workload kind '{name}' (expected {', '.join(kinds)})")
+    results, lock = [], threading.Lock()
+    interval = 1.0 / rps
+    start = time.perf_counter()
+    next_at, sent = start, 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while next_at < start + duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind = random.choices(names, weights)[0]
+            options = kinds[kind]
+            factory = random.choices([f for _, f in options], [w for w, _ in options])[0]
+            pool.submit(send, kind, factory, results, lock)
+            sent += 1
+            next_at += interval
+    return results, time.perf_counter() - start, sent
+
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(results, elapsed):
+    groups = {"all": results}
+    for row in results:
+        groups.setdefault(row[0], []).append(row)
+    report = {}
+    for kind, rows in groups.items():
+        latencies = sorted(r[1] for r in rows)
+        errors = sum(1 for r in rows if not r[2])
+        statuses = {}
+        for r in rows:
+            statuses[str(r[3])] = statuses.get(str(r[3]), 0) + 1
+        report[kind] = {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / elapsed, 2),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+            "p50_ms": round(_percentile(latencies, 50), 2) if rows else None,
+            "p95_ms": round(_percentile(latencies, 95), 2) if rows else None,
+            "p99_ms": round(_percentile(latencies, 99), 2) if rows else None,
+            "max_ms": round(latencies[-1], 2) if rows else None,
+            "statuses": statuses,
+        }
+    return report
+
+
+# ---------------- Setup ----------------
+def start_app(port, env):
+    proc = subprocess.Popen([sys.executable, "-c", SERVE, str(port)], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"App exited during startup:\n{proc.stderr.read()}")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/api/admin/summary", timeout=2)
+            return proc
+        except requests.RequestException:
+            time.sleep(0.25)
+    proc.kill()
+    raise SystemExit("App did not come up within 60s")
+
+
+def _free_port():
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the app against fake SMTP/Razorpay")
+    parser.add_argument("--data", help="existing data tree to copy (default: generate one)")
+    parser.add_argument("--customers", type=int, default=10000, help="customers to generate when --data is not given")
+    parser.add_argument("--rps", type=float, default=20, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to send for")
+    parser.add_argument("--concurrency", type=int, default=64, help="max requests in flight")
+    parser.add_argument("--mix", default="read=60,write=20,login=10,payment=10",
+                        help="relative weights of read/write/login/payment requests")
+    parser.add_argument("--smtp-latency-ms", type=float, default=50,
+                        help="delay per message at the fake SMTP server (affects the outbox drain rate)")
+    parser.add_argument("--smtp-fail-rate", type=float, default=0.0)
+    parser.add_argument("--smtp-rate-per-minute", type=int, help="make the fake SMTP server throttle above this rate")
+    parser.add_argument("--razorpay-latency-ms", type=float, default=100)
+    parser.add_argument("--razorpay-fail-rate", type=float, default=0.0)
+    parser.add_argument("--keep-login-limits", action="store_true",
+                        help="leave the login rate limiter at its configured limits (all load comes from one IP)")
+    parser.add_argument("--drain-timeout", type=float, default=30,
+                        help="seconds to keep waiting for queued emails after the run")
+    parser.add_argument("--out", help="write the report JSON here")
+    args = parser.parse_args()
+
+    smtp = FakeSmtpServer(args.smtp_latency_ms, args.smtp_fail_rate, rate_per_minute=args.smtp_rate_per_minute).start()
+    razorpay = FakeRazorpayServer(args.razorpay_latency_ms, args.razorpay_fail_rate).start()
+    scratch = tempfile.mkdtemp(prefix="due_load_")
+    data_path = os.path.join(scratch, "data")
+    if args.data:
+        shutil.copytree(args.data, data_path)
+        customers = sum(1 for _ in open(os.path.join(data_path, "customers.csv"), encoding="utf-8")) - 1
+    else:
+        generate(data_path, args.customers)
+        customers = args.customers
+
+    port = _free_port()
+    env = dict(os.environ, DATA_PATH=data_path, PYTHONPATH=ROOT,
+               SMTP_SERVER="127.0.0.1", SMTP_PORT=str(smtp.port), SMTP_USE_TLS="false",
+               EMAIL_ADDRESS="loadtest@example.com", EMAIL_PASSWORD="loadtest",
+               RAZORPAY_BASE_URL=razorpay.base_url, SESSION_SECRET="loadtest", TRACE_SAMPLE_RATE="0")
+    if not args.keep_login_limits:
+        env.update(LOGIN_LIMIT_PER_USER="1000000", LOGIN_LIMIT_PER_IP="1000000")
+    app = start_app(port, env)
+    base = f"http://127.0.0.1:{port}/api"
+    try:
+        requests.post(f"{base}/admin/save_keys", json={"key_id": "rzp_test_fake", "key_secret": "fake"}, timeout=10)
+        print(f"[INFO] Driving {args.rps} rps for {args.duration}s ({args.mix}) against {customers} customers")
+        results, elapsed, sent = drive(base, customers, parse_mix(args.mix), args.rps, args.duration, args.concurrency)
+        email = drain_emails(smtp, elapsed, args.drain_timeout)
+    finally:
+        app.terminate()
+        app.wait(timeout=10)
+        smtp.stop()
+        razorpay.stop()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        "meta": {"target_rps": args.rps, "duration_s": args.duration, "sent": sent, "elapsed_s": round(elapsed, 2),
+                 "mix": args.mix, "customers": customers,
+                 "smtp": {"latency_ms": args.smtp_latency_ms, "fail_rate": args.smtp_fail_rate,
+                          "rate_per_minute": args.smtp_rate_per_minute},
+                 "razorpay": {"latency_ms": args.razorpay_latency_ms, "fail_rate": args.razorpay_fail_rate}},
+        "results": summarize(results, elapsed),
+        "email": email,
+        "fakes": {"smtp": smtp.stats.snapshot(), "razorpay": razorpay.stats.snapshot()},
+    }
+    print(f"\n{'kind':8} {'reqs':>7} {'rps':>8} {'err%':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for kind, r in report["results"].items():
+        print(f"{kind:8} {r['requests']:>7} {r['throughput_rps']:>8.2f} {r['error_rate'] * 100:>6.2f}% "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}")
+    print(f"email: {email['delivered']} delivered ({email['delivered_during_run']} during the run), "
+          f"outbox drain {email['drain_rate_per_s']:.2f}/s")
+    print(f"fakes: {json.dumps(report['fakes'])}")
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,12 @@ from datetime import datetime
 import requests
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from backend.notifications.email_service import send_email, shop_name
+from backend.notifications.email_service import send_template
 from backend import services  # for new user/payment functionalities
+from backend.logwriter import log_writer
 
 # ---------------- Paths ----------------
-DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend', 'data'))
+DATA_PATH = services.DATA_PATH  # the same folder (and storage engine) the API uses
 CUSTOMERS_CSV = os.path.join(DATA_PATH, 'customers.csv')
 ADDED_CSV = os.path.join(DATA_PATH, 'added_customers.csv')
 UPDATED_CSV = os.path.join(DATA_PATH, 'updated_customers.csv')
@@ -37,10 +38,16 @@ if "logged_in" not in st.session_state:  # NEW
     st.session_state.logged_in = False
 
 # ---------------- Helper Functions ----------------
+# Tables go through the backend's storage engine, so with STORAGE_ENGINE=sqlite the
+# dashboard and the API see the same data
 def append_csv(file, row):
-    pd.DataFrame([row]).to_csv(file, mode='a', header=not os.path.exists(file), index=False)
+    services.storage.append(file, [row])
 
 def load_csv(file, cols=None):
+    try:
+        return services.storage.load(file, cols)
+    except Exception:
+        pass
     if not os.path.exists(file):
         return pd.DataFrame(columns=cols or [])
     try:
@@ -61,20 +68,19 @@ def logout_user():
 def load_customers():
     cols = ['id', 'name', 'phone', 'email', 'address', 'due', 
             'username', 'password', 'last_update', 'status']
-    df = load_csv(CUSTOMERS_CSV, cols)
+    # Read through the backend's customer store so journaled changes are included
+    df = services.customer_store.frame()
+    if df.empty:
+        df = pd.DataFrame(columns=cols)
     for c in ['id', 'due']:
         if c in df: df[c] = pd.to_numeric(df[c], errors='coerce')
     for col in ['phone', 'email', 'name', 'address', 'status', 'last_update', 'username', 'password']:
         if col in df: df[col] = df[col].fillna('').astype(str)
     return df
 
-def save_customers(df):
-    os.makedirs(DATA_PATH, exist_ok=True)
-    df.to_csv(CUSTOMERS_CSV, index=False)
-
 def log_action(func, msg, *args, **kwargs):
-    append_csv(LOGS_CSV, {"timestamp": datetime.now(), "function": func, "message": msg,
-                           "args": str(args), "kwargs": str(kwargs)})
+    log_writer.write(LOGS_CSV, {"timestamp": datetime.now(), "function": func, "message": msg,
+                                "args": str(args), "kwargs": str(kwargs)})
 
 def valid_email(email):
     return bool(email and re.match(r'^[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}$', email.strip()))
@@ -194,93 +200,23 @@ else:
             if st.button("Add Customer"):
                 df = load_customers()
                 if validate_customer(name, phone, email, df):
-                    new_id = (df['id'].max() or 0) + 1 if not df.empty else 1
-                    now = datetime.now()
-
-                    # Generate secure random credentials
-                    import secrets
-                    import string
-                    from werkzeug.security import generate_password_hash
-
-                    username = ''.join(secrets.choice(string.ascii_lowercase + string.digits) for _ in range(8))
-                    plain_password = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(8))
-                    hashed_password = generate_password_hash(plain_password)
-
-                    new_cust = {
-                        "id": new_id,
-                        "name": name,
-                        "phone": phone,
-                        "email": email,
-                        "address": address,
-                        "due": float(due),
-                        "username": username,
-                        "password": hashed_password,
-                        "plain_password": plain_password,
-                        "last_update": now.strftime("%Y-%m-%d %H:%M:%S"),
-                        "status": "active",
-                        "added_at": now.strftime("%Y-%m-%d %H:%M:%S")
-                    }
-
-                    # Add to main customers CSV
-                    df = pd.concat([df, pd.DataFrame([new_cust])], ignore_index=True)
-                    save_customers(df)
-
-                    # Add to added_customers.csv (only allowed columns)
-                    append_csv(ADDED_CSV, {
-                        "id": new_cust["id"],
-                        "name": new_cust["name"],
-                        "phone": new_cust["phone"],
-                        "email": new_cust["email"],
-                        "address": new_cust["address"],
-                        "due": new_cust["due"],
-                        "last_update": new_cust["last_update"],
-                        "status": new_cust["status"],
-                        "added_at": new_cust["added_at"]
-                    })
-
-                    # Add to dues.csv
-                    append_csv(DUES_CSV, {
-                        "id": new_id,
-                        "name": name,
-                        "phone": phone,
-                        "address": address,
-                        "due_amount": float(due),
-                        "due_date": now.date(),
-                        "last_message_date": ""
-                    })
+                    # Customer, added_customers and dues rows with generated credentials
+                    try:
+                        new_cust = services.add_customer(name, phone, address, due, email=email)
+                    except ValueError as e:
+                        st.error(f"Could not add customer: {e}")
+                        st.stop()
+                    username, plain_password = new_cust["username"], new_cust["password"]
 
                     # Log the action
                     log_action("add_customer", f"Added {name}", name, phone, address)
 
                     # Send email
                     try:
-                        send_email(
-                            email,
-                            f"Welcome to {shop_name}!",
-                            f"""
-        Hello {name},
-
-        This is an important notification from {shop_name} regarding your new account:
-
-        Your account has been successfully created with these credentials:
-        📄 Name: {name}  
-        📞 Phone: {phone}  
-        📍 Address: {address}  
-        💰 Current Due: ₹{due:.2f}
-        🔐 Username: {username}
-        🔐 Password: {plain_password}
-
-        💰 Initial Due Amount: ₹{due:.2f}
-
-        Please log in and change your password immediately for security.
-        If you have any questions or concerns, do not hesitate to reach out to us.
-
-        Thank you for choosing {shop_name}.
-
-        Warm regards,
-        {shop_name} Team
-        """
-                        )
+                        send_template("portal_welcome", email,
+                                      {"name": name, "phone": phone, "address": address, "due": due,
+                                       "username": username, "password": plain_password},
+                                      customer_id=new_cust["id"])
                         st.success(f"Customer '{name}' added! Username: {username} | Password: {plain_password}")
                     except Exception as e:
                         st.warning(f"Customer added but email failed: {e}")
@@ -308,65 +244,32 @@ else:
                         new_password = st.text_input("New Password", value=cust_data['password'])
         
                         if st.form_submit_button("Update Credentials"):
-                            from werkzeug.security import generate_password_hash
-                            import os
-                            import pandas as pd
-                            from datetime import datetime
-
-                            hashed_password = generate_password_hash(new_password)
-                    
                             # Save old credentials
                             old_username = cust_data['username']
                             old_password = cust_data['password']
 
-                            # Update main customer dataframe
-                            df.loc[df['name'] == customer, 'username'] = new_username
-                            df.loc[df['name'] == customer, 'password'] = hashed_password
-                            df.loc[df['name'] == customer, 'last_update'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-                            save_customers(df)
+                            # Update the customer (and end their sessions) through the backend
+                            try:
+                                updated = services.reset_credentials(int(cust_data['id']), new_username, new_password)
+                            except ValueError as e:
+                                st.error(f"Could not update credentials: {e}")
+                                st.stop()
 
                             # Append to reset.csv
-                            reset_file = r"D:\Projects\Customer_Due_Tracker_System\backend\data\reset.csv"
-                            reset_entry = pd.DataFrame([{
+                            append_csv(os.path.join(DATA_PATH, "reset.csv"), {
                                 "id": cust_data['id'],
                                 "name": customer,
                                 "old_username": old_username,
                                 "old_password": old_password,
                                 "new_username": new_username,
-                                "new_password": hashed_password,   # store hashed password
+                                "new_password": services.customer_store.get(updated['id'])['password'],  # hashed
                                 "plain_password": new_password     # store plain password for reference
-                            }])
-                            if os.path.exists(reset_file):
-                                reset_entry.to_csv(reset_file, mode='a', index=False, header=False)
-                            else:
-                                reset_entry.to_csv(reset_file, index=False)
+                            })
 
                             try:
-                                send_email(
-                                    cust_data['email'],
-                                    f"Important Account Update from {shop_name}",
-                                    f"""
-        Hello {customer},
-
-        This is an important notification from {shop_name} regarding your account credentials:
-
-        Your login information has been updated by the administrator.
-        🔐 New Username: {new_username}
-        🔐 New Password: {new_password}
-
-        For security reasons, we recommend:
-        1. Logging in immediately to verify access
-        2. Changing your password after first login
-
-        If you did not request this change or have any questions, please contact us immediately.
-
-        Thank you for being a valued customer.
-
-        Warm regards,
-        {shop_name} Team
-        """
-                                )
+                                send_template("portal_credentials_updated", cust_data['email'],
+                                              {"name": customer, "username": new_username, "password": new_password},
+                                              customer_id=cust_data['id'])
                                 st.success("Credentials updated and customer notified!")
                             except Exception as e:
                                 st.warning(f"Credentials updated but email failed: {e}")
@@ -393,55 +296,19 @@ else:
                     if action == "Update Due":
                         new_due = st.number_input("Enter New Due Amount", min_value=0.0, value=current_due, format="%.2f")
                         if st.button("Submit Update"):
-                            now_ts = pd.Timestamp.now()
-                            df.loc[df["id"] == cust_id, ["due", "last_update"]] = [new_due, now_ts]
-                            save_customers(df)
-                            
-                            # Append to updated_customers.csv (only allowed columns)
-                            append_csv(UPDATED_CSV, {
-                                "id": cust["id"],
-                                "name": cust["name"],
-                                "phone": cust["phone"],
-                                "email": cust["email"],
-                                "address": cust["address"],
-                                "due": cust["due"],
-                                "last_update": now_ts.strftime("%Y-%m-%d %H:%M:%S"),
-                                "status": cust["status"],
-                                "updated_due": new_due,
-                                "updated_at": now_ts.strftime("%Y-%m-%d %H:%M:%S")
-                            })
-
-                            # Update dues.csv
-                            dues_df = load_csv(DUES_CSV)
-                            dues_df.loc[dues_df['id'] == cust_id, ['due_amount', 'last_message_date']] = [new_due, now_ts]
-                            dues_df['last_message_date'] = pd.to_datetime(dues_df['last_message_date'], errors='coerce')\
-                                                            .dt.strftime("%Y-%m-%d %H:%M:%S")
-                            dues_df.to_csv(DUES_CSV, index=False)
+                            # Customer, updated_customers and dues in one backend transaction
+                            if services.update_due(int(cust_id), new_due) is None:
+                                st.error("Customer no longer exists.")
+                                st.stop()
 
                             log_action("update_due", f"Updated due for ID={cust_id}", cust_id, new_due)
                             st.success(f"Due updated to ₹{new_due:.2f} successfully!")
 
                             # Email notification
                             try:
-                                send_email(
-                                    cust['email'],
-                                    "Important Update on Your Account Due",
-                                    f"""Hello {cust['name']},
-
-This is an important notification from {shop_name} regarding your account:
-
-Your current outstanding due has been updated by the admin. 
-💰 Previous Due: ₹{current_due:.2f}
-💰 Updated Due: ₹{new_due:.2f}
-
-Please make sure to check your account and plan your payment accordingly.
-
-Thank you for being a valued customer.
-
-Warm regards,
-{shop_name} Team
-"""
-                                )
+                                send_template("due_updated", cust['email'],
+                                              {"name": cust['name'], "previous_due": current_due, "new_due": new_due},
+                                              customer_id=cust['id'])
                             except Exception as e:
                                 st.warning(f"Failed to send email: {e}")
 
@@ -450,58 +317,23 @@ Warm regards,
                             "Enter Payment Amount", min_value=0.0, max_value=current_due, value=0.0, format="%.2f"
                         )
                         if st.button("Submit Payment"):
-                            now_ts = pd.Timestamp.now()
-                            new_due = current_due - payment_amount
-
-                            df.loc[df["id"] == cust_id, ["due", "last_update"]] = [new_due, now_ts]
-                            save_customers(df)
-
-                            # Append to partial_customers.csv (only allowed columns)
-                            append_csv(PARTIAL_CSV, {
-                                "id": cust["id"],
-                                "name": cust["name"],
-                                "phone": cust["phone"],
-                                "email": cust["email"],
-                                "address": cust["address"],
-                                "due": cust["due"],
-                                "last_update": now_ts.strftime("%Y-%m-%d %H:%M:%S"),
-                                "status": cust["status"],
-                                "partial_due": new_due,
-                                "partial_at": now_ts.strftime("%Y-%m-%d %H:%M:%S")
-                            })
-
-                            # Update dues.csv
-                            dues_df = load_csv(DUES_CSV)
-                            dues_df.loc[dues_df['id'] == cust_id, ['due_amount', 'last_message_date']] = [new_due, now_ts]
-                            dues_df['last_message_date'] = pd.to_datetime(dues_df['last_message_date'], errors='coerce')\
-                                                            .dt.strftime("%Y-%m-%d %H:%M:%S")
-                            dues_df.to_csv(DUES_CSV, index=False)
+                            # Applied to the due as it is now (another payment may have landed meanwhile)
+                            paid = services.record_partial_payment(int(cust_id), payment_amount)
+                            if paid is None:
+                                st.error("Customer no longer exists.")
+                                st.stop()
+                            current_due = float(paid["partial_due"]) + payment_amount
+                            new_due = float(paid["partial_due"])
 
                             log_action("partial_payment", f"Partial payment for ID={cust_id}", cust_id, payment_amount)
                             st.success(f"Partial payment of ₹{payment_amount:.2f} applied. New due: ₹{new_due:.2f}")
 
                             # Email notification
                             try:
-                                send_email(
-                                    cust['email'],
-                                    "Partial Payment Received",
-                                    f"""Hello {cust['name']},
-
-Thank you for your recent payment to {shop_name}!
-
-💰 Previous Due: ₹{current_due:.2f}
-💰 Payment Received: ₹{payment_amount:.2f}
-💰 Remaining Due: ₹{new_due:.2f}
-
-We appreciate your prompt payment. Please continue to monitor your account
-and make timely payments to avoid any inconvenience.
-
-If you have any questions, our support team is here to help.
-
-Warm regards,
-{shop_name} Team
-"""
-                                )
+                                send_template("partial_payment", cust['email'],
+                                              {"name": cust['name'], "previous_due": current_due, "amount": payment_amount,
+                                               "new_due": new_due},
+                                              customer_id=cust['id'])
                             except Exception as e:
                                 st.warning(f"Failed to send email: {e}")
 
@@ -529,57 +361,17 @@ Warm regards,
                     st.write(f"Name: {cust['name']}, Current Due: ₹{cust['due']:.2f}")
 
                     if st.button("Delete Customer"):
-                        # Remove from customers CSV
-                        df = df[df["id"] != cust_id]
-                        save_customers(df)
-
-                        # Append to deleted CSV (only allowed columns)
-                        deleted_row = {
-                            "id": cust["id"],
-                            "name": cust["name"],
-                            "phone": cust["phone"],
-                            "email": cust["email"],
-                            "address": cust["address"],
-                            "due": cust["due"],
-                            "last_update": cust["last_update"],
-                            "status": "deleted",
-                            "deleted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                        append_csv(DELETED_CSV, deleted_row)
+                        # Customer, deleted_customers and dues in one backend transaction
+                        services.delete_customer(int(cust_id))
                         log_action("delete_customer", f"Deleted ID={cust_id}", cust_id)
 
-                        # Remove from dues CSV
-                        dues_df = load_csv(DUES_CSV)
-                        dues_df = dues_df[dues_df['id'] != cust_id]
-                        dues_df.to_csv(DUES_CSV, index=False)
-
                         st.success(f"Customer '{cust['name']}' deleted successfully!")
 
                         # ----------- SEND EMAIL -----------
                         try:
-                            send_email(
-                                cust['email'],
-                                f"Account Deletion Notice - {shop_name}",
-                                f"""
-Hello {cust['name']},
-
-This is to notify you that your account with {shop_name} has been permanently deleted from our system.
-
-📄 Customer Details:
-Name: {cust['name']}
-Phone: {cust['phone']}
-Address: {cust['address']}
-Final Due: ₹{cust['due']:.2f}
-
-If this action was a mistake or you wish to reinstate your account, 
-please contact us immediately.
-
-We value all our customers and are here to support you in case of any issues.
-
-Warm regards,
-{shop_name} Team
-"""
-                            )
+                            send_template("account_deleted", cust['email'],
+                                          {"name": cust['name'], "phone": cust['phone'], "address": cust['address'], "due": cust['due']},
+                                          customer_id=cust['id'])
                         except Exception as e:
                             st.warning(f"Failed to send email: {e}")
 
@@ -588,57 +380,19 @@ Warm regards,
                 st.warning("⚠️ This will delete ALL customer records permanently!")
 
                 if st.button("Delete ALL Customers"):
-                    for _, row in df.iterrows():
-                        deleted_row = {
-                            "id": row["id"],
-                            "name": row["name"],
-                            "phone": row["phone"],
-                            "email": row["email"],
-                            "address": row["address"],
-                            "due": row["due"],
-                            "last_update": row["last_update"],
-                            "status": "deleted",
-                            "deleted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                        append_csv(DELETED_CSV, deleted_row)
-
-                        # Remove from dues.csv
-                        dues_df = load_csv(DUES_CSV)
-                        dues_df = dues_df[dues_df['id'] != row['id']]
-                        dues_df.to_csv(DUES_CSV, index=False)
-
+                    customers = services.customer_store.records()
+                    # Customers, deleted_customers and dues in one backend transaction
+                    services.delete_all_customers()
+                    for row in customers:
                         # Log each deletion
                         log_action("delete_customer", f"Deleted ID={row['id']}", row['id'])
 
                         try:
-                            send_email(
-                                deleted_row['email'],
-                                f"Account Deletion Notice - {shop_name}",
-                                f"""
-Hello {deleted_row['name']},
-
-We regret to inform you that your account with {shop_name} has been removed from our system.
-
-📄 Customer Details:
-Name: {deleted_row['name']}
-Phone: {deleted_row['phone']}
-Address: {deleted_row['address']}
-Final Due: ₹{deleted_row['due']:.2f}
-
-If you believe this action was taken in error or wish to reinstate your account, 
-please contact us as soon as possible.
-
-We sincerely apologize for any inconvenience this may cause.
-
-Kind regards,
-{shop_name} Team
-"""
-                            )
+                            send_template("account_removed", row['email'], {**row, "status": "deleted"},
+                                          customer_id=row['id'])
                         except Exception as e:
                             st.warning(f"Failed to send email: {e}")
 
-                    # Clear customers CSV
-                    save_customers(pd.DataFrame(columns=df.columns))
                     log_action("delete_all_customers", "Deleted all customers")
                     st.success("✅ All customers deleted successfully!")
 
@@ -670,7 +424,7 @@ Kind regards,
 # ---------- View All ----------  
         elif choice == "📋 View All":
             st.header("📋 View Customers")
-            df = load_csv(CUSTOMERS_CSV)
+            df = services.customer_store.frame()
             dues_df = load_csv(DUES_CSV)  # Load dues.csv
 
             if df.empty:
@@ -733,27 +487,26 @@ Kind regards,
             st.subheader("📊 Analytics Dashboard")
             API = "http://localhost:5000"  # Flask backend
             try:
-                r = requests.get(f"{API}/api/admin/customers?active_only=true")
+                r = requests.get(f"{API}/api/admin/summary")
                 if r.status_code == 200:
                     data = r.json()
                 else:
                     st.error(f"Backend returned status {r.status_code}")
                     st.stop()
 
-                if data:
-                    df = pd.DataFrame(data)
-                    st.metric("👥 Total Customers", len(df))
-                    st.metric("💰 Total Outstanding Due", f"₹{df['due'].sum():,.2f}")
+                if data["total_customers"]:
+                    st.metric("👥 Total Customers", data["total_customers"])
+                    st.metric("💰 Total Outstanding Due", f"₹{data['total_due']:,.2f}")
             
-                    paid_count = len(df[df['due'] == 0])
-                    unpaid_count = len(df[df['due'] > 0])
+                    paid_count = data["paid"]
+                    unpaid_count = data["unpaid"]
                     
                     st.write("### 🧾 Paid vs Unpaid")
                     st.plotly_chart({"data":[{"values":[paid_count, unpaid_count],
                                       "labels":["Paid","Unpaid"],"type":"pie"}]})
             
                     st.write("### 📍 Top 5 Debtors")
-                    top_df = df[df['due']>0].nlargest(5,'due')[['name','due']]
+                    top_df = pd.DataFrame(data["top_debtors"], columns=['name', 'due'])
                     st.table(top_df.set_index('name'))
                 else:
                     st.info("No customer data available")
@@ -771,9 +524,9 @@ Kind regards,
                 (DELETED_CSV, "Deleted Customers")
             ]
             for path, label in logs:
-                df = load_csv(path)
+                df = services.storage.tail(path, 5)  # live file, then rotated segments if needed
                 st.markdown(f"**{label}:**")
-                st.dataframe(df.tail(5).iloc[::-1] if not df.empty else pd.DataFrame({"Info":["No records found"]}))
+                st.dataframe(df.iloc[::-1] if not df.empty else pd.DataFrame({"Info":["No records found"]}))
 
         # ---------------- User Transactions ----------------
         elif choice == "💳 User Transactions":
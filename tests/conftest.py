@@ -0,0 +1,25 @@
+# tests/conftest.py
+import os
+import tempfile
+import pytest
+
+# The backend reads its data folder and SMTP settings at import time: point them
+# at a scratch folder and a closed local port before any test imports it.
+os.environ["DATA_PATH"] = tempfile.mkdtemp(prefix="due-tracker-tests-")
+os.environ["STORAGE_ENGINE"] = "csv"
+os.environ["SMTP_SERVER"] = "127.0.0.1"
+os.environ["SMTP_PORT"] = "9"
+
+
+@pytest.fixture(scope="session")
+def services():
+    from backend import services
+    from backend.notifications import email_service
+    email_service.outbox.start = lambda: None  # queue only; nothing is delivered
+    return services
+
+
+@pytest.fixture
+def client(services):
+    from backend.app import create_app
+    return create_app().test_client()
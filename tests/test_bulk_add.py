@@ -0,0 +1,41 @@
+# tests/test_bulk_add.py
+from werkzeug.security import check_password_hash
+
+
+def test_bulk_add_accepts_valid_rows_and_reports_the_rest(client, services):
+    services.add_customer("Existing Bulk", "9000000401", "x", 0)
+    before = len(services.customer_store)
+    response = client.post("/api/admin/customer/bulk_add", json={"customers": [
+        {"name": "Bulk One", "phone": "9000000402", "due": "12.5", "email": "bulk1@example.com"},
+        {"name": "bulk one", "phone": "9000000403"},  # same name as row 0
+        {"name": "Bulk Two", "phone": "9000000401"},  # phone taken
+        {"name": "Bulk Three", "phone": "12345"},
+        {"name": "Bulk Four", "phone": "9000000404", "due": "lots"},
+        {"name": "Bulk Five", "phone": "9000000405", "email": "bulk1@EXAMPLE.com"},
+        {"name": "Bulk Six", "phone": "9000000406"},
+    ]})
+    assert response.status_code == 200
+    result = response.get_json()
+    assert [c["name"] for c in result["added"]] == ["Bulk One", "Bulk Six"]
+    assert {r["row"]: r["error"] for r in result["rejected"]} == {
+        1: "Name already exists", 2: "Phone already exists", 3: "Phone must be exactly 10 digits",
+        4: "Invalid due amount", 5: "Email already exists",
+    }
+    assert len(services.customer_store) == before + 2
+
+    first = result["added"][0]
+    stored = services.customer_store.get(first["id"])
+    assert stored["due"] == 12.5 and check_password_hash(stored["password"], first["password"])
+    dues = services.storage.load(services.DUES_CSV)
+    assert float(dues.loc[dues["id"] == first["id"], "due_amount"].iloc[0]) == 12.5
+    from backend.notifications.email_service import outbox
+    assert any(m["to"] == "bulk1@example.com" for m in outbox.pending())
+
+
+def test_bulk_add_reads_a_csv_body(client, services):
+    body = "name,phone,due\nCsv Bulk,9000000411,3\n,9000000412,1\n"
+    response = client.post("/api/admin/customer/bulk_add", data=body, content_type="text/csv")
+    result = response.get_json()
+    assert [c["name"] for c in result["added"]] == ["Csv Bulk"]
+    assert result["rejected"] == [{"row": 1, "error": "Name and phone are required"}]
+    assert client.post("/api/admin/customer/bulk_add", json={"customers": "nope"}).status_code == 400
@@ -0,0 +1,45 @@
+# tests/test_cache.py
+import os
+import pandas as pd
+from backend.cache import ResponseCache, etag_for
+
+
+def test_response_cache_is_keyed_by_version_and_bounded():
+    cache = ResponseCache(max_entries=2)
+    cache.put("/a", 1, "A1")
+    assert cache.get("/a", 1) == "A1"
+    assert cache.get("/a", 2) is None
+    cache.put("/b", 1, "B")
+    cache.put("/c", 1, "C")
+    assert cache.get("/a", 1) is None
+
+
+def test_etag_names_this_process():
+    assert etag_for(3).endswith("-3") and etag_for(3) != "v3"
+
+
+def test_summary_answers_304_until_a_write(client, services):
+    first = client.get("/api/admin/summary")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+    assert client.get("/api/admin/summary", headers={"If-None-Match": etag}).status_code == 304
+
+    services.add_customer("Cache bust", "9333333333", "addr", 5)
+    again = client.get("/api/admin/summary", headers={"If-None-Match": etag})
+    assert again.status_code == 200 and again.headers["ETag"] != etag
+
+
+def test_history_rows_appended_outside_the_api_invalidate_recent_activity(client, services):
+    first = client.get("/api/admin/recent_activity")
+    etag = first.headers["ETag"]
+    assert client.get("/api/admin/recent_activity", headers={"If-None-Match": etag}).status_code == 304
+
+    # another process (the dashboard) appends straight to a history table
+    row = {"id": 424242, "name": "Outside", "phone": "9444444444", "email": "", "address": "x", "due": 1.0,
+           "last_update": "2099-01-01 00:00:00", "status": "active", "added_at": "2099-01-01 00:00:00"}
+    path = services.ADDED_CSV
+    pd.DataFrame([row]).to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+    again = client.get("/api/admin/recent_activity", headers={"If-None-Match": etag})
+    assert again.status_code == 200
+    assert any(r.get("name") == "Outside" for r in again.get_json())
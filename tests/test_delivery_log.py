@@ -0,0 +1,64 @@
+# tests/test_delivery_log.py
+import os
+import pytest
+from backend.notifications.delivery_log import DeliveryLog
+
+
+def row(timestamp, customer_id, status="Sent"):
+    return {"timestamp": timestamp, "customer_id": customer_id, "customer_email": "c@example.com",
+            "subject": "Reminder", "status": status}
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = DeliveryLog(str(tmp_path / "email_logs.csv"), save_rows=1000)
+    log.append(row("2026-10-01 09:00:00", 1))
+    log.append(row("2026-10-01 10:00:00", 2, "Failed"))
+    log.append(row("2026-10-02 09:00:00", 1))
+    log.append(row("2026-10-03 09:00:00", 2))
+    return log
+
+
+def times(rows):
+    return [r["timestamp"] for r in rows]
+
+
+def test_query_by_customer_newest_first(log):
+    assert times(log.query(customer_id=1)) == ["2026-10-02 09:00:00", "2026-10-01 09:00:00"]
+    assert times(log.query(customer_id="1.0")) == times(log.query(customer_id=1))
+
+
+def test_query_by_day_range_status_and_limit(log):
+    assert times(log.query(start="2026-10-02")) == ["2026-10-03 09:00:00", "2026-10-02 09:00:00"]
+    assert times(log.query(customer_id=2, end="2026-10-02")) == ["2026-10-01 10:00:00"]
+    assert times(log.query(status="Failed")) == ["2026-10-01 10:00:00"]
+    assert len(log.query(limit=3)) == 3
+
+
+def test_rows_appended_by_another_process_are_indexed(log):
+    with open(log.path, "ab") as f:
+        f.write(b"2026-10-04 09:00:00,5.0,c@example.com,Reminder,Sent\r\n")
+    assert times(log.query(customer_id=5)) == ["2026-10-04 09:00:00"]
+
+
+def test_saved_index_is_reused_and_dropped_after_rotation(log):
+    log.save()
+    assert os.path.exists(log.index_path)
+    reopened = DeliveryLog(log.path)
+    assert times(reopened.query(customer_id=2)) == ["2026-10-03 09:00:00", "2026-10-01 10:00:00"]
+    assert reopened._offset == os.path.getsize(log.path)
+
+    os.replace(log.path, log.path + ".old")  # rotated away: a new file, new offsets
+    log.append(row("2026-10-05 09:00:00", 2))
+    assert times(log.query(customer_id=2)) == ["2026-10-05 09:00:00"]
+
+
+def test_unfiltered_query_reads_only_the_newest_rows(log, monkeypatch):
+    for day in range(4, 30):
+        log.append(row(f"2026-10-{day:02d} 09:00:00", 4))
+    log.append(row("2026-10-01 11:00:00", 5))  # a late row for an earlier day is still the newest
+    read = []
+    newest = log._newest_offsets
+    monkeypatch.setattr(log, "_newest_offsets", lambda *a: (read.append(o) or o for o in newest(*a)))
+    assert times(log.query(limit=2)) == ["2026-10-01 11:00:00", "2026-10-29 09:00:00"]
+    assert len(read) == 2
@@ -0,0 +1,45 @@
+# tests/test_export.py
+import json
+import pandas as pd
+import pytest
+from backend.export import stream_export
+
+
+def chunks():
+    yield pd.DataFrame([{"id": 1, "name": "Asha"}, {"id": 2, "name": "Ravi"}])
+    yield pd.DataFrame([{"name": "Meera", "id": 3}])
+
+
+def test_stream_export_writes_each_chunk_in_the_first_ones_layout():
+    assert "".join(stream_export(chunks(), "csv")) == "id,name\n1,Asha\n2,Ravi\n3,Meera\n"
+    lines = "".join(stream_export(chunks(), "ndjson")).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3]
+    with pytest.raises(ValueError):
+        stream_export(chunks(), "xlsx")
+
+
+def test_export_chunks_are_bounded(services):
+    for i in range(3):
+        services.add_customer(f"Chunked{i}", f"90000002{i:02d}", "x", i)
+    parts = list(services.export_chunks("customers", chunksize=2))
+    assert len(parts) >= 2 and all(len(part) <= 2 for part in parts)
+    assert "password" not in parts[0].columns
+
+
+def test_export_route_streams_the_dataset(client, services):
+    cust = services.add_customer("Exported", "9000000301", "x", 5)
+    response = client.get("/api/admin/export/customers?format=ndjson")
+    assert response.status_code == 200 and response.is_streamed
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert any(r["id"] == cust["id"] and r["name"] == "Exported" for r in rows)
+    assert all("password" not in r for r in rows)
+
+    response = client.get("/api/admin/export/customers?format=csv")
+    assert response.headers["Content-Disposition"] == "attachment; filename=customers.csv"
+    assert response.get_data(as_text=True).startswith("id,")
+
+
+def test_export_route_rejects_bad_arguments(client):
+    assert client.get("/api/admin/export/customers?format=xlsx").status_code == 400
+    assert client.get("/api/admin/export/customers?start=yesterday").status_code == 400
+    assert client.get("/api/admin/export/nothing").status_code == 404
@@ -0,0 +1,107 @@
+# tests/test_outbox.py
+import smtplib
+import pytest
+from backend.notifications.outbox import Outbox, backoff, permanent_failure
+
+
+class Dispatcher:
+    """Runs submitted deliveries straight away, in the test's thread."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, fn, *args):
+        self.calls.append(args)
+        fn(*args)
+        return True
+
+
+def make_outbox(path, deliver, monkeypatch, **kwargs):
+    box = Outbox(str(path), deliver=deliver, submit=Dispatcher(), lease_ttl=60, **kwargs)
+    monkeypatch.setattr(box, "start", lambda: None)  # the tests drive delivery by hand
+    return box
+
+
+def own_lease(box, polls=3):
+    """Poll the lease like the delivery loop does; True once it is confirmed ours."""
+    return any([box._hold_lease() for _ in range(polls)])
+
+
+def test_keys_deduplicate_and_survive_a_restart(tmp_path, monkeypatch):
+    path = tmp_path / "email_outbox.jsonl"
+    box = make_outbox(path, lambda msg: None, monkeypatch)
+    assert box.enqueue("a@example.com", "Hi", "body", key="k1") is True
+    assert box.enqueue("a@example.com", "Hi", "body", key="k1") is False
+    restarted = make_outbox(path, lambda msg: None, monkeypatch)
+    assert [m["id"] for m in restarted.pending()] == ["k1"]
+
+
+def test_only_the_lease_holder_delivers(tmp_path, monkeypatch):
+    path = tmp_path / "email_outbox.jsonl"
+    first = make_outbox(path, lambda msg: None, monkeypatch)
+    second = make_outbox(path, lambda msg: None, monkeypatch)
+    assert own_lease(first) is True
+    assert own_lease(second) is False
+    first._release_lease()
+    assert own_lease(second) is True
+
+
+def test_failed_delivery_is_retried_with_backoff(tmp_path, monkeypatch):
+    sent = []
+
+    def deliver(msg):
+        if not sent:
+            sent.append(None)
+            raise smtplib.SMTPServerDisconnected("dropped")
+        sent.append(msg["id"])
+
+    results = []
+    box = make_outbox(tmp_path / "email_outbox.jsonl", deliver, monkeypatch,
+                      on_result=lambda msg, status: results.append(status))
+    box.enqueue("a@example.com", "Hi", "body", key="k1")
+    box._dispatch_due()
+    msg = box.get("k1")
+    assert msg["state"] == "pending" and msg["attempts"] == 1 and msg["next_at"] > 0
+    assert results[0].startswith("Failed: dropped (attempt 1")
+
+    box._dispatch_due()  # not due yet
+    assert box.get("k1")["attempts"] == 1
+    box._messages["k1"]["next_at"] = 0
+    monkeypatch.setattr(box, "_refresh", lambda: None)
+    box._dispatch_due()
+    assert box.get("k1")["state"] == "sent" and sent[-1] == "k1" and results[-1] == "Sent"
+
+
+def test_permanent_failures_and_max_attempts_go_dead(tmp_path, monkeypatch):
+    def deliver(msg):
+        raise smtplib.SMTPRecipientsRefused({msg["to"]: (550, b"no such user")})
+
+    box = make_outbox(tmp_path / "email_outbox.jsonl", deliver, monkeypatch)
+    box.enqueue("gone@example.com", "Hi", "body", key="k1")
+    box._dispatch_due()
+    assert box.get("k1")["state"] == "dead"
+
+    flaky = make_outbox(tmp_path / "other.jsonl", lambda msg: 1 / 0, monkeypatch, max_attempts=1)
+    flaky.enqueue("a@example.com", "Hi", "body", key="k2")
+    flaky._dispatch_due()
+    assert flaky.get("k2")["state"] == "dead"
+
+
+def test_sensitive_bodies_are_compacted_away(tmp_path, monkeypatch):
+    path = tmp_path / "email_outbox.jsonl"
+    box = make_outbox(path, lambda msg: None, monkeypatch)
+    box.enqueue("a@example.com", "Login", "password: hunter2", key="k1", sensitive=True)
+    box._dispatch_due()
+    assert box._scrub
+    box.compact()
+    assert "hunter2" not in path.read_text()
+    assert box.enqueue("a@example.com", "Login", "password: hunter2", key="k1") is False
+
+
+def test_backoff_and_permanent_failure():
+    assert backoff(1, base=30, cap=3600) == pytest.approx(30, rel=0.11)
+    assert backoff(4, base=30, cap=3600) == pytest.approx(240, rel=0.11)
+    assert backoff(20, base=30, cap=3600) <= 3600 * 1.1
+    assert permanent_failure(smtplib.SMTPResponseException(554, b"rejected"))
+    assert not permanent_failure(smtplib.SMTPResponseException(451, b"try later"))
+    assert not permanent_failure(smtplib.SMTPAuthenticationError(535, b"bad login"))
@@ -0,0 +1,48 @@
+# tests/test_ratelimit.py
+import pytest
+from backend import ratelimit
+from backend.ratelimit import SlidingWindowLimiter, check_all
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_limit_per_key_within_the_window(clock):
+    limiter = SlidingWindowLimiter(limit=3, window=60)
+    assert [limiter.hit("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.hit("a") == pytest.approx(60)
+    assert limiter.hit("b") == 0.0  # other keys are unaffected
+    clock[0] += 30
+    assert limiter.hit("a") == pytest.approx(30)
+    clock[0] += 30
+    assert limiter.hit("a") == 0.0  # the first hit has left the window
+
+
+def test_reset_clears_a_key(clock):
+    limiter = SlidingWindowLimiter(limit=1, window=60)
+    limiter.hit("a")
+    assert limiter.hit("a") > 0
+    limiter.reset("a")
+    assert limiter.hit("a") == 0.0
+
+
+def test_idle_and_excess_keys_are_evicted(clock):
+    limiter = SlidingWindowLimiter(limit=2, window=10, max_keys=3)
+    for key in "abcd":
+        limiter.hit(key)
+    assert list(limiter._hits) == ["b", "c", "d"]
+    clock[0] += 11
+    limiter.hit("e")
+    assert list(limiter._hits) == ["e"]
+
+
+def test_check_all_records_nothing_when_one_limiter_refuses(clock):
+    per_user = SlidingWindowLimiter(limit=5, window=60)
+    per_ip = SlidingWindowLimiter(limit=1, window=60)
+    assert check_all([(per_user, "asha"), (per_ip, "10.0.0.1")]) == 0.0
+    assert check_all([(per_user, "asha"), (per_ip, "10.0.0.1")]) > 0
+    assert len(per_user._hits["asha"]) == 1
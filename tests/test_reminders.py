@@ -0,0 +1,71 @@
+# tests/test_reminders.py
+import pandas as pd
+import pytest
+from backend.reminders import parse_tiers, plan_reminders
+
+NOW = pd.Timestamp("2026-10-18 09:00:00")
+
+
+def day(days_ago):
+    return (NOW - pd.Timedelta(days=days_ago)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def plan(rows, customers=None, **kwargs):
+    dues = pd.DataFrame(rows, columns=["id", "due_amount", "due_date", "last_message_date"])
+    customers = customers or {r[0]: {"id": r[0], "email": f"c{r[0]}@example.com", "due": r[1], "status": "active"}
+                              for r in rows}
+    return sorted(c["id"] for c in plan_reminders(dues, customers.get, now=NOW, **kwargs))
+
+
+def test_parse_tiers():
+    assert parse_tiers("60:1, 0:7,30:3") == ([0, 30, 60], [7, 3, 1])
+    assert parse_tiers("0:0") == ([0], [1])
+    with pytest.raises(ValueError):
+        parse_tiers("")
+
+
+def test_interval_follows_the_overdue_tier():
+    rows = [
+        (1, 100, day(10), day(6)),   # tier 0 (weekly), reminded 6 days ago
+        (2, 100, day(10), day(7)),   # tier 0, a week ago
+        (3, 100, day(40), day(2)),   # tier 30 (every 3 days)
+        (4, 100, day(40), day(3)),
+        (5, 100, day(70), day(1)),   # tier 60 (daily)
+        (6, 100, day(10), None),     # never reminded
+    ]
+    assert plan(rows, tiers="0:7,30:3,60:1", grace_days=0) == [2, 4, 5, 6]
+
+
+def test_default_cadence_is_daily():
+    rows = [(1, 100, day(2), day(1)), (2, 100, day(2), day(0))]
+    assert plan(rows, tiers="0:1", grace_days=0) == [1]
+
+
+def test_below_the_first_tier_is_never_reminded():
+    assert plan([(1, 100, day(3), None)], tiers="5:1", grace_days=0) == []
+
+
+def test_nothing_owed_or_no_email_is_skipped():
+    rows = [(1, 0, day(5), None), (2, 100, day(5), None), (3, 100, day(5), None)]
+    customers = {2: {"id": 2, "email": "", "due": 100}, 3: {"id": 3, "email": "c3@example.com", "due": 0}}
+    assert plan(rows, customers, tiers="0:1", grace_days=0) == []
+
+
+def test_recent_payment_starts_a_grace_period():
+    rows = [(1, 100, day(5), None), (2, 100, day(5), None), (3, 100, day(5), None)]
+    payments = pd.DataFrame({"id": ["1", 2.0], "paid_at": pd.to_datetime([day(1), day(3)])})
+    assert plan(rows, tiers="0:1", grace_days=3, payments=payments) == [2, 3]
+    assert plan(rows, tiers="0:1", grace_days=0, payments=payments) == [1, 2, 3]
+
+
+def test_only_queued_reminders_are_marked_sent(services):
+    from backend.scheduler import send_due_reminders
+    good = services.add_customer("Remind ok", "9555555551", "x", 100, email="ok@example.com")
+    bad = services.add_customer("Remind bad", "9555555552", "x", 100, email="bad@example.com")
+    services.customer_store.update(bad["id"], {"email": "bad@example.com\nBcc: x@y.z"})
+
+    planned = send_due_reminders(NOW)
+    assert {good["id"], bad["id"]} <= {c["id"] for c in planned}
+    dues = services.storage.load(services.DUES_CSV).set_index("id")
+    assert dues.loc[good["id"], "last_message_date"] == NOW.strftime("%Y-%m-%d %H:%M:%S")
+    assert pd.isna(dues.loc[bad["id"], "last_message_date"]) or not dues.loc[bad["id"], "last_message_date"]
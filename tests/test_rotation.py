@@ -0,0 +1,41 @@
+# tests/test_rotation.py
+import gzip
+import os
+import threading
+import pytest
+from backend.rotation import SegmentManifest, rotate_file
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "history.csv"
+    path.write_text("id,timestamp,amount\n1,2024-01-01 10:00:00,5\n2,2024-01-02 10:00:00,7\n")
+    return str(path)
+
+
+def test_rows_with_extra_columns_still_rotate(log, tmp_path):
+    with open(log, "a") as f:
+        f.write("3,2024-01-03 10:00:00,9,legacy\n")
+    manifest = SegmentManifest(str(tmp_path / "archive"))
+    entry = rotate_file(log, "timestamp", manifest, threading.Lock(), max_bytes=1)
+    assert entry["rows"] == 2 and entry["end"] == "2024-01-02 10:00:00"
+    with gzip.open(os.path.join(manifest.archive_dir, entry["file"]), "rt") as f:
+        assert "legacy" in f.read()  # the segment keeps every line
+    assert not os.path.exists(log + ".rotating")
+
+
+def test_failed_archive_hands_the_rows_back(log, tmp_path, monkeypatch):
+    manifest = SegmentManifest(str(tmp_path / "archive"))
+    lock = threading.Lock()
+    monkeypatch.setattr(manifest, "add", lambda *a: (_ for _ in ()).throw(OSError("disk full")))
+    with pytest.raises(OSError):
+        rotate_file(log, "timestamp", manifest, lock, max_bytes=1)
+    assert not os.path.exists(log + ".rotating")
+    assert not os.listdir(manifest.archive_dir)  # no segment outside the manifest
+
+    monkeypatch.undo()
+    assert rotate_file(log, "timestamp", manifest, lock, max_bytes=10**6) is None
+    with open(log) as f:
+        assert f.read() == "id,timestamp,amount\n1,2024-01-01 10:00:00,5\n2,2024-01-02 10:00:00,7\n"
+    entry = rotate_file(log, "timestamp", manifest, lock, max_bytes=1)
+    assert entry["rows"] == 2
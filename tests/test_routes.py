@@ -0,0 +1,48 @@
+# tests/test_routes.py
+def test_add_customer_rejects_line_breaks_in_email_before_saving(client, services):
+    before = len(services.customer_store)
+    response = client.post("/api/admin/customer/add", json={
+        "name": "Injected", "phone": "9000000001", "address": "x", "due": 10,
+        "email": "a@b.com\r\nBcc: x@y.z",
+    })
+    assert response.status_code == 400
+    assert len(services.customer_store) == before
+    assert not any(r["name"] == "Injected" for r in services.customer_store.records())
+
+
+def test_add_customer_queues_the_welcome_email(client, services):
+    response = client.post("/api/admin/customer/add", json={
+        "name": "Welcome", "phone": "9000000002", "address": "x", "due": 10, "email": "w@example.com",
+    })
+    assert response.status_code == 200
+    cust = response.get_json()
+    assert services.customer_store.get(cust["id"])["email"] == "w@example.com"
+    from backend.notifications.email_service import outbox
+    assert any(m["to"] == "w@example.com" for m in outbox.pending())
+
+
+def test_reset_credentials_refuses_a_stored_address_with_line_breaks(client, services):
+    cust = services.add_customer("Stored", "9000000003", "x", 0, email="s@example.com")
+    services.customer_store.update(cust["id"], {"email": "s@example.com\nBcc: x@y.z"})
+    response = client.post("/api/admin/credentials/reset",
+                           json={"customer_id": cust["id"], "new_username": "stored_new"})
+    assert response.status_code == 400
+    assert services.customer_store.get(cust["id"])["username"] == cust["username"]
+
+
+def test_login_throttle_keys_on_the_client_behind_a_trusted_proxy(services):
+    from backend.app import create_app
+    from backend.ratelimit import login_by_ip, login_by_user
+    client = create_app(trusted_proxies=1).test_client()
+
+    def login(i, ip):
+        return client.post("/api/user/login", json={"username": f"nobody{i}", "password": "x"},
+                           headers={"X-Forwarded-For": ip}).status_code
+
+    try:
+        codes = [login(i, "203.0.113.5") for i in range(login_by_ip.limit + 1)]
+        assert codes[-1] == 429 and set(codes[:-1]) == {401}
+        assert login("other", "198.51.100.7") == 401  # another client behind the same proxy
+    finally:
+        login_by_ip._hits.clear()
+        login_by_user._hits.clear()
@@ -0,0 +1,54 @@
+# tests/test_services.py
+import threading
+import pytest
+
+
+@pytest.fixture
+def customer(services):
+    count = len(services.customer_store)
+    return services.add_customer(f"Svc {count}", f"91{count:08d}", "addr", 1000)
+
+
+def due_record(services, customer_id):
+    dues = services.storage.load(services.DUES_CSV)
+    return float(dues.loc[dues["id"] == customer_id, "due_amount"].iloc[-1])
+
+
+def test_concurrent_payments_are_not_lost(services, customer):
+    def pay(fn, *args):
+        for _ in range(10):
+            fn(*args)
+
+    threads = [threading.Thread(target=pay, args=(services.record_partial_payment, customer["id"], 10)),
+               threading.Thread(target=pay, args=(services.user_pay_due, "u", customer["id"], 5)),
+               threading.Thread(target=pay, args=(services.record_partial_payment, customer["id"], 1))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert services.customer_store.get(customer["id"])["due"] == pytest.approx(1000 - 160)
+    assert due_record(services, customer["id"]) == pytest.approx(840)
+
+
+def test_batch_update_dues_applies_changes_in_order(services, customer):
+    other = services.add_customer("Batch other", "9299999999", "addr", 50)
+    results = services.batch_update_dues([
+        {"id": customer["id"], "amount": 100},
+        {"id": customer["id"], "new_due": 500},
+        {"id": customer["id"], "amount": 25},
+        {"id": other["id"], "amount": "x"},
+        {"id": 999999, "amount": 1},
+        {"id": other["id"], "amount": 20},
+    ])
+    assert [r["status"] for r in results] == ["ok", "ok", "ok", "error", "error", "ok"]
+    assert [r["due"] for r in results if r["status"] == "ok"] == [900, 500, 475, 30]
+    assert results[4]["error"] == "Customer not found"
+    assert services.customer_store.get(customer["id"])["due"] == 475
+    assert due_record(services, customer["id"]) == 475
+    assert due_record(services, other["id"]) == 30
+
+    partial = services.storage.load(services.PARTIAL_CSV)
+    mine = partial[partial["id"] == customer["id"]]
+    assert list(mine["partial_due"].tail(2)) == [900, 475]
+    updated = services.storage.load(services.UPDATED_CSV)
+    assert list(updated.loc[updated["id"] == customer["id"], "updated_due"]) == [500]
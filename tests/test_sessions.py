@@ -0,0 +1,53 @@
+# tests/test_sessions.py
+import pytest
+from backend.sessions import SessionCache
+
+
+@pytest.fixture
+def customer(services):
+    cust = services.add_customer("Session", "9000000101", "x", 100, email="session@example.com")
+    return services.reset_credentials(cust["id"], new_username=f"session{cust['id']}", new_password="secret1")
+
+
+def login(client, customer, password="secret1"):
+    return client.post("/api/user/login", json={"username": customer["username"], "password": password})
+
+
+def pay(client, token=None, amount=10):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return client.post("/api/user/due/pay", json={"amount": amount}, headers=headers)
+
+
+def test_user_routes_need_the_login_token(client, services, customer):
+    assert login(client, customer, "wrong").status_code == 401
+    assert pay(client).status_code == 401
+    assert pay(client, "not-a-token").status_code == 401
+
+    response = login(client, customer)
+    assert response.status_code == 200
+    token = response.get_json()["token"]
+    assert pay(client, token).get_json()["due"] == 90.0
+    assert services.customer_store.get(customer["id"])["due"] == 90.0
+
+    client.post("/api/user/logout", headers={"Authorization": f"Bearer {token}"})
+    assert pay(client, token).status_code == 401
+
+
+def test_credential_reset_revokes_open_sessions(client, services, customer):
+    token = login(client, customer).get_json()["token"]
+    services.reset_credentials(customer["id"], new_password="secret2")
+    assert pay(client, token).status_code == 401
+    assert pay(client, login(client, customer, "secret2").get_json()["token"]).status_code == 200
+
+
+def test_session_cache_expires_and_bounds_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("backend.sessions.time.time", lambda: now[0])
+    cache = SessionCache(ttl=60, max_entries=2)
+    first = cache.put({"customer_id": 1})
+    cache.put({"customer_id": 2})
+    cache.put({"customer_id": 3})
+    assert cache.get(first) is None  # the oldest is dropped past max_entries
+    last = cache.put({"customer_id": 4})
+    now[0] += 61
+    assert cache.get(last) is None
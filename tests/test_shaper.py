@@ -0,0 +1,56 @@
+# tests/test_shaper.py
+import smtplib
+import pytest
+from backend.notifications import shaper
+from backend.notifications.shaper import SendShaper, is_throttle
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shaper.time, "monotonic", lambda: now[0])
+    return now
+
+
+def throttled():
+    return smtplib.SMTPResponseException(421, b"4.7.0 Try again later")
+
+
+def test_burst_then_refill_at_the_rate(clock):
+    bucket = SendShaper(per_minute=60, per_day=0, burst=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_acquire() == pytest.approx(1.0)
+    clock[0] += 1
+    assert bucket.try_acquire() == 0.0
+
+
+def test_refund_returns_the_token(clock):
+    bucket = SendShaper(per_minute=60, per_day=0, burst=1)
+    bucket.try_acquire()
+    bucket.refund()
+    assert bucket.try_acquire() == 0.0
+
+
+def test_daily_quota(clock):
+    bucket = SendShaper(per_minute=0, per_day=2)
+    assert bucket.try_acquire() == bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() > 0
+
+
+def test_throttling_halves_the_rate_and_clean_sends_recover(clock):
+    bucket = SendShaper(per_minute=60, per_day=0, burst=2, floor=1, recovery_sends=2)
+    bucket.try_acquire()
+    bucket.observe(throttled())
+    assert bucket.rate * 60 == pytest.approx(30)
+    assert bucket.tokens == 0
+    bucket.observe(throttled())  # in flight before the cut: no second halving
+    assert bucket.rate * 60 == pytest.approx(30)
+    bucket.observe()
+    assert bucket.rate * 60 == pytest.approx(60)
+
+
+def test_is_throttle():
+    assert is_throttle(throttled())
+    assert is_throttle(smtplib.SMTPResponseException(450, b"4.2.1 rate limited"))
+    assert not is_throttle(smtplib.SMTPResponseException(450, b"mailbox busy"))
+    assert not is_throttle(smtplib.SMTPResponseException(550, b"no such user"))
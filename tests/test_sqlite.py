@@ -0,0 +1,63 @@
+# tests/test_sqlite.py
+import pandas as pd
+import pytest
+from backend.storage.sqlite_engine import SqliteEngine
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "due_tracker.db")
+
+
+def test_engine_reads_and_writes_rows(db):
+    engine = SqliteEngine(db)
+    assert engine.load("dues.csv").empty and engine.version("dues") == 0
+    engine.append("dues.csv", [{"id": 1, "due_amount": 10.0}, {"id": 2, "due_amount": 20.0}])
+    engine.append("dues.csv", [{"id": 3, "due_amount": 30.0, "last_message_date": "2026-10-01"}])
+    assert engine.update_where("dues.csv", {"id": 2}, {"due_amount": 5.0}) == 1
+    assert engine.update_rows("dues.csv", "id", pd.DataFrame({"id": [1, 3], "due_amount": [1.0, 3.0]})) == 2
+    assert engine.delete_where("dues.csv", {"id": 3}) == 1
+    assert engine.update_where("dues.csv", {"missing": 1}, {"due_amount": 0}) == 0
+    df = engine.load("dues.csv")
+    assert df["due_amount"].tolist() == [1.0, 5.0] and "last_message_date" in df.columns
+    assert engine.tail("dues.csv", 1)["id"].tolist() == [2]
+    assert [len(c) for c in engine.iter_chunks("dues.csv", 1)] == [1, 1]
+    assert engine.stamp("dues.csv") == engine.version("dues") == 5
+
+
+def test_failed_transaction_rolls_back_every_write(db):
+    engine = SqliteEngine(db)
+    engine.append("dues.csv", [{"id": 1, "due_amount": 10.0}])
+    version = engine.version("dues")
+    with pytest.raises(RuntimeError):
+        with engine.transaction():
+            engine.update_where("dues.csv", {"id": 1}, {"due_amount": 0.0})
+            engine.append("dues.csv", [{"id": 2, "due_amount": 2.0}])
+            raise RuntimeError("boom")
+    assert engine.load("dues.csv")["due_amount"].tolist() == [10.0]
+    assert engine.version("dues") == version
+
+
+def test_customer_store_persists_and_follows_other_processes(db):
+    writer = SqliteEngine(db).customer_store("customers.csv")
+    writer.insert({"id": 1, "name": "Asha", "username": "asha", "due": 100.0, "status": "active"})
+    writer.insert_many([{"id": i, "name": f"C{i}", "username": f"c{i}", "due": 0.0, "status": "active"}
+                        for i in (2, 3)])
+    reader = SqliteEngine(db).customer_store("customers.csv")  # another process's engine
+    assert len(reader) == 3 and reader.get_by_username("asha")["due"] == 100.0
+
+    writer.update(1, {"due": 40.0})
+    writer.delete(3)
+    assert reader.get(1)["due"] == 40.0 and reader.get(3) is None
+    assert writer.compact() is False
+
+
+def test_customer_store_drops_writes_rolled_back_with_the_transaction(db):
+    engine = SqliteEngine(db)
+    store = engine.customer_store("customers.csv")
+    store.insert({"id": 1, "name": "Asha", "username": "asha", "due": 100.0, "status": "active"})
+    with pytest.raises(RuntimeError):
+        with engine.transaction():
+            store.update(1, {"due": 0.0})
+            raise RuntimeError("boom")
+    assert store.get(1)["due"] == 100.0
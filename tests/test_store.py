@@ -0,0 +1,151 @@
+# tests/test_store.py
+import pandas as pd
+import pytest
+from backend.store import CustomerStore, SortedIndex
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "customers.csv"
+    pd.DataFrame([
+        {"id": 1, "name": "Asha", "username": "asha", "due": 100.0, "status": "active"},
+        {"id": 2, "name": "Ravi", "username": "ravi", "due": 0.0, "status": "active"},
+    ]).to_csv(path, index=False)
+    return str(path)
+
+
+def test_lookups_by_id_and_username(path):
+    store = CustomerStore(path)
+    assert store.get("1")["name"] == "Asha"
+    assert store.get(3) is None
+    assert store.get_by_username("  ravi ")["id"] == 2
+    assert store.get_by_username("nobody") is None
+    assert store.next_id() == 3
+    assert len(store) == 2
+
+
+def test_returned_rows_are_copies(path):
+    store = CustomerStore(path)
+    store.get(1)["name"] = "changed"
+    store.records()[0]["name"] = "changed"
+    store.frame().loc[0, "name"] = "changed"
+    assert store.get(1)["name"] == "Asha"
+
+
+def test_snapshot_rewritten_elsewhere_is_reloaded(path):
+    store = CustomerStore(path)
+    assert store.get(1)["status"] == "active"
+    df = pd.read_csv(path)
+    df.loc[df["id"] == 1, "status"] = "deleted"
+    df.loc[len(df)] = [3, "Meera", "meera", 5.0, "active"]
+    df.to_csv(path, index=False)
+    assert store.get(1)["status"] == "deleted"
+    assert [r["id"] for r in store.records(active_only=True)] == [2, 3]
+
+
+def test_mutations_are_journaled_not_rewritten(path):
+    store = CustomerStore(path)
+    before = open(path).read()
+    store.update(1, {"due": 50.0})
+    store.insert({"id": 3, "name": "Meera", "username": "meera", "due": 10.0, "status": "active"})
+    assert open(path).read() == before
+    assert store.journal.size() > 0
+    assert store.get(1)["due"] == 50.0
+    assert store.get_by_username(" meera ")["id"] == 3
+
+
+def test_another_process_replays_the_journal(path):
+    writer, reader = CustomerStore(path), CustomerStore(path)
+    assert reader.get(2)["due"] == 0.0
+    writer.update(2, {"due": 75.0})
+    writer.delete(1)
+    assert reader.get(2)["due"] == 75.0
+    assert reader.get(1) is None
+    assert len(reader) == 1
+
+
+def test_compact_folds_the_journal_into_the_snapshot(path):
+    store = CustomerStore(path)
+    store.update(1, {"due": 20.0})
+    assert store.compact() is True
+    assert store.journal.size() == 0
+    assert store.compact() is False  # nothing left to fold
+    assert pd.read_csv(path).set_index("id").loc[1, "due"] == 20.0
+    assert CustomerStore(path).get(1)["due"] == 20.0
+
+
+def test_compact_keeps_records_appended_by_other_processes(path):
+    mine, other = CustomerStore(path), CustomerStore(path)
+    mine.update(1, {"due": 1.0})
+    other.update(2, {"due": 2.0})
+    mine.compact()
+    fresh = CustomerStore(path)
+    assert fresh.get(1)["due"] == 1.0
+    assert fresh.get(2)["due"] == 2.0
+
+
+def test_replace_only_applies_the_callers_edits(path):
+    mine, other = CustomerStore(path), CustomerStore(path)
+    df = mine.frame()
+    other.update(2, {"due": 99.0})  # lands between frame() and replace()
+    df.loc[df["id"] == 1, "name"] = "Asha K"
+    mine.replace(df)
+    fresh = CustomerStore(path)
+    assert fresh.get(1)["name"] == "Asha K"
+    assert fresh.get(2)["due"] == 99.0
+
+
+def test_page_walks_the_index_with_offsets_and_cursors(path):
+    store = CustomerStore(path)
+    store.insert_many([{"id": i, "name": f"C{i}", "username": f"c{i}", "due": float(i), "status": "active"}
+                       for i in range(3, 11)])
+    index = SortedIndex(lambda row: float(row["due"]))
+    store.add_listener(index)
+
+    rows, last, more = store.page(index, limit=4)
+    assert [r["id"] for r in rows] == [2, 3, 4, 5] and more
+    rows, last, more = store.page(index, limit=4, after=last)
+    assert [r["id"] for r in rows] == [6, 7, 8, 9] and more
+    rows, _, more = store.page(index, limit=4, after=last)
+    assert [r["id"] for r in rows] == [10, 1] and not more  # id 1 owes 100
+
+    rows, _, _ = store.page(index, offset=2, limit=2, reverse=True)
+    assert [r["id"] for r in rows] == [9, 8]
+    rows, _, _ = store.page(index, predicate=lambda r: r["id"] % 2 == 0, limit=3)
+    assert [r["id"] for r in rows] == [2, 4, 6]
+
+
+def test_index_follows_updates_and_deletes(path):
+    store = CustomerStore(path)
+    index = SortedIndex(lambda row: float(row["due"]))
+    store.add_listener(index)
+    store.update(2, {"due": 500.0})
+    store.delete(1)
+    assert index.entries == [(500.0, 2)]
+
+
+def test_replace_diffs_each_copy_against_its_own_base(path):
+    store = CustomerStore(path)
+    a = store.frame()
+    b = store.frame()
+    b.loc[b["id"] == 2, "due"] = 7.0
+    store.replace(b)
+    store.frame()  # a newer copy does not change what `a` is compared with
+    a.loc[a["id"] == 1, "name"] = "Asha K"
+    store.replace(a)
+    fresh = CustomerStore(path)
+    assert fresh.get(1)["name"] == "Asha K"
+    assert fresh.get(2)["due"] == 7.0  # not reverted by `a`'s stale value
+
+
+def test_replace_refuses_frames_it_did_not_hand_out(path):
+    store = CustomerStore(path)
+    with pytest.raises(ValueError):
+        store.replace(pd.DataFrame([{"id": 9, "name": "Stray"}]))
+    stale = store.frame()
+    for _ in range(5):
+        store.update(1, {"due": 1.0})
+        store.frame()
+    with pytest.raises(ValueError):
+        store.replace(stale)
+    assert store.get(9) is None and len(store) == 2